@@ -0,0 +1,84 @@
+"""
+Measures the memory needed to hold a catalog of collections.
+
+Synthetic collections looking like the Dacoromanica ones (a details link, a
+PDF link, a title, one of a few thousand authors and a year) are stored as a
+list of objects keeping their attributes in a __dict__ (the baseline, like
+CollectionPdf before it declared __slots__), as a list of CollectionPdf
+objects and in a CollectionPdfColumns, for 10^5 and 10^6 collections. The memory allocated by the container and by everything it
+references is measured with tracemalloc.
+
+Run from the root of the repository:
+    python benchmarks/bench_collection_memory.py
+"""
+
+import gc
+import tracemalloc
+
+from dacoromanica_downloader.model import CollectionPdf, CollectionPdfColumns
+
+SIZES = (10**5, 10**6)
+NUMBER_OF_AUTHORS = 5000
+
+
+class DictCollectionPdf:
+    """A collection whose attributes are kept in a __dict__."""
+
+    def __init__(
+        self, details_link: str, title: str, pdf_link: str, author: str, year: int
+    ) -> None:
+        self.details_link = details_link
+        self.title = title
+        self.author = author
+        self.year = year
+        self.pdf_link = pdf_link
+
+
+def get_synthetic_collections(size: int, factory=CollectionPdf):
+    for index in range(size):
+        # the author is built again for every collection, like the scraper does
+        author_index = index % NUMBER_OF_AUTHORS
+        yield factory(
+            details_link=(
+                "https://www.dacoromanica.ro/F/?func=full-set-set"
+                f"&set_number=000001&set_entry={index:06d}&format=999"
+            ),
+            title=f"Title of the collection number {index}",
+            pdf_link=f"https://www.dacoromanica.ro/pdf/{index:07d}.pdf",
+            author=f"Author {author_index}, First name {author_index}",
+            year=1800 + index % 200,
+        )
+
+
+def measure(build, size: int, factory=CollectionPdf) -> int:
+    gc.collect()
+    tracemalloc.start()
+    container = build(get_synthetic_collections(size, factory))
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(container) == size
+
+    return allocated
+
+
+def benchmark() -> None:
+    for size in SIZES:
+        results = {}
+        for name, build in (
+            ("list of objects with a __dict__", list),
+            ("list of CollectionPdf", list),
+            ("CollectionPdfColumns", CollectionPdfColumns),
+        ):
+            factory = DictCollectionPdf if "__dict__" in name else CollectionPdf
+            results[name] = measure(build, size, factory)
+
+        print(f"{size} collections:")
+        for name, allocated in results.items():
+            print(
+                f"  {name}: {allocated / 2**20:.1f} MiB "
+                f"({allocated / size:.0f} bytes per collection)"
+            )
+
+
+if __name__ == "__main__":
+    benchmark()
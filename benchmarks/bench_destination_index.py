@@ -0,0 +1,53 @@
+"""
+Measures the time needed to check which PDF files of a catalog are already
+downloaded.
+
+A temporary destination folder is filled with NUMBER_OF_FILES empty PDF files,
+then the presence of as many files, half of them present, is checked with a
+`Path.exists()` call per file and with a DestinationIndex (one `os.scandir`
+listing of the folder, then a lookup per file). The difference grows with the
+latency of the file system: on network storage every `exists()` call is a
+round trip to the server.
+
+Run from the root of the repository:
+    python benchmarks/bench_destination_index.py
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from dacoromanica_downloader.destination_index import DestinationIndex
+
+NUMBER_OF_FILES = 20000
+
+
+def benchmark() -> None:
+    with tempfile.TemporaryDirectory() as folder:
+        destination_folder = Path(folder)
+        for index in range(0, 2 * NUMBER_OF_FILES, 2):
+            (destination_folder / f"Author_Title {index}_1900.pdf").touch()
+        filenames = [
+            destination_folder / f"Author_Title {index}_1900.pdf"
+            for index in range(NUMBER_OF_FILES)
+        ]
+
+        start = time.perf_counter()
+        present_with_exists = sum(filename.exists() for filename in filenames)
+        exists_duration = time.perf_counter() - start
+
+        start = time.perf_counter()
+        destination_index = DestinationIndex(destination_folder)
+        present_with_index = sum(
+            destination_index.contains(filename) for filename in filenames
+        )
+        index_duration = time.perf_counter() - start
+
+    assert present_with_exists == present_with_index == NUMBER_OF_FILES // 2
+    print(f"{NUMBER_OF_FILES} presence checks in a folder of {NUMBER_OF_FILES} files:")
+    print(f"  Path.exists() per file: {exists_duration * 1000:.0f} ms")
+    print(f"  DestinationIndex, scan included: {index_duration * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
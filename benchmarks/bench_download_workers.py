@@ -0,0 +1,72 @@
+"""
+Measures how the PDF download stage scales with the number of workers.
+
+A local HTTP server stands in for Dacoromanica: it answers every request for a
+PDF file after a fixed latency, with a body of a fixed size. The same list of
+collections is then downloaded with 1 and with 8 workers.
+
+Run from the root of the repository:
+    python benchmarks/bench_download_workers.py
+"""
+
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from dacoromanica_downloader import main
+from dacoromanica_downloader.model import CollectionPdf
+
+NUMBER_OF_FILES = 32
+FILE_SIZE = 512 * 1024
+LATENCY = 0.2
+
+
+class PdfHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        time.sleep(LATENCY)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(FILE_SIZE))
+        self.end_headers()
+        self.wfile.write(b"\x00" * FILE_SIZE)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def run(workers: int, base_url: str) -> float:
+    collections = [
+        CollectionPdf(
+            details_link=f"{base_url}/details/{i}",
+            title=f"title {i}",
+            pdf_link=f"{base_url}/{i}.pdf",
+        )
+        for i in range(NUMBER_OF_FILES)
+    ]
+    with tempfile.TemporaryDirectory() as destination:
+        main.destination_folder = Path(destination)
+        start = time.perf_counter()
+        main.download_collections(collections=collections, workers=workers)
+        return time.perf_counter() - start
+
+
+def benchmark() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PdfHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    results = {workers: run(workers, base_url) for workers in (1, 8)}
+    server.shutdown()
+
+    for workers, duration in results.items():
+        print(
+            f"{workers} worker(s): {NUMBER_OF_FILES} files in {duration:.2f} s"
+            f" ({NUMBER_OF_FILES / duration:.1f} files/s)"
+        )
+    print(f"speedup: {results[1] / results[8]:.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
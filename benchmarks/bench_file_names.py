@@ -0,0 +1,79 @@
+"""
+Measures the time needed to get the file names of a whole catalog.
+
+The name of a collection is read several times during a run: when the
+download queue is sorted, when the presence of the file is checked and when
+the download is logged. For a synthetic catalog of 10^5 collections with
+forbidden characters in their titles, the names are read READS times each
+with the previous implementation (a character by character sanitization,
+computed on every read) and with the current one (a translation table, the
+name being kept until the year changes).
+
+Run from the root of the repository:
+    python benchmarks/bench_file_names.py
+"""
+
+import time
+
+from bench_collection_memory import get_synthetic_collections
+
+from dacoromanica_downloader.model import CollectionPdf
+
+NUMBER_OF_COLLECTIONS = 10**5
+READS = 3
+
+
+def remove_forbidden_characters_per_character(name: str) -> str:
+    res = ""
+    for character in name:
+        if ord(character) not in (60, 62, 58, 39, 34, 47, 92, 124, 63, 42):
+            res += character
+
+    return res
+
+
+def get_file_name_per_character(collection: CollectionPdf) -> str:
+    title = remove_forbidden_characters_per_character(collection.title)
+    author = remove_forbidden_characters_per_character(collection.author)
+
+    if collection.year and author:
+        return f"{author}_{title}_{collection.year}.pdf"
+    elif collection.year:
+        return f"{title}_{collection.year}.pdf"
+    elif author:
+        return f"{author}_{title}.pdf"
+    else:
+        return f"{title}.pdf"
+
+
+def get_file_name(collection: CollectionPdf) -> str:
+    return collection.downloaded_file_name
+
+
+def benchmark() -> None:
+    collections = list(get_synthetic_collections(NUMBER_OF_COLLECTIONS))
+    for collection in collections:
+        collection.title = f'{collection.title}: "a study" <vol. 1/2>?'
+
+    results = {}
+    for name, get_name in (
+        ("per character, every read", get_file_name_per_character),
+        ("translation table, memoized", get_file_name),
+    ):
+        start = time.perf_counter()
+        for _ in range(READS):
+            names = [get_name(collection) for collection in collections]
+        results[name] = time.perf_counter() - start
+        assert '"' not in names[0]
+
+    print(f"{NUMBER_OF_COLLECTIONS} collections, {READS} reads of every name:")
+    for name, duration in results.items():
+        print(f"  {name}: {duration * 1000:.0f} ms")
+    print(
+        "  speedup: "
+        f"{results['per character, every read'] / results['translation table, memoized']:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,83 @@
+"""
+Measures the time needed to extract the collections and the next page URL of
+a collections page.
+
+A synthetic collections page of 1,000 rows is parsed once, then the data is
+extracted with the separate extractors (`get_collection_info` and
+`get_next_page_url`, each scanning all the links of the page) and with the
+single-pass `get_listing_page`.
+
+Run from the root of the repository:
+    python benchmarks/bench_listing_page.py
+"""
+
+import time
+
+from bench_parsers import get_response, get_synthetic_page
+
+from dacoromanica_downloader.scrape import (
+    get_collection_info,
+    get_listing_page,
+    get_next_page_url,
+    get_soup,
+)
+
+NUMBER_OF_ROWS = 1000
+REPETITIONS = 20
+COLLECTIONS_BASE_LINK_IDENTIFIER = "base=GEN01"
+NEXT_PAGE_LINK_IDENTIFIER = "func=results-next-page&result_format=001"
+
+
+def extract_separately(soup) -> tuple:
+    collections = list(
+        get_collection_info(
+            soup, collections_base_link_identifier=COLLECTIONS_BASE_LINK_IDENTIFIER
+        )
+    )
+    next_page_url = get_next_page_url(
+        soup, next_page_link_identifier=NEXT_PAGE_LINK_IDENTIFIER
+    )
+
+    return collections, next_page_url
+
+
+def extract_in_single_pass(soup) -> tuple:
+    return tuple(
+        get_listing_page(
+            soup,
+            collections_base_link_identifier=COLLECTIONS_BASE_LINK_IDENTIFIER,
+            next_page_link_identifier=NEXT_PAGE_LINK_IDENTIFIER,
+        )
+    )
+
+
+def benchmark() -> None:
+    # the next page link is moved after the table, so the separate extractors
+    # scan every link of the page twice
+    next_page_link = b'<a href="next?func=results-next-page&result_format=001">Next</a>'
+    page = (
+        get_synthetic_page(NUMBER_OF_ROWS)
+        .replace(next_page_link, b"")
+        .replace(b"</table>", b"</table>" + next_page_link)
+    )
+    soup = get_soup(get_response(page))
+
+    results = {}
+    for name, extract in (
+        ("separate extractors", extract_separately),
+        ("single pass", extract_in_single_pass),
+    ):
+        start = time.perf_counter()
+        for _ in range(REPETITIONS):
+            data = extract(soup)
+        results[name] = (time.perf_counter() - start) / REPETITIONS
+        assert len(data[0]) == NUMBER_OF_ROWS
+
+    print(f"synthetic page of {NUMBER_OF_ROWS} rows:")
+    for name, duration in results.items():
+        print(f"  {name}: {duration * 1000:.2f} ms per page")
+    print(f"  speedup: {results['separate extractors'] / results['single pass']:.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
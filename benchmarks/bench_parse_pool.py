@@ -0,0 +1,71 @@
+"""
+Measures how parsing the collections pages scales with a pool of processes.
+
+The same synthetic collections pages are parsed by as many threads as there
+are cores, first in the threads themselves, then by a ParsePool with as many
+processes. Parsing holds the GIL, so only the processes can parse several
+pages at the same time.
+
+Run from the root of the repository:
+    python benchmarks/bench_parse_pool.py
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_parsers import get_response, get_synthetic_page
+
+from dacoromanica_downloader.parse_pool import ParsePool, extract_listing_page
+
+NUMBER_OF_PAGES = 64
+NUMBER_OF_ROWS = 100
+COLLECTIONS_BASE_LINK_IDENTIFIER = "base=GEN01"
+NEXT_PAGE_LINK_IDENTIFIER = "func=results-next-page&result_format=001"
+
+
+def run(workers: int, parse_pool: ParsePool | None) -> float:
+    responses = [
+        get_response(get_synthetic_page(NUMBER_OF_ROWS)) for _ in range(NUMBER_OF_PAGES)
+    ]
+
+    def parse(response):
+        if parse_pool:
+            return parse_pool.get_listing_page(
+                response=response,
+                collections_base_link_identifier=COLLECTIONS_BASE_LINK_IDENTIFIER,
+                next_page_link_identifier=NEXT_PAGE_LINK_IDENTIFIER,
+            )
+        return extract_listing_page(
+            content=response.content,
+            content_type=None,
+            collections_base_link_identifier=COLLECTIONS_BASE_LINK_IDENTIFIER,
+            next_page_link_identifier=NEXT_PAGE_LINK_IDENTIFIER,
+        )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for listing_page in executor.map(parse, responses):
+            assert len(listing_page.collections) == NUMBER_OF_ROWS
+
+    return time.perf_counter() - start
+
+
+def benchmark() -> None:
+    workers = os.cpu_count() or 1
+    # each way is run once before the measure; the worker processes are started
+    # and import the parsers during this first run
+    run(workers=workers, parse_pool=None)
+    in_threads = run(workers=workers, parse_pool=None)
+    with ParsePool(processes=workers) as parse_pool:
+        run(workers=workers, parse_pool=parse_pool)
+        in_processes = run(workers=workers, parse_pool=parse_pool)
+
+    print(f"{NUMBER_OF_PAGES} pages of {NUMBER_OF_ROWS} rows, {workers} workers:")
+    print(f"  parsed in threads: {in_threads:.2f} s")
+    print(f"  parsed in processes: {in_processes:.2f} s")
+    print(f"  speedup: {in_threads / in_processes:.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
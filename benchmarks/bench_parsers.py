@@ -0,0 +1,180 @@
+"""
+Measures the time needed to parse a page with each parser backend.
+
+Every HTML page of tests/test_data is parsed with lxml and with html5lib, then
+a synthetic collections page with many rows, closer to the size of a real
+Dacoromanica results page. Finally, synthetic results and details pages, with
+the text, forms and scripts surrounding the data on a real page, are parsed
+with lxml, whole and with their parse plans, and the peak memory used by each
+parse is reported. Last, the synthetic collections page is parsed from a
+decoded copy of its content, as `get_soup` used to do, and from its bytes.
+
+Run from the root of the repository:
+    python benchmarks/bench_parsers.py
+"""
+
+import time
+import tracemalloc
+from pathlib import Path
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+from dacoromanica_downloader.scrape import (
+    DETAILS_PAGE_STRAINER,
+    LISTING_PAGE_STRAINER,
+    get_soup,
+)
+
+PARSERS = ("lxml", "html5lib")
+REPETITIONS = 5
+NUMBER_OF_ROWS = 1000
+RESULTS_PAGE_ROWS = 50
+FILLER_BLOCKS = 100
+
+ROW = """
+<tr>
+    <td><a href="details.php?base=GEN01&id={i}">Details {i}</a></td>
+    <td>{i}</td>
+    <td>Title {i}</td>
+    <td>Author {i}</td>
+    <td>Other column</td>
+    <td>Other column</td>
+    <td><a href="pdfs/doc{i}.pdf">PDF {i}</a></td>
+</tr>
+"""
+
+
+def get_response(content: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+
+    return response
+
+
+# text, images, forms and scripts surrounding the data on a real page
+FILLER = (
+    "<div class='x'><p>Some <b>text</b> here <span>and</span> there</p>"
+    "<img src='image.png'><form><input name=a><select><option>1</option>"
+    "<option>2</option></select></form><script>var a=1;</script></div>"
+)
+DETAILS_ROW = "<tr><td>Field {i}</td><td>Value {i}</td></tr>"
+
+
+def get_synthetic_page(number_of_rows: int, filler_blocks: int = 0) -> bytes:
+    rows = "".join(ROW.format(i=i) for i in range(number_of_rows))
+    filler = FILLER * filler_blocks
+    page = (
+        '<html><head><meta charset="UTF-8"></head><body>'
+        f"{filler}"
+        '<a href="next?func=results-next-page&result_format=001">Next</a>'
+        f"<table>{rows}</table>{filler}</body></html>"
+    )
+
+    return page.encode("utf-8")
+
+
+def get_synthetic_details_page(filler_blocks: int) -> bytes:
+    rows = "".join(DETAILS_ROW.format(i=i) for i in range(20))
+    filler = FILLER * filler_blocks
+    page = (
+        '<html><head><meta charset="UTF-8"></head><body>'
+        f"{filler}<table>{rows}"
+        "<tr><td>Data apariţiei</td><td>1900</td></tr>"
+        f"</table>{filler}</body></html>"
+    )
+
+    return page.encode("utf-8")
+
+
+def time_parse(responses: list[requests.Response], parser: str) -> float:
+    start = time.perf_counter()
+    for _ in range(REPETITIONS):
+        for response in responses:
+            get_soup(response=response, parser=parser)
+
+    return (time.perf_counter() - start) / (REPETITIONS * len(responses))
+
+
+def measure_parse_plan(
+    name: str, response: requests.Response, parse_only: SoupStrainer
+) -> None:
+    results = {}
+    for plan, strainer in (("whole page", None), ("parse plan", parse_only)):
+        start = time.perf_counter()
+        for _ in range(REPETITIONS):
+            get_soup(response=response, parse_only=strainer)
+        duration = (time.perf_counter() - start) / REPETITIONS
+
+        tracemalloc.start()
+        soup = get_soup(response=response, parse_only=strainer)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del soup
+        results[plan] = (duration, peak)
+
+    print(f"lxml, {name}:")
+    for plan, (duration, peak) in results.items():
+        print(f"  {plan}: {duration * 1000:.2f} ms, {peak / 1024 / 1024:.2f} MiB peak")
+    print(
+        f"  speedup: {results['whole page'][0] / results['parse plan'][0]:.1f}x,"
+        f" memory: {results['whole page'][1] / results['parse plan'][1]:.1f}x less"
+    )
+
+
+def measure_decoding(response: requests.Response) -> None:
+    results = {}
+    for name, parse in (
+        ("decoded copy", lambda: BeautifulSoup(response.content.decode(), "lxml")),
+        ("bytes", lambda: get_soup(response=response)),
+    ):
+        start = time.perf_counter()
+        for _ in range(REPETITIONS):
+            parse()
+        duration = (time.perf_counter() - start) / REPETITIONS
+
+        tracemalloc.start()
+        soup = parse()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del soup
+        results[name] = (duration, peak)
+
+    print(f"lxml, synthetic page of {NUMBER_OF_ROWS} rows:")
+    for name, (duration, peak) in results.items():
+        print(f"  {name}: {duration * 1000:.2f} ms, {peak / 1024 / 1024:.2f} MiB peak")
+
+
+def benchmark() -> None:
+    test_data_responses = [
+        get_response(path.read_bytes())
+        for path in sorted(Path("tests/test_data").rglob("*.html"))
+    ]
+    synthetic_response = [get_response(get_synthetic_page(NUMBER_OF_ROWS))]
+
+    for name, responses in (
+        (f"{len(test_data_responses)} test data pages", test_data_responses),
+        (f"synthetic page of {NUMBER_OF_ROWS} rows", synthetic_response),
+    ):
+        results = {parser: time_parse(responses, parser) for parser in PARSERS}
+        print(f"{name}:")
+        for parser, duration in results.items():
+            print(f"  {parser}: {duration * 1000:.2f} ms per page")
+        print(f"  speedup: {results['html5lib'] / results['lxml']:.1f}x")
+
+    measure_parse_plan(
+        f"results page of {RESULTS_PAGE_ROWS} rows",
+        get_response(get_synthetic_page(RESULTS_PAGE_ROWS, FILLER_BLOCKS)),
+        LISTING_PAGE_STRAINER,
+    )
+    measure_parse_plan(
+        "details page",
+        get_response(get_synthetic_details_page(FILLER_BLOCKS)),
+        DETAILS_PAGE_STRAINER,
+    )
+    measure_decoding(synthetic_response[0])
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,55 @@
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+# Aleph, the software behind Dacoromanica, puts the session of the visitor in
+# the first segment of the path (e.g. /R/U97DAL...TE7-06613?func=...). Sessions
+# expire, so the same page has a different URL on every run.
+SESSION_PATTERN: re.Pattern = re.compile(r"^/([A-Z])/([A-Z0-9]+-\d+)(?=/|$)")
+
+
+def get_session(url: str) -> str | None:
+    """
+    Gets the Aleph session of a URL (e.g. "U97DAL...TE7-06613"), or None if the
+    URL holds no session.
+    """
+    match = SESSION_PATTERN.match(urlsplit(url).path)
+
+    return match.group(2) if match else None
+
+
+def remove_session(url: str) -> str:
+    """
+    Removes the Aleph session of a URL, so the URLs of the same page found in
+    different sessions are equal. A URL holding no session is returned
+    unchanged.
+    """
+    parts = urlsplit(url)
+    path, count = SESSION_PATTERN.subn(r"/\1", parts.path)
+    if not count:
+        return url
+
+    return urlunsplit(parts._replace(path=path))
+
+
+def set_session(url: str, session: str | None) -> str:
+    """
+    Moves a URL onto another Aleph session.
+
+    Args:
+        url (str): The URL to move.
+        session (str | None): The session, as returned by `get_session`.
+
+    Returns:
+        str: The URL with the session, or the URL unchanged if it holds no
+        session or if `session` is None.
+    """
+    if session is None:
+        return url
+    parts = urlsplit(url)
+    path, count = SESSION_PATTERN.subn(
+        lambda match: f"/{match.group(1)}/{session}", parts.path
+    )
+    if not count:
+        return url
+
+    return urlunsplit(parts._replace(path=path))
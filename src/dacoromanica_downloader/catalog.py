@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterator
+
+from dacoromanica_downloader.aleph import remove_session
+from dacoromanica_downloader.model import CollectionPdf
+
+# Download statuses of the collections stored in the catalog.
+PENDING: str = "pending"
+DOWNLOADED: str = "downloaded"
+FAILED: str = "failed"
+
+# Version of the catalog, stored in its user_version. Since version 1 the
+# details links are stored without their Aleph session.
+SCHEMA_VERSION: int = 1
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS collections (
+    details_link TEXT PRIMARY KEY,
+    title TEXT,
+    author TEXT NOT NULL DEFAULT '',
+    pdf_link TEXT NOT NULL,
+    year INTEGER,
+    status TEXT NOT NULL DEFAULT 'pending',
+    size INTEGER,
+    checksum TEXT
+);
+CREATE INDEX IF NOT EXISTS collections_pdf_link ON collections (pdf_link);
+CREATE INDEX IF NOT EXISTS collections_year_author ON collections (year, author);
+CREATE INDEX IF NOT EXISTS collections_author ON collections (author);
+CREATE INDEX IF NOT EXISTS collections_status ON collections (status);
+"""
+
+
+class Catalog:
+    """
+    SQLite catalog of the collections discovered on Dacoromanica.
+
+    Every collection is stored once, keyed by its details link, with its
+    publication year and its download status. The details links are stored,
+    and looked up, without their Aleph session, which changes on every run. The year is NULL until the
+    details page of the collection is fetched (0 if it holds no year). Once the
+    PDF file is downloaded, its size in bytes and its SHA-256 checksum are
+    stored too.
+
+    A Catalog is meant to be shared by the crawler and all the workers: the
+    single connection is used under a lock.
+
+    Attributes:
+        path (Path): The path of the SQLite database file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+            (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+            if version < SCHEMA_VERSION:
+                self._remove_sessions()
+                self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def __enter__(self) -> Catalog:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _remove_sessions(self) -> None:
+        # a collection found in several sessions keeps the row of the first one
+        self._connection.create_function(
+            "remove_session", 1, remove_session, deterministic=True
+        )
+        self._connection.execute(
+            """
+            UPDATE OR IGNORE collections
+            SET details_link = remove_session(details_link)
+            WHERE details_link != remove_session(details_link)
+            """
+        )
+        self._connection.execute(
+            "DELETE FROM collections"
+            " WHERE details_link != remove_session(details_link)"
+        )
+
+    def upsert_collections(self, collections: list[CollectionPdf]) -> None:
+        """
+        Adds collections to the catalog, or updates the title, author and PDF
+        link of the collections already in it. The year and the download status
+        of a collection already in the catalog are kept.
+
+        Args:
+            collections (list[CollectionPdf]): The collections found on a page.
+
+        Returns:
+            None: This method does not return any value.
+        """
+        rows = [
+            (
+                remove_session(collection.details_link),
+                collection.title,
+                collection.author,
+                collection.pdf_link,
+            )
+            for collection in collections
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                """
+                INSERT INTO collections (details_link, title, author, pdf_link)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (details_link) DO UPDATE SET
+                    title = excluded.title,
+                    author = excluded.author,
+                    pdf_link = excluded.pdf_link
+                """,
+                rows,
+            )
+
+    def are_known(self, details_links: list[str]) -> bool:
+        """
+        Checks if all the details links are already in the catalog.
+
+        Args:
+            details_links (list[str]): The details links of the collections of a
+            page, in any Aleph session; their number is bounded by the size of a
+            page.
+
+        Returns:
+            bool: True if every collection is in the catalog, otherwise False.
+        """
+        unique_links = list({remove_session(link) for link in details_links})
+        placeholders = ", ".join("?" * len(unique_links))
+        with self._lock:
+            (number_of_known,) = self._connection.execute(
+                "SELECT COUNT(*) FROM collections"
+                f" WHERE details_link IN ({placeholders})",
+                unique_links,
+            ).fetchone()
+
+        return number_of_known == len(unique_links)
+
+    def get_year(self, details_link: str) -> int | None:
+        """
+        Gets the year of a collection, or None if its details page was not
+        fetched yet.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT year FROM collections WHERE details_link = ?",
+                (remove_session(details_link),),
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def update_year(self, details_link: str, year: int) -> None:
+        """
+        Records the year found on the details page of a collection.
+
+        Args:
+            details_link (str): The details link of the collection.
+            year (int): The year of the collection, 0 if no year was found.
+
+        Returns:
+            None: This method does not return any value.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE collections SET year = ? WHERE details_link = ?",
+                (year, remove_session(details_link)),
+            )
+
+    def update_status(
+        self,
+        details_link: str,
+        status: str,
+        size: int | None = None,
+        checksum: str | None = None,
+    ) -> None:
+        """
+        Records the download status of a collection.
+
+        Args:
+            details_link (str): The details link of the collection.
+            status (str): PENDING, DOWNLOADED or FAILED.
+            size (int | None): The size in bytes of the PDF file. Defaults to
+            None, meaning the size already stored is kept.
+            checksum (str | None): The SHA-256 checksum of the PDF file.
+            Defaults to None, meaning the checksum already stored is kept.
+
+        Returns:
+            None: This method does not return any value.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                UPDATE collections
+                SET status = ?,
+                    size = COALESCE(?, size),
+                    checksum = COALESCE(?, checksum)
+                WHERE details_link = ?
+                """,
+                (status, size, checksum, remove_session(details_link)),
+            )
+
+    def get_not_downloaded(self) -> list[CollectionPdf]:
+        """
+        Gets the collections whose PDF file is not downloaded yet, in the order
+        in which they were discovered.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT details_link, title, pdf_link, author, year
+                FROM collections
+                WHERE status != ?
+                ORDER BY rowid
+                """,
+                (DOWNLOADED,),
+            ).fetchall()
+
+        return [
+            CollectionPdf(
+                details_link=details_link,
+                title=title,
+                pdf_link=pdf_link,
+                author=author,
+                year=year or 0,
+            )
+            for details_link, title, pdf_link, author, year in rows
+        ]
+
+    def iter_collections(self, batch_size: int = 1000) -> Iterator[CollectionPdf]:
+        """
+        Gets all the collections, in the order in which they were discovered.
+
+        The collections are read from the database `batch_size` at a time, so
+        the whole catalog is never held in memory.
+        """
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    """
+                    SELECT rowid, details_link, title, pdf_link, author, year
+                    FROM collections
+                    WHERE rowid > ?
+                    ORDER BY rowid
+                    LIMIT ?
+                    """,
+                    (last_rowid, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for _, details_link, title, pdf_link, author, year in rows:
+                yield CollectionPdf(
+                    details_link=details_link,
+                    title=title,
+                    pdf_link=pdf_link,
+                    author=author,
+                    year=year or 0,
+                )
+            last_rowid = rows[-1][0]
+
+    def close(self) -> None:
+        """Closes the connection to the database."""
+        self._connection.close()
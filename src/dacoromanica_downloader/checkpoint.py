@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+
+from dacoromanica_downloader.aleph import remove_session
+from dacoromanica_downloader.model import CollectionPdf
+
+
+class CrawlCheckpoint:
+    """
+    Persists the state of a crawl so that an interrupted run can be resumed.
+
+    The checkpoint is a JSON Lines file to which an entry is appended, and
+    flushed, every time a collections page is crawled or the year of a
+    collection is found. A page entry holds the starting url the page belongs
+    to, the collections found on the page and the url of the next page (null
+    once the last page is crawled). A year entry holds the details link and the
+    year of a collection. The whole file is read back when the checkpoint is
+    opened; an incomplete last line, left by a process that was killed while
+    writing it, is ignored.
+
+    The years are looked up by the details links without their Aleph session,
+    so they are found again after the links are moved onto a new session.
+
+    A CrawlCheckpoint is meant to be shared by the crawler and all the details
+    page workers.
+
+    Attributes:
+        path (Path): The path of the checkpoint file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._next_page_urls: dict[str, str | None] = {}
+        self._collections: dict[str, list[dict]] = {}
+        self._years: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(self.path, "a", encoding="utf_8")
+
+    def __enter__(self) -> CrawlCheckpoint:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _load(self) -> None:
+        if not self.path.is_file():
+            return
+
+        with open(self.path, "rb+") as f:
+            content = f.read()
+            complete_length = content.rfind(b"\n") + 1
+            if complete_length < len(content):
+                # drop the incomplete last line so the next entry is not
+                # appended to it
+                f.truncate(complete_length)
+
+        for line in content[:complete_length].decode("utf_8").splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "year" in entry:
+                self._years[remove_session(entry["details_link"])] = entry["year"]
+            else:
+                starting_url = entry["starting_url"]
+                self._collections.setdefault(starting_url, []).extend(
+                    entry["collections"]
+                )
+                self._next_page_urls[starting_url] = entry["next_page_url"]
+
+    def _append(self, entry: dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            self._file.write(f"{line}\n")
+            self._file.flush()
+
+    def has_starting_url(self, starting_url: str) -> bool:
+        """
+        Checks if at least one collections page of the starting url was crawled.
+        """
+        return starting_url in self._next_page_urls
+
+    def get_next_page_url(self, starting_url: str) -> str | None:
+        """
+        Gets the url of the next collections page to crawl for the starting url,
+        or None if all its pages were crawled.
+        """
+        return self._next_page_urls.get(starting_url)
+
+    def is_complete(self, starting_urls: list[str]) -> bool:
+        """
+        Checks if all the collections pages of every starting url were crawled,
+        so the checkpoint is no longer needed.
+        """
+        return all(
+            starting_url in self._next_page_urls
+            and self._next_page_urls[starting_url] is None
+            for starting_url in starting_urls
+        )
+
+    def get_collections(self, starting_url: str) -> list[CollectionPdf]:
+        """
+        Gets the collections found on the crawled pages of the starting url,
+        with the years already found.
+
+        Only the pages read from the file when the checkpoint was opened are
+        included: the collections of the pages added since are not kept in
+        memory, as they are yielded by the crawl that adds them.
+        """
+        collections = []
+        for record in self._collections.get(starting_url, []):
+            collection = CollectionPdf(**record)
+            collection.year = self._years.get(
+                remove_session(collection.details_link), 0
+            )
+            collections.append(collection)
+
+        return collections
+
+    def add_page(
+        self,
+        starting_url: str,
+        collections: list[CollectionPdf],
+        next_page_url: str | None,
+    ) -> None:
+        """
+        Records a crawled collections page.
+
+        Args:
+            starting_url (str): The starting url the page was crawled from.
+            collections (list[CollectionPdf]): The collections found on the page.
+            next_page_url (str | None): The url of the next page, or None if the
+            page is the last one.
+
+        Returns:
+            None: This method does not return any value.
+        """
+        records = [
+            {
+                "details_link": collection.details_link,
+                "title": collection.title,
+                "pdf_link": collection.pdf_link,
+                "author": collection.author,
+            }
+            for collection in collections
+        ]
+        self._append(
+            {
+                "starting_url": starting_url,
+                "collections": records,
+                "next_page_url": next_page_url,
+            }
+        )
+        with self._lock:
+            self._next_page_urls[starting_url] = next_page_url
+
+    def has_year(self, details_link: str) -> bool:
+        """Checks if the details page of a collection was already fetched."""
+        return remove_session(details_link) in self._years
+
+    def get_year(self, details_link: str) -> int | None:
+        """
+        Gets the year of a collection, or None if its details page was not
+        fetched yet.
+        """
+        return self._years.get(remove_session(details_link))
+
+    def add_year(self, details_link: str, year: int) -> None:
+        """
+        Records the year found on the details page of a collection.
+
+        Args:
+            details_link (str): The details link of the collection.
+            year (int): The year of the collection, 0 if no year was found.
+
+        Returns:
+            None: This method does not return any value.
+        """
+        self._append({"details_link": details_link, "year": year})
+        with self._lock:
+            self._years[remove_session(details_link)] = year
+
+    def close(self) -> None:
+        """Closes the checkpoint file."""
+        self._file.close()
+
+    def remove(self) -> None:
+        """Closes and deletes the checkpoint file, once the crawl is complete."""
+        self.close()
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,188 @@
+import threading
+import time
+from typing import Callable
+from urllib.parse import urlsplit
+
+import requests
+
+from dacoromanica_downloader.retry import get_failure_class
+
+# States of the circuit of a host.
+CLOSED: str = "closed"
+OPEN: str = "open"
+HALF_OPEN: str = "half_open"
+
+# Number of consecutive failed requests to a host that open its circuit.
+DEFAULT_FAILURE_THRESHOLD: int = 5
+# Number of seconds the requests to a host are paused once its circuit opens.
+# The pause doubles every time the probe request fails, up to the maximum.
+DEFAULT_RESET_TIMEOUT: float = 10
+DEFAULT_MAX_RESET_TIMEOUT: float = 120
+# Number of seconds after which the requests to a host whose circuit is still
+# open fail immediately instead of waiting, so a long outage does not stall
+# the whole run.
+DEFAULT_MAX_OUTAGE: float = 15 * 60
+# Number of seconds after which a probe request without outcome is considered
+# failed. It is longer than the timeout of a request.
+DEFAULT_PROBE_TIMEOUT: float = 60
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised when a request is not sent because its host has been failing for
+    too long.
+    """
+
+
+class HostCircuit:
+    """State of the circuit of one host."""
+
+    def __init__(self, reset_timeout: float) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self.reset_timeout = reset_timeout
+        self.opened_at = 0.0
+        self.outage_started_at = 0.0
+        self.probe_started_at = 0.0
+
+
+class CircuitBreaker:
+    """
+    Pauses the requests to a host that keeps failing.
+
+    The circuit of a host opens after `failure_threshold` consecutive failed
+    requests (timeouts, connection errors, 429 and 5xx responses). While it is
+    open, the callers of `before_request` for that host wait, which pauses the
+    workers instead of letting each of them wait for its own timeout. Once
+    `reset_timeout` seconds have passed, one caller is let through as a probe
+    (the circuit is half-open): if it succeeds the circuit closes and every
+    waiting caller resumes, otherwise the circuit opens again for twice as
+    long, up to `max_reset_timeout` seconds.
+
+    When a circuit has been open for more than `max_outage` seconds, the
+    requests to its host fail immediately with CircuitOpenError, except the
+    probes, until the host answers again.
+
+    A CircuitBreaker is meant to be shared by every caller of
+    `get_link_response`.
+
+    Attributes:
+        failure_threshold (int): The number of consecutive failures opening the
+        circuit of a host.
+        reset_timeout (float): The number of seconds before the first probe.
+        max_reset_timeout (float): The maximum number of seconds between two
+        probes.
+        max_outage (float): The number of seconds after which the requests to a
+        host whose circuit is open fail immediately.
+        probe_timeout (float): The number of seconds after which a probe
+        without outcome is considered failed.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        max_reset_timeout: float = DEFAULT_MAX_RESET_TIMEOUT,
+        max_outage: float = DEFAULT_MAX_OUTAGE,
+        probe_timeout: float = DEFAULT_PROBE_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.max_outage = max_outage
+        self.probe_timeout = probe_timeout
+        self._clock = clock
+        self._circuits: dict[str, HostCircuit] = {}
+        self._condition = threading.Condition()
+
+    def before_request(self, link: str) -> None:
+        """
+        Waits until a request can be sent to the host of the link.
+
+        Args:
+            link (str): The URL about to be requested.
+
+        Returns:
+            None: This method does not return any value.
+
+        Raises:
+            CircuitOpenError: If the circuit of the host has been open for more
+            than `max_outage` seconds.
+        """
+        host = urlsplit(link).netloc
+        with self._condition:
+            circuit = self._get_circuit(host)
+            while circuit.state != CLOSED:
+                now = self._clock()
+                if circuit.state == OPEN:
+                    wait_time = circuit.opened_at + circuit.reset_timeout - now
+                    if wait_time <= 0:
+                        circuit.state = HALF_OPEN
+                        circuit.probe_started_at = now
+                        return
+                else:
+                    wait_time = circuit.probe_started_at + self.probe_timeout - now
+                    if wait_time <= 0:
+                        self._open(host, circuit, now)
+                        continue
+                if now - circuit.outage_started_at >= self.max_outage:
+                    raise CircuitOpenError(
+                        f"'{host}' has not been answering for "
+                        f"{now - circuit.outage_started_at:.0f} s."
+                    )
+                self._condition.wait(wait_time)
+
+    def record(
+        self,
+        link: str,
+        outcome: requests.Response | requests.exceptions.RequestException,
+    ) -> None:
+        """
+        Records the outcome of a request sent to the host of the link.
+
+        Args:
+            link (str): The URL requested.
+            outcome (requests.Response | requests.exceptions.RequestException):
+            The response received, or the exception raised by the request.
+
+        Returns:
+            None: This method does not return any value.
+        """
+        host = urlsplit(link).netloc
+        failed = get_failure_class(outcome) is not None
+        with self._condition:
+            circuit = self._get_circuit(host)
+            if not failed:
+                if circuit.state != CLOSED:
+                    print(f"'{host}' is answering again. Resuming the requests.")
+                circuit.state = CLOSED
+                circuit.failures = 0
+                circuit.reset_timeout = self.reset_timeout
+                self._condition.notify_all()
+                return
+            circuit.failures += 1
+            if circuit.state == HALF_OPEN or (
+                circuit.state == CLOSED and circuit.failures >= self.failure_threshold
+            ):
+                self._open(host, circuit, self._clock())
+
+    def _open(self, host: str, circuit: HostCircuit, now: float) -> None:
+        if circuit.state == CLOSED:
+            circuit.outage_started_at = now
+        else:
+            circuit.reset_timeout = min(
+                self.max_reset_timeout, circuit.reset_timeout * 2
+            )
+        circuit.state = OPEN
+        circuit.opened_at = now
+        print(
+            f"Too many failed requests to '{host}'. Pausing the requests for "
+            f"{circuit.reset_timeout:.0f} s."
+        )
+        self._condition.notify_all()
+
+    def _get_circuit(self, host: str) -> HostCircuit:
+        if host not in self._circuits:
+            self._circuits[host] = HostCircuit(reset_timeout=self.reset_timeout)
+
+        return self._circuits[host]
@@ -0,0 +1,104 @@
+import os
+import threading
+from pathlib import Path
+
+
+class DestinationIndex:
+    """
+    Index of the files present in the destination folder, with their sizes.
+
+    The folder and its subfolders are listed once, with `os.scandir`, when the
+    index is created.
+    Checking whether a file is present is then a dictionary lookup instead of a
+    `stat` system call per file, which is slow on a folder holding tens of
+    thousands of files, especially on network storage. The files saved during
+    the run are added to the index as they are saved.
+
+    Listing a folder gives the names and the types of its files but not their
+    sizes, which need a `stat` call per file on POSIX. The size of a listed
+    file is therefore only read when it is first asked for.
+
+    An index is meant to be shared by all the download workers.
+
+    Attributes:
+        folder (Path): The absolute path of the indexed folder.
+    """
+
+    def __init__(self, folder: Path) -> None:
+        self.folder = Path(os.path.abspath(folder))
+        self._prefix = os.path.join(self.folder, "")
+        # None until the size of a listed file is read
+        self._sizes: dict[str, int | None] = {}
+        self._lock = threading.Lock()
+        self._scan()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sizes)
+
+    def _scan(self, folder: Path | None = None, prefix: str = "") -> None:
+        # the subfolders are listed too, for the sharded layouts
+        try:
+            with os.scandir(folder or self.folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        self._scan(Path(entry.path), f"{prefix}{entry.name}/")
+                    elif entry.is_file():
+                        self._sizes[f"{prefix}{entry.name}"] = None
+        except FileNotFoundError:
+            pass
+
+    def _get_key(self, filename: Path) -> str:
+        # string operations are much faster than Path.relative_to()
+        path = str(filename)
+        if not path.startswith(self._prefix):
+            raise ValueError(f"'{filename}' is not in '{self.folder}'")
+
+        return path[len(self._prefix) :].replace(os.sep, "/")
+
+    def get_names(self) -> list[str]:
+        """
+        Gets the paths of the indexed files, relative to the destination folder
+        and with "/" separators.
+        """
+        with self._lock:
+            return list(self._sizes)
+
+    def contains(self, filename: Path) -> bool:
+        """Checks if a file of the destination folder is present."""
+        key = self._get_key(filename)
+        with self._lock:
+            return key in self._sizes
+
+    def get_size(self, filename: Path) -> int | None:
+        """
+        Gets the size of a file of the destination folder, or None if it is not
+        present.
+        """
+        key = self._get_key(filename)
+        with self._lock:
+            if key not in self._sizes:
+                return None
+            size = self._sizes[key]
+        if size is None:
+            try:
+                size = filename.stat().st_size
+            except FileNotFoundError:
+                return None
+            with self._lock:
+                if key in self._sizes:
+                    self._sizes[key] = size
+
+        return size
+
+    def add(self, filename: Path, size: int) -> None:
+        """Records a file saved in the destination folder."""
+        key = self._get_key(filename)
+        with self._lock:
+            self._sizes[key] = size
+
+    def remove(self, filename: Path) -> None:
+        """Records a file removed from the destination folder."""
+        key = self._get_key(filename)
+        with self._lock:
+            self._sizes.pop(key, None)
@@ -1,8 +1,61 @@
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
 from pathlib import Path
 from typing import Callable
 
 import requests
 
+from dacoromanica_downloader.circuit_breaker import CircuitBreaker, CircuitOpenError
+from dacoromanica_downloader.destination_index import DestinationIndex
+from dacoromanica_downloader.http_cache import (
+    HttpCache,
+    get_conditional_headers,
+    get_response,
+)
+from dacoromanica_downloader.rate_limiter import RateLimiter
+from dacoromanica_downloader.retry import RetryPolicy
+
+# Maximum length of the path of a PDF file. The maximum path length on Windows
+# is 256 characters; longer file names are shortened.
+PATH_LENGTH_LIMIT: int = 250
+
+# Size of the chunks in which a streamed PDF body is read and written to disk.
+# It also bounds the write buffer of the destination file, so the memory used
+# by one download does not depend on the size of the downloaded file.
+DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+
+# A PDF file is downloaded to "<name>.part" and renamed once complete. The
+# validator (strong ETag or Last-Modified) and the length of the file are
+# kept in "<name>.resume", so an interrupted download can be resumed with a
+# Range request only if the file did not change on the server.
+PARTIAL_FILE_SUFFIX: str = ".part"
+RESUME_FILE_SUFFIX: str = ".resume"
+
+# Headers sent with every request of a PDF file. The session accepts gzip and
+# deflate, but `iter_content` decodes the body: the bytes written to the
+# partial file would then not be the bytes counted by the Range header of a
+# resumed download.
+PDF_REQUEST_HEADERS: dict[str, str] = {"Accept-Encoding": "identity"}
+
+# When a downloaded PDF file is flushed to the disk before it is renamed into
+# place. The rename is atomic whatever the policy, so an interrupted process
+# never leaves a truncated PDF file; the policy decides what survives a power
+# loss or an OS crash:
+# - "none": nothing is flushed; the renamed file may be empty or truncated.
+# - "file": the file is flushed before the rename, so the renamed file is
+#   complete; the rename itself may be lost.
+# - "all": the destination folder is also flushed after the rename, so the
+#   rename is durable too (not supported on Windows, where it is skipped).
+FSYNC_NONE: str = "none"
+FSYNC_FILE: str = "file"
+FSYNC_ALL: str = "all"
+FSYNC_POLICIES: tuple[str, ...] = (FSYNC_NONE, FSYNC_FILE, FSYNC_ALL)
+
+SavedFile = namedtuple("SavedFile", ["size", "checksum"])
+
 
 class PathTooLongError(Exception):
     """Raised when a path is longer than 250 characters and cannot be
@@ -18,7 +71,14 @@ class PathTooLongError(Exception):
 
 
 def get_link_response(
-    link: str, get_request: Callable = requests.get
+    link: str,
+    get_request: Callable = requests.get,
+    stream: bool = False,
+    rate_limiter: RateLimiter | None = None,
+    cache: HttpCache | None = None,
+    headers: dict[str, str] | None = None,
+    retry_policy: RetryPolicy | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
 ) -> requests.Response | str:
     """
     Retrieves the HTTP response from the provided URL or returns a string
@@ -29,30 +89,121 @@ def get_link_response(
     request fails due to an exception (e.g., connection errors, timeouts), the
     function returns the exception message.
 
+    When `stream` is True the response body is not read when the response is
+    returned; it has to be consumed (e.g. with `response.iter_content()`) and
+    the response closed by the caller.
+
+    If a rate limiter is given, the request waits for the host's requests
+    budget. The body of a response that is not streamed is also accounted for
+    in the host's bytes budget; a streamed body is accounted for as it is read
+    (see `save_response_content`).
+
+    If a cache is given, a response that is not streamed is looked up in it. A
+    fresh cached response is returned without any request; a stale one is
+    revalidated with a conditional request and returned if the server answers
+    304 (Not Modified). Every other successful response is stored in the cache.
+
+    If a retry policy is given, a request that times out, fails to connect or
+    gets a 429 or 5xx response is sent again, after the delay set by the
+    policy, until it succeeds or the policy gives up. The last response or
+    exception is then handled as if there were no retry.
+
+    If a circuit breaker is given, every attempt waits while the circuit of the
+    host is open, and its outcome is recorded, so the requests to a host that
+    keeps failing are paused instead of each of them timing out.
+
     Args:
         link (str): The URL of the file to retrieve.
         get_request (callable, optional): The function to use for making the GET
         request, defaulting to `requests.get`. The function should accept a URL
         as a parameter and return a response object.
+        stream (bool, optional): Whether the response body should be streamed
+        instead of being downloaded immediately. Defaults to False.
+        rate_limiter (RateLimiter | None, optional): The rate limiter shared by
+        all requests. Defaults to None, meaning no limit.
+        cache (HttpCache | None, optional): The cache of the responses that are
+        not streamed. Defaults to None, meaning every response is requested.
+        headers (dict[str, str] | None, optional): Additional headers sent with
+        the request (e.g. the headers returned by `get_resume_headers`).
+        Defaults to None.
+        retry_policy (RetryPolicy | None, optional): The retry policy shared
+        by all requests. Defaults to None, meaning no request is retried.
+        circuit_breaker (CircuitBreaker | None, optional): The circuit breaker
+        shared by all requests. Defaults to None, meaning no request is paused.
 
     Returns:
         requests.Response | str: The HTTP response object if the request is
         successful, otherwise a string with exception message.
     """
+    cached_response = cache.get(link) if cache and not stream else None
+    if cache and cached_response and cache.is_fresh(cached_response):
+        return get_response(cached_response)
+
+    request_kwargs: dict = {"timeout": 20}
+    if stream:
+        request_kwargs["stream"] = True
+    request_headers = dict(headers or {})
+    if cached_response:
+        request_headers.update(get_conditional_headers(cached_response))
+    if request_headers:
+        request_kwargs["headers"] = request_headers
+
+    attempt = 0
+    while True:
+        try:
+            if circuit_breaker:
+                circuit_breaker.before_request(link)
+            if rate_limiter:
+                rate_limiter.wait_for_request(link)
+            response = get_request(link, **request_kwargs)
+        except requests.exceptions.RequestException as e:
+            if circuit_breaker and not isinstance(e, CircuitOpenError):
+                circuit_breaker.record(link, e)
+            delay = retry_policy.get_delay(e, attempt) if retry_policy else None
+            if retry_policy is None or delay is None:
+                return get_error_message(e)
+        else:
+            if circuit_breaker:
+                circuit_breaker.record(link, response)
+            delay = retry_policy.get_delay(response, attempt) if retry_policy else None
+            if retry_policy is None or delay is None:
+                break
+            response.close()
+        retry_policy.wait(delay)
+        attempt += 1
+
     try:
-        response = get_request(link, timeout=20)
+        if not stream and rate_limiter:
+            rate_limiter.wait_for_bytes(link, len(response.content))
+        if cache and not stream:
+            if cached_response and response.status_code == 304:
+                cache.refresh(cached_response)
+                return get_response(cached_response)
+            if response.status_code == 200:
+                cache.store(link, response)
         return response
-    except requests.exceptions.HTTPError as e:
-        return f"HTTPError : {e}"
-    except requests.exceptions.ConnectionError as e:
-        return f"ConnectionError : {e}"
-    except requests.exceptions.Timeout as e:
-        return f"Timeout exception : {e}"
     except requests.exceptions.RequestException as e:
-        return f"RequestException : {e}"
+        return get_error_message(e)
 
 
-def shorten_filename(filename: Path, path_length_limit: int = 250) -> Path:
+def get_error_message(error: requests.exceptions.RequestException) -> str:
+    """
+    Gets the message returned by `get_link_response` for a request that raised
+    an exception.
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        return f"HTTPError : {error}"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return f"ConnectionError : {error}"
+    if isinstance(error, requests.exceptions.Timeout):
+        return f"Timeout exception : {error}"
+
+    return f"RequestException : {error}"
+
+
+def shorten_filename(
+    filename: Path, path_length_limit: int = PATH_LENGTH_LIMIT
+) -> Path:
     """
     Shortens the given file path to comply with Windows path length limitations.
 
@@ -103,7 +254,11 @@ def download_collection_pdf(
     response: requests.Response,
     pdf_name: str,
     destination_folder: Path,
-    path_length_limit: int = 250,
+    path_length_limit: int = PATH_LENGTH_LIMIT,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    rate_limiter: RateLimiter | None = None,
+    fsync: str = FSYNC_FILE,
+    destination_index: DestinationIndex | None = None,
 ) -> None:
     """
     Downloads a PDF from an HTTP response, applies optional filename shortening,
@@ -114,6 +269,10 @@ def download_collection_pdf(
     does not exceed a specified length limit. If the file path length exceeds
     the limit, the filename is shortened.
 
+    The response body is written to disk in chunks of `chunk_size` bytes, so a
+    streamed response (see `get_link_response`) is never held in memory in
+    full.
+
     Args:
         response (requests.Response): The http reponse object containing the PDF
         file.
@@ -122,6 +281,15 @@ def download_collection_pdf(
         destination_folder (Path): The path to the folder where the PDF file will
         be saved.
         path_length_limit (int): The accepted file path limit. Defaults to 250.
+        chunk_size (int): The size in bytes of the chunks written to disk.
+        Defaults to DOWNLOAD_CHUNK_SIZE.
+        rate_limiter (RateLimiter | None): The rate limiter accounting for the
+        downloaded bytes. Defaults to None, meaning no limit.
+        fsync (str): The policy flushing the file to the disk, one of
+        FSYNC_POLICIES. Defaults to FSYNC_FILE.
+        destination_index (DestinationIndex | None): The index of the
+        destination folder, updated once the file is saved. Defaults to None,
+        meaning the presence of the file is checked on the file system.
 
     Returns:
         None: This function does not return any value.
@@ -131,29 +299,346 @@ def download_collection_pdf(
         path length limitations.
     """
 
-    filename = (destination_folder / pdf_name).resolve()
+    filename = get_pdf_file_path(
+        pdf_name=pdf_name,
+        destination_folder=destination_folder,
+        path_length_limit=path_length_limit,
+    )
+    if filename is None or is_pdf_already_downloaded(
+        filename=filename,
+        destination_folder=destination_folder,
+        destination_index=destination_index,
+    ):
+        return
+
+    saved_file = save_pdf(
+        response=response,
+        filename=filename,
+        destination_folder=destination_folder,
+        chunk_size=chunk_size,
+        rate_limiter=rate_limiter,
+        fsync=fsync,
+    )
+    if destination_index is not None:
+        destination_index.add(filename, saved_file.size)
+
+
+def get_pdf_file_path(
+    pdf_name: str, destination_folder: Path, path_length_limit: int = PATH_LENGTH_LIMIT
+) -> Path | None:
+    """
+    Gets the path a PDF file will be saved at, shortening its name if needed.
+
+    The name of the file is made absolute against the destination folder. If
+    the resulting path is longer than the accepted limit, the file name is
+    shortened with `shorten_filename`. The path is computed without any network
+    request and without accessing the file system, so it can be used to decide
+    whether a PDF has to be downloaded at all.
+
+    Args:
+        pdf_name (str): The desired name for the saved PDF file, including the
+        '.pdf' extension.
+        destination_folder (Path): The path to the folder where the PDF file will
+        be saved.
+        path_length_limit (int): The accepted file path limit. Defaults to 250.
+
+    Returns:
+        Path | None: The absolute path of the PDF file, or None if the file name
+        is too long and cannot be shortened.
+    """
+
+    # unlike Path.resolve(), os.path.abspath does not stat every component of
+    # the path
+    filename = Path(os.path.abspath(destination_folder / pdf_name))
 
     # check if the length of the path is greater than 250 characters and try to
     # shorten it if it is (the maximum path length on Windows is 256 but we
     # set the limit to 250). If it cannot be shortened don't download the file.
     if len(str(filename)) > path_length_limit:
         try:
-            old_pdf_name = pdf_name
             filename = shorten_filename(
                 filename=filename, path_length_limit=path_length_limit
             )
-            pdf_name = filename.name
-            print(f"'{old_pdf_name}' file name was shortened to: '{pdf_name}'")
+            print(f"'{pdf_name}' file name was shortened to: '{filename.name}'")
         except PathTooLongError as e:
             print(e)
-            return
+            return None
+
+    return filename
+
+
+def is_pdf_already_downloaded(
+    filename: Path,
+    destination_folder: Path,
+    destination_index: DestinationIndex | None = None,
+) -> bool:
+    """
+    Checks if a PDF file is already present in the destination folder.
 
-    if filename.exists():
+    Args:
+        filename (Path): The path of the PDF file, as returned by
+        `get_pdf_file_path`.
+        destination_folder (Path): The path to the folder where the PDF file is
+        saved.
+        destination_index (DestinationIndex | None): The index of the
+        destination folder. Defaults to None, meaning the presence of the file
+        is checked on the file system.
+
+    Returns:
+        bool: True if the file already exists, otherwise False.
+    """
+    if (
+        destination_index.contains(filename)
+        if destination_index is not None
+        else filename.exists()
+    ):
         print(
-            f"'{pdf_name}' already present in '{destination_folder}' folder"
+            f"'{filename.name}' already present in '{destination_folder}' folder"
             " so it will not be downloaded."
         )
+        return True
+
+    return False
+
+
+def save_pdf(
+    response: requests.Response,
+    filename: Path,
+    destination_folder: Path,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    rate_limiter: RateLimiter | None = None,
+    fsync: str = FSYNC_FILE,
+) -> SavedFile:
+    """
+    Saves the PDF contained in an HTTP response at the given path.
+
+    Args:
+        response (requests.Response): The http reponse object containing the PDF
+        file.
+        filename (Path): The path of the PDF file, as returned by
+        `get_pdf_file_path`.
+        destination_folder (Path): The path to the folder where the PDF file is
+        saved.
+        chunk_size (int): The size in bytes of the chunks written to disk.
+        Defaults to DOWNLOAD_CHUNK_SIZE.
+        rate_limiter (RateLimiter | None): The rate limiter accounting for the
+        downloaded bytes. Defaults to None, meaning no limit.
+        fsync (str): The policy flushing the file to the disk, one of
+        FSYNC_POLICIES. Defaults to FSYNC_FILE.
+
+    Returns:
+        SavedFile: The size and the checksum of the saved file, as returned by
+        `save_response_content`.
+    """
+    saved_file = save_response_content(
+        response=response,
+        filename=filename,
+        chunk_size=chunk_size,
+        rate_limiter=rate_limiter,
+        fsync=fsync,
+    )
+    print(f"'{filename.name}' downloaded in '{destination_folder}' folder.")
+
+    return saved_file
+
+
+def save_response_content(
+    response: requests.Response,
+    filename: Path,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    rate_limiter: RateLimiter | None = None,
+    fsync: str = FSYNC_FILE,
+) -> SavedFile:
+    """
+    Writes the body of an HTTP response to a file, one chunk at a time.
+
+    The file is opened with a write buffer of `chunk_size` bytes and the body is
+    read with `response.iter_content(chunk_size)`, so at most about one chunk of
+    the body is held in memory at any time, regardless of the file size. The
+    SHA-256 checksum of the body is computed from the same chunks, without
+    reading the file again.
+
+    The body is written to the partial file of `filename`, which is flushed to
+    the disk according to the `fsync` policy and atomically renamed to
+    `filename` once the whole body is written, so `filename` only ever exists
+    complete. If the transfer is interrupted,
+    the partial file is kept with the validator of the response, so the
+    download can be resumed (see `get_resume_headers`). A 206 (Partial
+    Content) response is appended to the partial file; the checksum then
+    covers the bytes already in it too.
+
+    Args:
+        response (requests.Response): The http response whose body is saved.
+        filename (Path): The path of the file the body is written to.
+        chunk_size (int): The size in bytes of the chunks read from the response
+        and written to the file. Defaults to DOWNLOAD_CHUNK_SIZE.
+        rate_limiter (RateLimiter | None): The rate limiter accounting for the
+        bytes read from the response. Defaults to None, meaning no limit.
+        fsync (str): The policy flushing the file to the disk, one of
+        FSYNC_POLICIES. Defaults to FSYNC_FILE.
+
+    Returns:
+        SavedFile: A named tuple with the following attributes: 'size' (the
+        number of bytes of the file) and 'checksum' (the hexadecimal SHA-256
+        digest of the file).
+
+    Raises:
+        requests.exceptions.RequestException: If a 206 response does not start
+        where the partial file ends. The partial file is discarded.
+    """
+    partial_file = get_partial_file_path(filename)
+    resume_file = get_resume_file_path(filename)
+    size = 0
+    checksum = hashlib.sha256()
+    if response.status_code == 206:
+        partial_size = partial_file.stat().st_size if partial_file.exists() else 0
+        if get_content_range_start(response) != partial_size:
+            discard_partial_download(filename)
+            raise requests.exceptions.RequestException(
+                f"'{response.url}' response does not resume the partial file."
+            )
+        mode = "ab"
+        if partial_size:
+            with open(partial_file, "rb") as f:
+                while chunk := f.read(chunk_size):
+                    size += len(chunk)
+                    checksum.update(chunk)
+    else:
+        mode = "wb"
+        validator = get_validator(response)
+        if validator:
+            resume_file.write_text(
+                json.dumps(
+                    {
+                        "validator": validator,
+                        "length": response.headers.get("content-length"),
+                    }
+                ),
+                encoding="utf_8",
+            )
+        else:
+            resume_file.unlink(missing_ok=True)
+
+    with open(partial_file, mode, buffering=chunk_size) as f:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if rate_limiter:
+                rate_limiter.wait_for_bytes(response.url, len(chunk))
+            f.write(chunk)
+            size += len(chunk)
+            checksum.update(chunk)
+        if fsync != FSYNC_NONE:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(partial_file, filename)
+    if fsync == FSYNC_ALL:
+        fsync_directory(filename.parent)
+    resume_file.unlink(missing_ok=True)
+
+    return SavedFile(size=size, checksum=checksum.hexdigest())
+
+
+def fsync_directory(directory: Path) -> None:
+    """
+    Flushes the entries of a directory (e.g. a file renamed in it) to the disk.
+    Directories cannot be opened on Windows, where nothing is done.
+    """
+    if not hasattr(os, "O_DIRECTORY"):
         return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def get_partial_file_path(filename: Path) -> Path:
+    """Gets the path a PDF file is written to until it is complete."""
+    return filename.with_suffix(PARTIAL_FILE_SUFFIX)
+
+
+def get_resume_file_path(filename: Path) -> Path:
+    """Gets the path of the validator of the partial file of a PDF file."""
+    return filename.with_suffix(RESUME_FILE_SUFFIX)
+
+
+def get_validator(response: requests.Response) -> str | None:
+    """
+    Gets the validator of a response that can be sent in an If-Range header:
+    its strong ETag or, failing that, its Last-Modified date.
+
+    Args:
+        response (requests.Response): The HTTP response.
+
+    Returns:
+        str | None: The validator if found, otherwise None.
+    """
+    etag = response.headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+
+    return response.headers.get("last-modified")
+
+
+def get_content_range_start(response: requests.Response) -> int | None:
+    """
+    Gets the position of the first byte of a 206 response from its
+    Content-Range header, or None if the header is missing or malformed.
+    """
+    match = re.match(r"bytes (\d+)-", response.headers.get("content-range", ""))
+
+    return int(match.group(1)) if match else None
+
+
+def get_resume_headers(
+    filename: Path, destination_index: DestinationIndex | None = None
+) -> dict[str, str]:
+    """
+    Gets the headers resuming the interrupted download of a PDF file.
+
+    The Range header asks for the bytes after the end of the partial file and
+    the If-Range header holds the validator of the file when the download
+    started: if the file changed on the server since, the server sends the
+    whole new file instead of the missing bytes. A partial file without a
+    validator, or already as long as the file, cannot be resumed and is
+    discarded, as is a partial file whose validator cannot be read.
+
+    Args:
+        filename (Path): The path of the PDF file, as returned by
+        `get_pdf_file_path`.
+        destination_index (DestinationIndex | None): The index of the
+        destination folder. If given, a partial file absent from the index is
+        not looked for on the file system. Defaults to None.
+
+    Returns:
+        dict[str, str]: The Range and If-Range headers, or an empty dict if
+        there is no download to resume.
+    """
+    partial_file = get_partial_file_path(filename)
+    if destination_index is not None and not destination_index.contains(partial_file):
+        return {}
+    if not partial_file.exists():
+        return {}
+    try:
+        resume_data = json.loads(
+            get_resume_file_path(filename).read_text(encoding="utf_8")
+        )
+        validator = resume_data["validator"]
+        length = None if resume_data["length"] is None else int(resume_data["length"])
+    except (OSError, ValueError, TypeError, KeyError):
+        validator = length = None
+    partial_size = partial_file.stat().st_size
+    if (
+        not validator
+        or not partial_size
+        or (length is not None and partial_size >= length)
+    ):
+        discard_partial_download(filename)
+        return {}
+
+    return {"Range": f"bytes={partial_size}-", "If-Range": validator}
+
 
-    filename.write_bytes(response.content)
-    print(f"'{pdf_name}' downloaded in '{destination_folder}' folder.")
+def discard_partial_download(filename: Path) -> None:
+    """Deletes the partial file of a PDF file and its validator."""
+    get_partial_file_path(filename).unlink(missing_ok=True)
+    get_resume_file_path(filename).unlink(missing_ok=True)
@@ -0,0 +1,216 @@
+import heapq
+import json
+import tempfile
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Generator, Iterator
+
+from dacoromanica_downloader.model import CollectionPdf, CollectionPdfColumns
+
+# Collations of the authors in the download queue. The simple collation
+# ignores the case and the diacritics. The Romanian collation ignores the
+# case and sorts the letters in the order of the Romanian alphabet, so "ă" and
+# "â" come after "a", "î" after "i", "ș" after "s" and "ț" after "t".
+SIMPLE_COLLATION: str = "simple"
+ROMANIAN_COLLATION: str = "romanian"
+COLLATIONS: tuple[str, ...] = (SIMPLE_COLLATION, ROMANIAN_COLLATION)
+
+# Rank of the Romanian letters with diacritics after their base letter. The
+# cedilla variants of "ș" and "ț", often found in older texts, are sorted
+# like the comma below ones.
+ROMANIAN_LETTERS: dict[str, str] = {
+    "ă": "a1",
+    "â": "a2",
+    "î": "i1",
+    "ș": "s1",
+    "ş": "s1",
+    "ț": "t1",
+    "ţ": "t1",
+}
+
+# Maximum number of collections sorted in memory. Past this number, the
+# sorted collections are written to a run file on disk and the runs are
+# merged when the queue is read, so ordering the queue never needs all the
+# collections in memory.
+DEFAULT_SORT_RUN_SIZE: int = 100_000
+
+
+def remove_diacritics(text: str) -> str:
+    """Removes the diacritics of the letters of a string."""
+    return "".join(
+        character
+        for character in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(character)
+    )
+
+
+@lru_cache(maxsize=4096)
+def get_romanian_character_key(character: str) -> str:
+    """
+    Gets the Romanian collation key of a character: its base letter followed by
+    its rank among the letters sharing that base letter.
+    """
+    if character in ROMANIAN_LETTERS:
+        return ROMANIAN_LETTERS[character]
+
+    return "".join(f"{base}0" for base in remove_diacritics(character))
+
+
+def get_collation_key(text: str, collation: str = SIMPLE_COLLATION) -> str:
+    """
+    Gets the key used to sort a string according to a collation.
+
+    Args:
+        text (str): The string to sort.
+        collation (str): One of COLLATIONS. Defaults to SIMPLE_COLLATION.
+
+    Returns:
+        str: The key of the string. Strings are sorted by comparing their keys.
+    """
+    if collation == ROMANIAN_COLLATION:
+        return "".join(
+            get_romanian_character_key(character)
+            for character in unicodedata.normalize("NFC", text.casefold())
+        )
+
+    return remove_diacritics(text).casefold()
+
+
+def get_sort_key(
+    collection: CollectionPdf, collation: str = SIMPLE_COLLATION
+) -> tuple[int, str]:
+    """
+    Gets the key ordering the download queue: the year of the collection, then
+    its author according to the collation.
+    """
+    return (collection.year, get_collation_key(collection.author or "", collation))
+
+
+class DownloadQueue:
+    """
+    Orders collections by year and author for downloading.
+
+    The sort key of every collection is computed once, when the collection is
+    added. Up to `run_size` collections are kept in memory, in a
+    CollectionPdfColumns, and sorted by their keys. Past
+    that number, every `run_size` collections are sorted and written, with
+    their keys, to a run file in a temporary directory, and iterating over the
+    queue merges the runs. Collections with equal keys are read in the order
+    in which they were added.
+
+    The run files are removed once the queue has been read or is closed.
+
+    Attributes:
+        collation (str): The collation of the authors, one of COLLATIONS.
+        run_size (int): The maximum number of collections sorted in memory.
+        directory (Path | None): The directory in which the temporary
+        directory of the run files is created. Defaults to None, meaning the
+        default temporary directory of the system.
+    """
+
+    def __init__(
+        self,
+        collation: str = SIMPLE_COLLATION,
+        run_size: int = DEFAULT_SORT_RUN_SIZE,
+        directory: Path | None = None,
+    ) -> None:
+        self.collation = collation
+        self.run_size = run_size
+        self.directory = directory
+        self._keys: list[tuple[int, str]] = []
+        self._buffer = CollectionPdfColumns()
+        self._run_paths: list[Path] = []
+        self._temporary_directory: tempfile.TemporaryDirectory | None = None
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __enter__(self) -> "DownloadQueue":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[CollectionPdf]:
+        runs: list[Generator[tuple[tuple[int, str], CollectionPdf], None, None]] = []
+        try:
+            if not self._run_paths:
+                for _, collection in self._get_sorted_buffer():
+                    yield collection
+                return
+            if self._keys:
+                self._write_run()
+            runs = [self._read_run(run_path) for run_path in self._run_paths]
+            for _, collection in heapq.merge(*runs, key=lambda entry: entry[0]):
+                yield collection
+        finally:
+            # the run files are closed before they are removed
+            for run in runs:
+                run.close()
+            self.close()
+
+    def add(self, collection: CollectionPdf) -> None:
+        """Adds a collection to the queue."""
+        self._keys.append(get_sort_key(collection, self.collation))
+        self._buffer.append(collection)
+        self._length += 1
+        if len(self._keys) >= self.run_size:
+            self._write_run()
+
+    def close(self) -> None:
+        """Removes the collections of the queue and their run files."""
+        self._keys = []
+        self._buffer = CollectionPdfColumns()
+        self._run_paths = []
+        if self._temporary_directory:
+            self._temporary_directory.cleanup()
+            self._temporary_directory = None
+
+    def _write_run(self) -> None:
+        if self._temporary_directory is None:
+            self._temporary_directory = tempfile.TemporaryDirectory(
+                prefix="dacoromanica_sort_", dir=self.directory
+            )
+        run_path = (
+            Path(self._temporary_directory.name) / f"run_{len(self._run_paths)}.jsonl"
+        )
+        with open(run_path, "w", encoding="utf-8") as run_file:
+            for (year, author_key), collection in self._get_sorted_buffer():
+                entry = [
+                    year,
+                    author_key,
+                    collection.details_link,
+                    collection.title,
+                    collection.pdf_link,
+                    collection.author,
+                ]
+                run_file.write(f"{json.dumps(entry, ensure_ascii=False)}\n")
+        self._run_paths.append(run_path)
+        self._keys = []
+        self._buffer = CollectionPdfColumns()
+
+    def _get_sorted_buffer(
+        self,
+    ) -> Generator[tuple[tuple[int, str], CollectionPdf], None, None]:
+        # sorted() is stable, so collections with equal keys keep their order
+        for index in sorted(range(len(self._keys)), key=self._keys.__getitem__):
+            yield self._keys[index], self._buffer[index]
+
+    def _read_run(
+        self, run_path: Path
+    ) -> Generator[tuple[tuple[int, str], CollectionPdf], None, None]:
+        with open(run_path, encoding="utf-8") as run_file:
+            for line in run_file:
+                year, author_key, details_link, title, pdf_link, author = json.loads(
+                    line
+                )
+                collection = CollectionPdf(
+                    details_link=details_link,
+                    title=title,
+                    pdf_link=pdf_link,
+                    author=author,
+                    year=year,
+                )
+                yield (year, author_key), collection
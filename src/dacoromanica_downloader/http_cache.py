@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from dacoromanica_downloader.aleph import remove_session
+
+# Number of seconds during which a cached response is used without asking the
+# server. The collections and details pages almost never change.
+DEFAULT_CACHE_TTL: float = 24 * 60 * 60
+# Maximum total size in bytes of the cached bodies. The least recently used
+# responses are evicted beyond it.
+DEFAULT_CACHE_MAX_SIZE: int = 256 * 1024 * 1024
+
+DEFAULT_PORTS: dict[str, int] = {"http": 80, "https": 443}
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+CachedResponse = namedtuple(
+    "CachedResponse",
+    ["url", "body", "content_type", "etag", "last_modified", "stored_at"],
+)
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so that the URLs of the same page share a cache entry.
+
+    The scheme and the host are lowercased, the default port, the fragment and
+    the Aleph session segment of the path are removed, an empty path becomes
+    "/" and the query parameters are sorted.
+
+    Args:
+        url (str): The URL to normalize.
+
+    Returns:
+        str: The normalized URL.
+    """
+    parts = urlsplit(remove_session(url))
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if parts.port and parts.port == DEFAULT_PORTS.get(scheme):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+class HttpCache:
+    """
+    SQLite cache of the HTTP responses of the collections and details pages.
+
+    The body of every successful response is stored with its Content-Type
+    header and its validators (ETag and Last-Modified headers), keyed by its
+    normalized URL. A response stored less than `ttl` seconds ago is used
+    without asking the server; an older one is revalidated with a conditional
+    request (If-None-Match / If-Modified-Since), so an unchanged page costs a
+    304 response without a body.
+
+    When the bodies stored exceed `max_size` bytes, the least recently used
+    responses are evicted.
+
+    An HttpCache is meant to be shared by the crawler and all the workers: the
+    single connection is used under a lock.
+
+    Attributes:
+        path (Path): The path of the SQLite database file.
+        ttl (float): The number of seconds during which a response is used
+        without revalidation.
+        max_size (int): The maximum total size in bytes of the stored bodies.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = DEFAULT_CACHE_TTL,
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def __enter__(self) -> HttpCache:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def get(self, url: str) -> CachedResponse | None:
+        """
+        Gets the cached response of a URL, fresh or not, and marks it as used.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            CachedResponse | None: The cached response if found, otherwise None.
+        """
+        key = normalize_url(url)
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                """
+                SELECT body, content_type, etag, last_modified, stored_at
+                FROM responses WHERE url = ?
+                """,
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?",
+                (self._clock(), key),
+            )
+
+        return CachedResponse(url, *row)
+
+    def is_fresh(self, cached_response: CachedResponse) -> bool:
+        """Checks if a cached response can be used without revalidation."""
+        return self._clock() - cached_response.stored_at < self.ttl
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """
+        Stores the successful response of a URL, then evicts the least recently
+        used responses if the cache is too big.
+
+        Args:
+            url (str): The URL of the page.
+            response (requests.Response): The response, with status code 200.
+
+        Returns:
+            None: This method does not return any value.
+        """
+        now = self._clock()
+        body = response.content
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                (url, body, content_type, etag, last_modified, size, stored_at,
+                 accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    normalize_url(url),
+                    body,
+                    response.headers.get("content-type"),
+                    response.headers.get("etag"),
+                    response.headers.get("last-modified"),
+                    len(body),
+                    now,
+                    now,
+                ),
+            )
+            self._evict()
+
+    def refresh(self, cached_response: CachedResponse) -> None:
+        """
+        Records that the server confirmed a cached response is unchanged, so it
+        is fresh again for `ttl` seconds.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE responses SET stored_at = ? WHERE url = ?",
+                (self._clock(), normalize_url(cached_response.url)),
+            )
+
+    def discard(self, url: str) -> None:
+        """
+        Removes the cached response of a URL, e.g. a page that turned out to be
+        unusable.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM responses WHERE url = ?", (normalize_url(url),)
+            )
+
+    def _evict(self) -> None:
+        (total_size,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total_size <= self.max_size:
+            return
+        evicted_urls = []
+        for url, size in self._connection.execute(
+            "SELECT url, size FROM responses ORDER BY accessed_at"
+        ):
+            evicted_urls.append((url,))
+            total_size -= size
+            if total_size <= self.max_size:
+                break
+        self._connection.executemany(
+            "DELETE FROM responses WHERE url = ?", evicted_urls
+        )
+
+    def close(self) -> None:
+        """Closes the connection to the database."""
+        self._connection.close()
+
+
+def get_conditional_headers(cached_response: CachedResponse) -> dict[str, str]:
+    """
+    Gets the headers asking the server to answer 304 if the page is unchanged
+    since it was cached.
+    """
+    headers = {}
+    if cached_response.etag:
+        headers["If-None-Match"] = cached_response.etag
+    if cached_response.last_modified:
+        headers["If-Modified-Since"] = cached_response.last_modified
+
+    return headers
+
+
+def get_response(cached_response: CachedResponse) -> requests.Response:
+    """Rebuilds the successful HTTP response of a cached page."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = cached_response.url
+    response._content = cached_response.body
+    if cached_response.content_type:
+        response.headers["Content-Type"] = cached_response.content_type
+
+    return response
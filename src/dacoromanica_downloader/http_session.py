@@ -0,0 +1,126 @@
+import threading
+from collections import namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import ConnectionPool, HTTPConnectionPool
+
+# Number of hosts whose connection pools are kept. The application only talks
+# to Dacoromanica, so a few pools are enough.
+DEFAULT_POOL_CONNECTIONS: int = 4
+# Maximum number of connections kept open to one host.
+DEFAULT_POOL_MAXSIZE: int = 10
+
+DEFAULT_HEADERS: dict[str, str] = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+ConnectionStats = namedtuple("ConnectionStats", ["requests", "connections", "reused"])
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that keeps track of the connection pools it sends requests
+    through, so the reuse of keep-alive connections can be reported.
+
+    The pools are remembered even after the pool manager discards them, so the
+    statistics cover every request sent with the adapter.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._pools: set[HTTPConnectionPool] = set()
+        self._pools_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def get_connection_with_tls_context(self, *args, **kwargs) -> ConnectionPool:
+        pool = super().get_connection_with_tls_context(*args, **kwargs)
+        if isinstance(pool, HTTPConnectionPool):
+            with self._pools_lock:
+                self._pools.add(pool)
+
+        return pool
+
+    @property
+    def connection_stats(self) -> ConnectionStats:
+        """
+        Gets the number of requests sent, of connections opened and of requests
+        sent over an already open connection.
+        """
+        with self._pools_lock:
+            pools = list(self._pools)
+        number_of_requests = sum(pool.num_requests for pool in pools)
+        number_of_connections = sum(pool.num_connections for pool in pools)
+
+        return ConnectionStats(
+            requests=number_of_requests,
+            connections=number_of_connections,
+            reused=max(0, number_of_requests - number_of_connections),
+        )
+
+
+def create_session(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    pool_block: bool = True,
+) -> requests.Session:
+    """
+    Creates a requests Session that reuses keep-alive connections.
+
+    The session is meant to be shared by every request of the application: its
+    `get` method can be passed as the `get_request` argument of
+    `get_link_response`. Connections to a host are kept open in a pool and
+    reused by the next requests to that host, instead of a new TCP connection
+    being opened for every listing page, details page and PDF file.
+
+    Args:
+        pool_connections (int): The number of hosts whose connection pools are
+        kept. Defaults to DEFAULT_POOL_CONNECTIONS.
+        pool_maxsize (int): The maximum number of connections kept open to one
+        host. It should be at least the number of threads sending requests at the
+        same time. Defaults to DEFAULT_POOL_MAXSIZE.
+        pool_block (bool): Whether a request waits for a free connection when
+        `pool_maxsize` connections to the host are in use, instead of opening
+        one more. Defaults to True.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = PooledHTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+def get_connection_stats(session: requests.Session) -> ConnectionStats:
+    """
+    Gets the connection statistics of all the PooledHTTPAdapter mounted on a
+    session.
+
+    Args:
+        session (requests.Session): The session, as returned by
+        `create_session`.
+
+    Returns:
+        ConnectionStats: A named tuple with the following attributes:
+        'requests', 'connections' and 'reused'.
+    """
+    adapters = {
+        id(adapter): adapter
+        for adapter in session.adapters.values()
+        if isinstance(adapter, PooledHTTPAdapter)
+    }
+    all_stats = [adapter.connection_stats for adapter in adapters.values()]
+
+    return ConnectionStats(
+        requests=sum(stats.requests for stats in all_stats),
+        connections=sum(stats.connections for stats in all_stats),
+        reused=sum(stats.reused for stats in all_stats),
+    )
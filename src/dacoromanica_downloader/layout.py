@@ -0,0 +1,140 @@
+import hashlib
+import os
+from collections import namedtuple
+from pathlib import Path
+from typing import Iterable
+
+from dacoromanica_downloader.destination_index import DestinationIndex
+from dacoromanica_downloader.download_pdf import PATH_LENGTH_LIMIT, get_pdf_file_path
+from dacoromanica_downloader.download_queue import remove_diacritics
+from dacoromanica_downloader.model import CollectionPdf
+
+# Layouts of the destination folder. With the flat layout, all the PDF files
+# are saved in the destination folder. The other layouts save every PDF file
+# in a subfolder (a shard) of the destination folder, named after the year of
+# the collection, the initial of its author or the first two hexadecimal
+# digits of a hash of its file name, so no folder holds too many files.
+FLAT_LAYOUT: str = "flat"
+YEAR_LAYOUT: str = "year"
+AUTHOR_LAYOUT: str = "author"
+HASH_LAYOUT: str = "hash"
+LAYOUTS: tuple[str, ...] = (FLAT_LAYOUT, YEAR_LAYOUT, AUTHOR_LAYOUT, HASH_LAYOUT)
+
+# Shards of the collections without year or without author.
+UNKNOWN_YEAR_SHARD: str = "0000"
+UNKNOWN_AUTHOR_SHARD: str = "_"
+
+MigrationStats = namedtuple("MigrationStats", ["moved", "left"])
+
+
+def get_hash_shard(pdf_name: str) -> str:
+    """Gets the shard of a PDF file in the hash layout."""
+    return hashlib.sha1(pdf_name.encode("utf_8")).hexdigest()[:2]
+
+
+def get_shard(collection: CollectionPdf, layout: str = FLAT_LAYOUT) -> str:
+    """
+    Gets the subfolder of the destination folder in which the PDF file of a
+    collection is saved.
+
+    The shard names are at most a few characters long, so they take little of
+    the path length budget of the PDF files (see `get_pdf_file_path`).
+
+    Args:
+        collection (CollectionPdf): The collection whose PDF file is saved.
+        layout (str): The layout of the destination folder, one of LAYOUTS.
+        Defaults to FLAT_LAYOUT.
+
+    Returns:
+        str: The name of the subfolder, or an empty string for the flat
+        layout.
+    """
+    if layout == YEAR_LAYOUT:
+        return str(collection.year) if collection.year else UNKNOWN_YEAR_SHARD
+    if layout == AUTHOR_LAYOUT:
+        initial = remove_diacritics(collection.author or "").strip()[:1].upper()
+        return initial if initial.isalnum() else UNKNOWN_AUTHOR_SHARD
+    if layout == HASH_LAYOUT:
+        return get_hash_shard(collection.downloaded_file_name)
+
+    return ""
+
+
+def migrate_destination_folder(
+    destination_index: DestinationIndex,
+    layout: str,
+    collections: Iterable[CollectionPdf],
+) -> MigrationStats:
+    """
+    Moves the PDF files saved directly in the destination folder (the flat
+    layout) into the shards of another layout.
+
+    The shard of a PDF file is found from its collection, so only the PDF
+    files of the given collections (e.g. the collections of the catalog) are
+    moved. With the hash layout, whose shards only depend on the file names,
+    the other PDF files of the destination folder are moved too, unless their
+    name may have been shortened: the shard is the hash of the name before
+    it is shortened, which cannot be recovered from the file. A PDF file whose
+    new path already exists or is too long is left in place.
+
+    Args:
+        destination_index (DestinationIndex): The index of the destination
+        folder, updated as the files are moved.
+        layout (str): The layout the PDF files are moved to, one of LAYOUTS.
+        collections (Iterable[CollectionPdf]): The collections whose PDF files
+        are moved.
+
+    Returns:
+        MigrationStats: A named tuple with the following attributes: 'moved'
+        (the number of PDF files moved) and 'left' (the number of PDF files
+        still saved directly in the destination folder).
+    """
+    folder = destination_index.folder
+    moved = 0
+    if layout != FLAT_LAYOUT:
+        for collection in collections:
+            flat_filename = get_pdf_file_path(
+                pdf_name=collection.downloaded_file_name, destination_folder=folder
+            )
+            if flat_filename is None or not destination_index.contains(flat_filename):
+                continue
+            filename = get_pdf_file_path(
+                pdf_name=collection.downloaded_file_name,
+                destination_folder=folder / get_shard(collection, layout),
+            )
+            moved += move_pdf(destination_index, flat_filename, filename)
+    if layout == HASH_LAYOUT:
+        for name in destination_index.get_names():
+            if "/" not in name and name.endswith(".pdf"):
+                filename = folder / get_hash_shard(name) / name
+                # a name fitting the path length budget in its shard was
+                # never shortened, so the downloader looks for it there
+                if len(str(filename)) <= PATH_LENGTH_LIMIT:
+                    moved += move_pdf(destination_index, folder / name, filename)
+    left = sum(
+        "/" not in name and name.endswith(".pdf")
+        for name in destination_index.get_names()
+    )
+
+    return MigrationStats(moved=moved, left=left)
+
+
+def move_pdf(
+    destination_index: DestinationIndex, source: Path, destination: Path | None
+) -> bool:
+    """
+    Moves a PDF file of the destination folder, unless the destination is None
+    or already exists.
+
+    Returns:
+        bool: True if the file was moved, otherwise False.
+    """
+    if destination is None or destination_index.contains(destination):
+        return False
+    size = destination_index.get_size(source) or 0
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, destination)
+    destination_index.remove(source)
+    destination_index.add(destination, size)
+
+    return True
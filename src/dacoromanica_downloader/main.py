@@ -1,21 +1,59 @@
-import time
+import argparse
+import sys
+import threading
+from functools import partial
 from pathlib import Path
-from typing import Iterator
+from typing import Callable, Iterable, Iterator
 
 import requests
+from bs4 import BeautifulSoup
 
+from dacoromanica_downloader.aleph import get_session, set_session
+from dacoromanica_downloader.catalog import DOWNLOADED, FAILED, Catalog
+from dacoromanica_downloader.checkpoint import CrawlCheckpoint
+from dacoromanica_downloader.circuit_breaker import CircuitBreaker
+from dacoromanica_downloader.destination_index import DestinationIndex
 from dacoromanica_downloader.download_pdf import (
-    download_collection_pdf,
+    FSYNC_FILE,
+    FSYNC_POLICIES,
+    PDF_REQUEST_HEADERS,
+    discard_partial_download,
     get_link_response,
+    get_partial_file_path,
+    get_pdf_file_path,
+    get_resume_headers,
+    is_pdf_already_downloaded,
+    save_pdf,
+)
+from dacoromanica_downloader.download_queue import (
+    COLLATIONS,
+    DEFAULT_SORT_RUN_SIZE,
+    SIMPLE_COLLATION,
+    DownloadQueue,
 )
 from dacoromanica_downloader.get_starting_urls import get_starting_urls
+from dacoromanica_downloader.http_cache import DEFAULT_CACHE_TTL, HttpCache
+from dacoromanica_downloader.http_session import create_session, get_connection_stats
+from dacoromanica_downloader.layout import (
+    FLAT_LAYOUT,
+    LAYOUTS,
+    get_shard,
+    migrate_destination_folder,
+)
 from dacoromanica_downloader.model import CollectionPdf
+from dacoromanica_downloader.parse_pool import ParsePool
+from dacoromanica_downloader.pipeline import DEFAULT_QUEUE_SIZE, Stage, run_pipeline
+from dacoromanica_downloader.rate_limiter import RateLimiter
+from dacoromanica_downloader.retry import RetryPolicy
 from dacoromanica_downloader.scrape import (
-    get_collection_info,
+    DETAILS_PAGE_STRAINER,
+    LISTING_PAGE_STRAINER,
+    TABLE_VIEW_LINK_STRAINER,
+    ListingPage,
+    extract_with_fallback,
     get_collection_year,
     get_link_for_table_view,
-    get_next_page_url,
-    get_soup,
+    get_listing_page_data,
 )
 
 starting_urls_file_path: Path = Path("starting_urls.txt")
@@ -23,6 +61,15 @@ starting_urls: list[str] = get_starting_urls(urls_file_path=starting_urls_file_p
 next_page_link_identifier: str = "func=results-next-page&result_format=001"
 collections_base_link_identifier: str = "base=GEN01"
 destination_folder: Path = Path("downloaded_files")
+checkpoint_file_path: Path = Path("crawl_checkpoint.jsonl")
+catalog_file_path: Path = Path("catalog.sqlite3")
+cache_file_path: Path = Path("http_cache.sqlite3")
+
+# Paths of the PDF files being downloaded. Collections with the same author,
+# title and year (e.g. the volumes of a work) share a file name, and two
+# workers must not write to the same file at the same time.
+downloading_files: set[Path] = set()
+downloading_files_lock = threading.Lock()
 
 
 def create_CollectionPdf(
@@ -57,14 +104,450 @@ def create_CollectionPdf(
     return all_page_collections
 
 
-def main() -> None:
-    print("dacoromanica_downloader started...")
+def move_collections_to_session(
+    collections: list[CollectionPdf], session: str | None
+) -> None:
+    """
+    Moves the details and PDF links of collections onto an Aleph session, so
+    the links found in an earlier session can be requested.
+
+    Args:
+        collections (list[CollectionPdf]): The collections, updated in place.
+        session (str | None): The session, as returned by `get_session`, or None
+        to leave the links unchanged.
+
+    Returns:
+        None: This function does not return any value.
+    """
+    if session is None:
+        return
+    for collection in collections:
+        collection.details_link = set_session(collection.details_link, session)
+        collection.pdf_link = set_session(collection.pdf_link, session)
+
+
+def update_collection_year(
+    collection: CollectionPdf,
+    rate_limiter: RateLimiter | None = None,
+    get_request: Callable = requests.get,
+    checkpoint: CrawlCheckpoint | None = None,
+    catalog: Catalog | None = None,
+    parse_pool: ParsePool | None = None,
+    cache: HttpCache | None = None,
+    retry_policy: RetryPolicy | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+) -> bool:
+    """
+    Updates the publication year of a collection from its details page.
+
+    If the checkpoint or the catalog already holds the year of the collection,
+    the details page is not requested again. Otherwise the year found is
+    recorded in both.
+
+    Args:
+        collection (CollectionPdf): The collection whose year is updated.
+        rate_limiter (RateLimiter | None): The rate limiter shared by all
+        requests. Defaults to None, meaning no limit.
+        get_request (callable): The function used for making the GET request.
+        Defaults to `requests.get`.
+        checkpoint (CrawlCheckpoint | None): The checkpoint of the crawl.
+        Defaults to None, meaning the year is not persisted.
+        catalog (Catalog | None): The catalog of the collections. Defaults to
+        None, meaning the collections are not stored.
+        parse_pool (ParsePool | None): The pool of processes parsing the
+        details page. Defaults to None, meaning the page is parsed in the
+        calling thread.
+        cache (HttpCache | None): The cache of the pages. Defaults to None,
+        meaning the details page is always requested.
+        retry_policy (RetryPolicy | None): The retry policy shared by all
+        requests. Defaults to None, meaning no request is retried.
+        circuit_breaker (CircuitBreaker | None): The circuit breaker shared
+        by all requests. Defaults to None, meaning no request is paused.
+
+    Returns:
+        bool: True if the details page could be accessed, otherwise False.
+    """
+    year_in_checkpoint = (
+        checkpoint.get_year(collection.details_link) if checkpoint else None
+    )
+    if year_in_checkpoint is not None:
+        collection.year = year_in_checkpoint
+        # the run may have stopped before the year was stored in the catalog
+        if catalog and catalog.get_year(collection.details_link) is None:
+            catalog.update_year(
+                details_link=collection.details_link, year=year_in_checkpoint
+            )
+        return True
+    if catalog:
+        year_in_catalog = catalog.get_year(collection.details_link)
+        if year_in_catalog is not None:
+            collection.year = year_in_catalog
+            return True
+
+    year_response = get_link_response(
+        link=collection.details_link,
+        get_request=get_request,
+        rate_limiter=rate_limiter,
+        cache=cache,
+        retry_policy=retry_policy,
+        circuit_breaker=circuit_breaker,
+    )
+    if (
+        not isinstance(year_response, requests.Response)
+        or year_response.status_code != 200
+    ):
+        return False
+    if parse_pool:
+        year = parse_pool.get_collection_year(year_response)
+    else:
+        year = extract_with_fallback(
+            response=year_response,
+            extract=get_collection_year,
+            parse_only=DETAILS_PAGE_STRAINER,
+        )
+    if year:
+        collection.update_collection_year(year=year)
+    if checkpoint:
+        checkpoint.add_year(details_link=collection.details_link, year=collection.year)
+    if catalog:
+        catalog.update_year(details_link=collection.details_link, year=collection.year)
+
+    return True
+
+
+def get_details_stage(workers: int, fetched_pages: list[bool], **kwargs) -> Stage:
+    """
+    Gets the pipeline stage updating the publication years of the collections.
+
+    Args:
+        workers (int): The maximum number of details pages requested at the
+        same time.
+        fetched_pages (list[bool]): The list to which the stage appends, for
+        every collection, whether its details page could be accessed.
+        **kwargs: The arguments passed to `update_collection_year` with every
+        collection (e.g. `rate_limiter` or `catalog`).
+
+    Returns:
+        Stage: The stage, named "details", passing every collection on to the
+        next stage once its year is updated.
+    """
+
+    def update_year(collection: CollectionPdf) -> CollectionPdf:
+        fetched_pages.append(update_collection_year(collection=collection, **kwargs))
+        return collection
+
+    return Stage(name="details", handle=update_year, workers=workers)
+
+
+def download_collection(
+    collection: CollectionPdf,
+    rate_limiter: RateLimiter | None = None,
+    get_request: Callable = requests.get,
+    catalog: Catalog | None = None,
+    fsync: str = FSYNC_FILE,
+    retry_policy: RetryPolicy | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    destination_index: DestinationIndex | None = None,
+    layout: str = FLAT_LAYOUT,
+) -> None:
+    """
+    Downloads the PDF file of a collection, unless it is already downloaded.
+
+    The destination path is derived from the collection's downloaded file name
+    (shortened if needed) and checked before the PDF is requested, so a PDF
+    already present in the destination folder costs no network traffic. With a
+    destination index, the check costs no system call either.
+
+    If a previous download of the PDF was interrupted, only the missing bytes
+    are requested, provided the PDF did not change on the server. If the
+    server cannot send them (416 response), the partial file is discarded and
+    the whole PDF is requested again. An interrupted transfer keeps the bytes
+    already written for the next attempt.
+
+    A collection whose PDF file is being downloaded by another worker (e.g.
+    another volume of the same work, with the same file name) is skipped.
+
+    The outcome is recorded in the catalog: the collection is marked as
+    downloaded, with the size and checksum of the file, or as failed.
+
+    Args:
+        collection (CollectionPdf): The collection whose PDF is downloaded.
+        rate_limiter (RateLimiter | None): The rate limiter shared by all
+        requests. Defaults to None, meaning no limit.
+        get_request (callable): The function used for making the GET request.
+        Defaults to `requests.get`.
+        catalog (Catalog | None): The catalog of the collections. Defaults to
+        None, meaning the collections are not stored.
+        fsync (str): The policy flushing the PDF file to the disk, one of
+        FSYNC_POLICIES. Defaults to FSYNC_FILE.
+        retry_policy (RetryPolicy | None): The retry policy shared by all
+        requests. Defaults to None, meaning no request is retried.
+        circuit_breaker (CircuitBreaker | None): The circuit breaker shared
+        by all requests. Defaults to None, meaning no request is paused.
+        destination_index (DestinationIndex | None): The index of the
+        destination folder. Defaults to None, meaning the presence of the
+        PDF files is checked on the file system.
+        layout (str): The layout of the destination folder, one of LAYOUTS.
+        Defaults to FLAT_LAYOUT.
 
-    all_collections: list[CollectionPdf] = []
+    Returns:
+        None: This function does not return any value.
+    """
+    filename = get_pdf_file_path(
+        pdf_name=collection.downloaded_file_name,
+        destination_folder=destination_folder / get_shard(collection, layout),
+    )
+    if filename is None:
+        if catalog:
+            catalog.update_status(details_link=collection.details_link, status=FAILED)
+        return
+    if is_pdf_already_downloaded(
+        filename=filename,
+        destination_folder=destination_folder,
+        destination_index=destination_index,
+    ):
+        if catalog:
+            catalog.update_status(
+                details_link=collection.details_link,
+                status=DOWNLOADED,
+                size=(
+                    destination_index.get_size(filename)
+                    if destination_index is not None
+                    else filename.stat().st_size
+                ),
+            )
+        return
 
+    with downloading_files_lock:
+        if filename in downloading_files:
+            print(
+                f"'{filename.name}' is already being downloaded so it will not be"
+                " downloaded again."
+            )
+            return
+        downloading_files.add(filename)
+    try:
+        request_pdf = partial(
+            get_link_response,
+            link=collection.pdf_link,
+            get_request=get_request,
+            stream=True,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+        )
+        resume_headers = get_resume_headers(
+            filename, destination_index=destination_index
+        )
+        response = request_pdf(headers={**PDF_REQUEST_HEADERS, **resume_headers})
+        if (
+            resume_headers
+            and isinstance(response, requests.Response)
+            and response.status_code == 416
+        ):
+            # the missing bytes cannot be sent (e.g. the partial file is
+            # already complete), so the whole PDF file is requested again
+            response.close()
+            discard_partial_download(filename)
+            if destination_index is not None:
+                destination_index.remove(get_partial_file_path(filename))
+            response = request_pdf(headers=PDF_REQUEST_HEADERS)
+        if not isinstance(response, requests.Response):
+            print(f"'{collection.title}' was not downloaded because of: {response} .")
+            if catalog:
+                catalog.update_status(
+                    details_link=collection.details_link, status=FAILED
+                )
+        else:
+            # the body is streamed so the response has to be closed once handled
+            with response:
+                if response.status_code not in (200, 206):
+                    print(
+                        f"'{collection.title}' was not downloaded because of: "
+                        f"{response} ."
+                    )
+                    if catalog:
+                        catalog.update_status(
+                            details_link=collection.details_link, status=FAILED
+                        )
+                    return
+                try:
+                    if layout != FLAT_LAYOUT:
+                        filename.parent.mkdir(parents=True, exist_ok=True)
+                    saved_file = save_pdf(
+                        response=response,
+                        filename=filename,
+                        destination_folder=destination_folder,
+                        rate_limiter=rate_limiter,
+                        fsync=fsync,
+                    )
+                except (requests.exceptions.RequestException, OSError) as e:
+                    print(f"'{collection.title}' was not downloaded because of: {e} .")
+                    if catalog:
+                        catalog.update_status(
+                            details_link=collection.details_link, status=FAILED
+                        )
+                else:
+                    if destination_index is not None:
+                        destination_index.add(filename, saved_file.size)
+                    if catalog:
+                        catalog.update_status(
+                            details_link=collection.details_link,
+                            status=DOWNLOADED,
+                            size=saved_file.size,
+                            checksum=saved_file.checksum,
+                        )
+
+    finally:
+        with downloading_files_lock:
+            downloading_files.discard(filename)
+
+
+def download_collections(
+    collections: Iterable[CollectionPdf],
+    workers: int = 1,
+    rate_limiter: RateLimiter | None = None,
+    get_request: Callable = requests.get,
+    catalog: Catalog | None = None,
+    fsync: str = FSYNC_FILE,
+    retry_policy: RetryPolicy | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    destination_index: DestinationIndex | None = None,
+    layout: str = FLAT_LAYOUT,
+) -> None:
+    """
+    Downloads the PDF files of the collections using a pool of worker threads.
+
+    At most `workers` PDF files are downloaded at the same time. The downloads
+    are started in the order of `collections`: a download is only started after
+    all the downloads before it have been started. The collections are read
+    from `collections` as the downloads progress, so it can be an iterator that
+    produces them lazily (e.g. a DownloadQueue).
+
+    Args:
+        collections (Iterable[CollectionPdf]): The collections whose PDF files
+        are downloaded, in the order in which the downloads should be started.
+        workers (int): The maximum number of PDF files downloaded at the same
+        time. Defaults to 1.
+        rate_limiter (RateLimiter | None): The rate limiter shared by all
+        workers. Defaults to None, meaning no limit.
+        get_request (callable): The function used by all workers for making the
+        GET requests. Defaults to `requests.get`.
+        catalog (Catalog | None): The catalog of the collections. Defaults to
+        None, meaning the collections are not stored.
+        fsync (str): The policy flushing the PDF files to the disk, one of
+        FSYNC_POLICIES. Defaults to FSYNC_FILE.
+        retry_policy (RetryPolicy | None): The retry policy shared by all
+        requests. Defaults to None, meaning no request is retried.
+        circuit_breaker (CircuitBreaker | None): The circuit breaker shared
+        by all requests. Defaults to None, meaning no request is paused.
+        destination_index (DestinationIndex | None): The index of the
+        destination folder. Defaults to None, meaning the presence of the
+        PDF files is checked on the file system.
+        layout (str): The layout of the destination folder, one of LAYOUTS.
+        Defaults to FLAT_LAYOUT.
+
+    Returns:
+        None: This function does not return any value.
+    """
+
+    def download(collection: CollectionPdf) -> None:
+        download_collection(
+            collection=collection,
+            rate_limiter=rate_limiter,
+            get_request=get_request,
+            catalog=catalog,
+            fsync=fsync,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            destination_index=destination_index,
+            layout=layout,
+        )
+
+    run_pipeline(
+        items=collections,
+        stages=[Stage(name="download", handle=download, workers=workers)],
+    )
+
+
+def crawl_collections(
+    starting_urls: list[str],
+    rate_limiter: RateLimiter | None = None,
+    get_request: Callable = requests.get,
+    checkpoint: CrawlCheckpoint | None = None,
+    catalog: Catalog | None = None,
+    incremental: bool = False,
+    parse_pool: ParsePool | None = None,
+    cache: HttpCache | None = None,
+    retry_policy: RetryPolicy | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+) -> Iterator[CollectionPdf]:
+    """
+    Yields the collections found on the collections pages of the starting urls.
+
+    For every starting url, the table view of the collections page is crawled
+    page by page. The collections of a page are yielded as soon as the page is
+    parsed, before the next page is requested.
+
+    The starting page and the first page of the table view are always
+    requested, so they hand out a live Aleph session. The links found on every
+    page, including the pages served from the cache, are moved onto that
+    session. A page without collections is not kept in the cache.
+
+    The collections of every crawled page are added to the catalog and the page
+    is recorded in the checkpoint. If the checkpoint already
+    holds pages of a starting url, their collections are yielded without
+    requesting these pages again and the crawl resumes from the first page not
+    yet crawled; their links are moved onto the live session first. A page
+    without collections after the first one, e.g. the answer to the URL of an
+    expired session, stops the crawl of its starting url without being
+    recorded.
+
+    In incremental mode, the crawl of a starting url stops at the first page
+    whose collections are all already in the catalog: the pages after it are
+    assumed to have been crawled by a previous run.
+
+    Args:
+        starting_urls (list[str]): The urls of the collections pages.
+        rate_limiter (RateLimiter | None): The rate limiter shared by all
+        requests. Defaults to None, meaning no limit.
+        get_request (callable): The function used for making the GET requests.
+        Defaults to `requests.get`.
+        checkpoint (CrawlCheckpoint | None): The checkpoint of the crawl.
+        Defaults to None, meaning the crawled pages are not persisted.
+        catalog (Catalog | None): The catalog of the collections. Defaults to
+        None, meaning the collections are not stored.
+        incremental (bool): Whether the crawl stops at the first page holding
+        only collections already in the catalog. Defaults to False.
+        parse_pool (ParsePool | None): The pool of processes parsing the
+        collections pages. Defaults to None, meaning the pages are parsed in
+        the calling thread.
+        cache (HttpCache | None): The cache of the pages. Defaults to None,
+        meaning the collections pages are always requested.
+        retry_policy (RetryPolicy | None): The retry policy shared by all
+        requests. Defaults to None, meaning no request is retried.
+        circuit_breaker (CircuitBreaker | None): The circuit breaker shared
+        by all requests. Defaults to None, meaning no request is paused.
+
+    Yields:
+        CollectionPdf: The collections found on the crawled pages.
+    """
     for starting_url in starting_urls:
-        print(f"Gathering data from url: '{starting_url}'...")
-        starting_url_response = get_link_response(link=starting_url)
+        resuming = checkpoint is not None and checkpoint.has_starting_url(starting_url)
+        if resuming:
+            print(f"Resuming gathering data from url: '{starting_url}'...")
+        else:
+            print(f"Gathering data from url: '{starting_url}'...")
+        # the starting page is never cached, so the links to the table view
+        # carry a live Aleph session; it is requested when resuming too, as
+        # the session of the interrupted run may have expired
+        starting_url_response = get_link_response(
+            link=starting_url,
+            get_request=get_request,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+        )
         if not isinstance(starting_url_response, requests.Response):
             print(
                 f"{starting_url} could not be accessed because of: "
@@ -72,71 +555,664 @@ def main() -> None:
                 "No files can be downloaded from this link."
             )
             continue
-        starting_url_soup = get_soup(response=starting_url_response)
-        table_view_url = get_link_for_table_view(soup=starting_url_soup)
+        table_view_url = extract_with_fallback(
+            response=starting_url_response,
+            extract=get_link_for_table_view,
+            parse_only=TABLE_VIEW_LINK_STRAINER,
+        )
         if not table_view_url:
             print(
                 f"'{starting_url}' is not a valid Dacoromanica collections page. "
                 "No files can be downloaded from this link."
             )
             continue
+        session = get_session(table_view_url)
+        if checkpoint and resuming:
+            checkpoint_collections = checkpoint.get_collections(starting_url)
+            move_collections_to_session(checkpoint_collections, session)
+            # the run may have stopped before they were stored in the catalog
+            if catalog:
+                catalog.upsert_collections(checkpoint_collections)
+            yield from checkpoint_collections
+            next_page_url = checkpoint.get_next_page_url(starting_url)
+            if next_page_url:
+                next_page_url = set_session(next_page_url, session)
+        else:
+            next_page_url = table_view_url
 
-        next_page_url = table_view_url
         while next_page_url:
-            response = get_link_response(link=next_page_url)
+            response = get_link_response(
+                link=next_page_url,
+                get_request=get_request,
+                rate_limiter=rate_limiter,
+                # the table view is never cached either, for the same reason
+                cache=None if next_page_url == table_view_url else cache,
+                retry_policy=retry_policy,
+                circuit_breaker=circuit_breaker,
+            )
             if (
                 not isinstance(response, requests.Response)
                 or response.status_code != 200
             ):
-                f"'{next_page_url}' could not be accessed because of: {response}. "
-                "No files can be downloaded from this link."
+                print(
+                    f"'{next_page_url}' could not be accessed because of: "
+                    f"{response}. No files can be downloaded from this link."
+                )
                 break
-            page_soup = get_soup(response=response)
-            all_collections_on_page_details = get_collection_info(
-                soup=page_soup,
-                collections_base_link_identifier=collections_base_link_identifier,
+            if parse_pool:
+                listing_page_data = parse_pool.get_listing_page(
+                    response=response,
+                    collections_base_link_identifier=collections_base_link_identifier,
+                    next_page_link_identifier=next_page_link_identifier,
+                )
+            else:
+                listing_page_data = extract_with_fallback(
+                    response=response,
+                    extract=partial(
+                        get_listing_page_data,
+                        collections_base_link_identifier=collections_base_link_identifier,
+                        next_page_link_identifier=next_page_link_identifier,
+                    ),
+                    parse_only=LISTING_PAGE_STRAINER,
+                )
+            if listing_page_data is None:
+                # e.g. the answer to the URL of an expired session, which must
+                # not be served to the next runs
+                if cache:
+                    cache.discard(next_page_url)
+                if next_page_url != table_view_url:
+                    # the page is not recorded in the checkpoint, so the next
+                    # run resumes from it
+                    print(
+                        f"'{next_page_url}' holds no collections. No more files "
+                        f"can be downloaded from url: '{starting_url}'."
+                    )
+                    break
+                listing_page_data = ListingPage(collections=[], next_page_url=None)
+            all_page_collections = create_CollectionPdf(
+                iter(listing_page_data.collections)
             )
-            all_page_collections = create_CollectionPdf(all_collections_on_page_details)
-            all_collections.extend(all_page_collections)
-            next_page_url = get_next_page_url(
-                soup=page_soup, next_page_link_identifier=next_page_link_identifier
+            # a page served from the cache holds the links of the session it
+            # was stored in, which may have expired
+            move_collections_to_session(all_page_collections, session)
+            if (
+                incremental
+                and catalog
+                and catalog.are_known(
+                    [collection.details_link for collection in all_page_collections]
+                )
+            ):
+                print(
+                    f"All the collections on '{next_page_url}' are already in the "
+                    f"catalog. Stopping gathering data from url: '{starting_url}'."
+                )
+                next_page_url = None
+            elif listing_page_data.next_page_url:
+                next_page_url = set_session(listing_page_data.next_page_url, session)
+            else:
+                next_page_url = None
+            # the page is only recorded as crawled once its collections are in
+            # the catalog, as a resumed crawl does not request it again
+            if catalog:
+                catalog.upsert_collections(all_page_collections)
+            if checkpoint:
+                checkpoint.add_page(
+                    starting_url=starting_url,
+                    collections=all_page_collections,
+                    next_page_url=next_page_url,
+                )
+            yield from all_page_collections
+
+
+def process_collections(
+    collections: Iterable[CollectionPdf],
+    details_workers: int = 1,
+    workers: int = 1,
+    rate_limiter: RateLimiter | None = None,
+    get_request: Callable = requests.get,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    checkpoint: CrawlCheckpoint | None = None,
+    catalog: Catalog | None = None,
+    parse_pool: ParsePool | None = None,
+    cache: HttpCache | None = None,
+    retry_policy: RetryPolicy | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    destination_index: DestinationIndex | None = None,
+    layout: str = FLAT_LAYOUT,
+    fsync: str = FSYNC_FILE,
+) -> None:
+    """
+    Updates the publication years of the collections and downloads their PDF
+    files in a pipeline.
+
+    The collections are read from `collections` (e.g. the generator returned
+    by `crawl_collections`) while their details pages are requested by
+    `details_workers` threads and their PDF files are downloaded by `workers`
+    threads. The stages are connected by queues of at most `queue_size`
+    collections, so the first PDF files are downloaded while the collections
+    pages are still being crawled. The PDF files are downloaded in the order
+    in which their publication years are found.
+
+    Args:
+        collections (Iterable[CollectionPdf]): The collections to download.
+        details_workers (int): The maximum number of details pages requested at
+        the same time. Defaults to 1.
+        workers (int): The maximum number of PDF files downloaded at the same
+        time. Defaults to 1.
+        rate_limiter (RateLimiter | None): The rate limiter shared by all
+        workers. Defaults to None, meaning no limit.
+        get_request (callable): The function used by all workers for making the
+        GET requests. Defaults to `requests.get`.
+        queue_size (int): The maximum number of collections waiting between two
+        stages. Defaults to DEFAULT_QUEUE_SIZE.
+        checkpoint (CrawlCheckpoint | None): The checkpoint of the crawl.
+        Defaults to None, meaning the years are not persisted.
+        catalog (Catalog | None): The catalog of the collections. Defaults to
+        None, meaning the collections are not stored.
+        parse_pool (ParsePool | None): The pool of processes parsing the
+        details pages. Defaults to None, meaning the pages are parsed by the
+        worker threads.
+        cache (HttpCache | None): The cache of the pages. Defaults to None,
+        meaning the details pages are always requested.
+        retry_policy (RetryPolicy | None): The retry policy shared by all
+        requests. Defaults to None, meaning no request is retried.
+        circuit_breaker (CircuitBreaker | None): The circuit breaker shared
+        by all requests. Defaults to None, meaning no request is paused.
+        destination_index (DestinationIndex | None): The index of the
+        destination folder. Defaults to None, meaning the presence of the
+        PDF files is checked on the file system.
+        layout (str): The layout of the destination folder, one of LAYOUTS.
+        Defaults to FLAT_LAYOUT.
+        fsync (str): The policy flushing the PDF files to the disk, one of
+        FSYNC_POLICIES. Defaults to FSYNC_FILE.
+
+    Returns:
+        None: This function does not return any value.
+    """
+    fetched_pages: list[bool] = []
+    details_stage = get_details_stage(
+        workers=details_workers,
+        fetched_pages=fetched_pages,
+        rate_limiter=rate_limiter,
+        get_request=get_request,
+        checkpoint=checkpoint,
+        catalog=catalog,
+        parse_pool=parse_pool,
+        cache=cache,
+        retry_policy=retry_policy,
+        circuit_breaker=circuit_breaker,
+    )
+
+    def download(collection: CollectionPdf) -> None:
+        download_collection(
+            collection=collection,
+            rate_limiter=rate_limiter,
+            get_request=get_request,
+            catalog=catalog,
+            fsync=fsync,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            destination_index=destination_index,
+            layout=layout,
+        )
+
+    details_stats, download_stats = run_pipeline(
+        items=collections,
+        stages=[
+            details_stage,
+            Stage(name="download", handle=download, workers=workers),
+        ],
+        queue_size=queue_size,
+    )
+
+    print_details_throughput(
+        fetched_pages=sum(fetched_pages),
+        total_pages=details_stats.items,
+        elapsed=details_stats.seconds,
+    )
+    print(f"Number of pdf files processed: {download_stats.items}")
+
+
+def download_sorted_collections(
+    collections: Iterable[CollectionPdf],
+    details_workers: int = 1,
+    workers: int = 1,
+    rate_limiter: RateLimiter | None = None,
+    get_request: Callable = requests.get,
+    checkpoint: CrawlCheckpoint | None = None,
+    catalog: Catalog | None = None,
+    parse_pool: ParsePool | None = None,
+    cache: HttpCache | None = None,
+    retry_policy: RetryPolicy | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    destination_index: DestinationIndex | None = None,
+    layout: str = FLAT_LAYOUT,
+    fsync: str = FSYNC_FILE,
+    collation: str = SIMPLE_COLLATION,
+    sort_run_size: int = DEFAULT_SORT_RUN_SIZE,
+) -> None:
+    """
+    Updates the publication years of all the collections, then downloads their
+    PDF files ordered by year and author.
+
+    Unlike `process_collections`, no PDF file is downloaded before all the
+    collections pages are crawled and all the details pages are requested.
+    The collections whose years are updated are added to a DownloadQueue,
+    which keeps at most `sort_run_size` of them in memory and sorts the rest
+    on disk.
+
+    Args:
+        collections (Iterable[CollectionPdf]): The collections to download.
+        details_workers (int): The maximum number of details pages requested at
+        the same time. Defaults to 1.
+        workers (int): The maximum number of PDF files downloaded at the same
+        time. Defaults to 1.
+        rate_limiter (RateLimiter | None): The rate limiter shared by all
+        workers. Defaults to None, meaning no limit.
+        get_request (callable): The function used by all workers for making the
+        GET requests. Defaults to `requests.get`.
+        checkpoint (CrawlCheckpoint | None): The checkpoint of the crawl.
+        Defaults to None, meaning the years are not persisted.
+        catalog (Catalog | None): The catalog of the collections. Defaults to
+        None, meaning the collections are not stored.
+        parse_pool (ParsePool | None): The pool of processes parsing the
+        details pages. Defaults to None, meaning the pages are parsed by the
+        worker threads.
+        cache (HttpCache | None): The cache of the pages. Defaults to None,
+        meaning the details pages are always requested.
+        retry_policy (RetryPolicy | None): The retry policy shared by all
+        requests. Defaults to None, meaning no request is retried.
+        circuit_breaker (CircuitBreaker | None): The circuit breaker shared
+        by all requests. Defaults to None, meaning no request is paused.
+        destination_index (DestinationIndex | None): The index of the
+        destination folder. Defaults to None, meaning the presence of the
+        PDF files is checked on the file system.
+        layout (str): The layout of the destination folder, one of LAYOUTS.
+        Defaults to FLAT_LAYOUT.
+        fsync (str): The policy flushing the PDF files to the disk, one of
+        FSYNC_POLICIES. Defaults to FSYNC_FILE.
+        collation (str): The collation of the authors, one of COLLATIONS.
+        Defaults to SIMPLE_COLLATION.
+        sort_run_size (int): The maximum number of collections sorted in
+        memory. Defaults to DEFAULT_SORT_RUN_SIZE.
+
+    Returns:
+        None: This function does not return any value.
+    """
+    fetched_pages: list[bool] = []
+    details_stage = get_details_stage(
+        workers=details_workers,
+        fetched_pages=fetched_pages,
+        rate_limiter=rate_limiter,
+        get_request=get_request,
+        checkpoint=checkpoint,
+        catalog=catalog,
+        parse_pool=parse_pool,
+        cache=cache,
+        retry_policy=retry_policy,
+        circuit_breaker=circuit_breaker,
+    )
+
+    with DownloadQueue(collation=collation, run_size=sort_run_size) as download_queue:
+        print("Updating pdf collections date of publication...")
+        details_stats, _ = run_pipeline(
+            items=collections,
+            stages=[
+                details_stage,
+                # a single worker adds the collections to the queue
+                Stage(name="sort", handle=download_queue.add, workers=1),
+            ],
+        )
+        print_details_throughput(
+            fetched_pages=sum(fetched_pages),
+            total_pages=details_stats.items,
+            elapsed=details_stats.seconds,
+        )
+
+        print(f"Number of pdf files to be downloaded: {len(download_queue)}")
+
+        print("Starting downloading...")
+        download_collections(
+            collections=download_queue,
+            workers=workers,
+            rate_limiter=rate_limiter,
+            get_request=get_request,
+            catalog=catalog,
+            fsync=fsync,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            destination_index=destination_index,
+            layout=layout,
+        )
+
+
+def print_details_throughput(
+    fetched_pages: int, total_pages: int, elapsed: float
+) -> None:
+    """
+    Prints the number of details pages fetched per second.
+
+    Args:
+        fetched_pages (int): The number of details pages that could be accessed.
+        total_pages (int): The number of details pages requested.
+        elapsed (float): The duration of the stage, in seconds.
+
+    Returns:
+        None: This function does not return any value.
+    """
+    pages_per_second = fetched_pages / elapsed if elapsed else 0.0
+    print(
+        f"{fetched_pages} of {total_pages} details pages fetched in "
+        f"{elapsed:.1f} s ({pages_per_second:.2f} pages/s)."
+    )
+
+
+def positive_float(value: str) -> float:
+    """
+    Converts a command line argument to a strictly positive number.
+
+    Args:
+        value (str): The command line argument.
+
+    Returns:
+        float: The converted value.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive number.
+    """
+    try:
+        res = float(value)
+    except ValueError:
+        res = 0
+    if not res > 0:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a positive number.")
+
+    return res
+
+
+def positive_int(value: str) -> int:
+    """
+    Converts a command line argument to a strictly positive integer.
+
+    Args:
+        value (str): The command line argument.
+
+    Returns:
+        int: The converted value.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive integer.
+    """
+    try:
+        res = int(value)
+    except ValueError:
+        res = 0
+    if res < 1:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a positive integer.")
+
+    return res
+
+
+def parse_arguments(args: list[str]) -> argparse.Namespace:
+    """
+    Parses the command line arguments of dacoromanica_downloader.
+
+    Args:
+        args (list[str]): The command line arguments, without the program name.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="dacoromanica_downloader",
+        description="Downloads PDF files from Dacoromanica collections pages.",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=positive_int,
+        default=1,
+        help="number of PDF files downloaded at the same time (default: 1)",
+    )
+    parser.add_argument(
+        "--details-workers",
+        type=positive_int,
+        default=4,
+        help="number of details pages requested at the same time (default: 4)",
+    )
+    parser.add_argument(
+        "--sort",
+        action="store_true",
+        help="download the PDF files ordered by year and author; the downloads"
+        " only start after all the collections pages are crawled",
+    )
+    parser.add_argument(
+        "--collation",
+        choices=COLLATIONS,
+        default=SIMPLE_COLLATION,
+        help="order of the authors with --sort: ignoring the case and the"
+        " diacritics ('simple') or following the Romanian alphabet ('romanian')"
+        f" (default: {SIMPLE_COLLATION})",
+    )
+    parser.add_argument(
+        "--sort-run-size",
+        type=positive_int,
+        default=DEFAULT_SORT_RUN_SIZE,
+        help="maximum number of collections sorted in memory with --sort; the"
+        " others are sorted in temporary files on disk"
+        f" (default: {DEFAULT_SORT_RUN_SIZE})",
+    )
+    parser.add_argument(
+        "--from-catalog",
+        action="store_true",
+        help="download the PDF files of the catalog that are not downloaded yet,"
+        " without crawling the collections pages",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="stop crawling a collections page at the first page holding only"
+        " PDF files already in the catalog",
+    )
+    parser.add_argument(
+        "--parse-processes",
+        type=positive_int,
+        default=None,
+        help="number of processes parsing the collections and details pages"
+        " (default: the pages are parsed by the threads requesting them)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="request every collections and details page instead of using the"
+        " pages cached by a previous run",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=positive_float,
+        default=DEFAULT_CACHE_TTL,
+        help="number of seconds during which a cached page is used without"
+        f" asking the server if it changed (default: {DEFAULT_CACHE_TTL:.0f})",
+    )
+    parser.add_argument(
+        "--fsync",
+        choices=FSYNC_POLICIES,
+        default=FSYNC_FILE,
+        help="flush the downloaded PDF files to the disk before renaming them"
+        " into place ('file'), also flush the renames ('all') or flush nothing"
+        f" ('none') (default: {FSYNC_FILE})",
+    )
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        default=FLAT_LAYOUT,
+        help="save the PDF files directly in the destination folder ('flat') or"
+        " in subfolders named after their year ('year'), the initial of their"
+        " author ('author') or a hash of their file name ('hash')"
+        f" (default: {FLAT_LAYOUT})",
+    )
+    parser.add_argument(
+        "--migrate-layout",
+        action="store_true",
+        help="move the PDF files saved directly in the destination folder into"
+        " the subfolders of --layout, then exit without downloading",
+    )
+    parser.add_argument(
+        "--requests-per-second",
+        type=positive_float,
+        default=1,
+        help="maximum number of requests per second sent to a host (default: 1)",
+    )
+    parser.add_argument(
+        "--bytes-per-second",
+        type=positive_float,
+        default=None,
+        help="maximum number of bytes per second downloaded from a host"
+        " (default: no limit)",
+    )
+
+    return parser.parse_args(args)
+
+
+def main(args: list[str] | None = None) -> None:
+    arguments = parse_arguments([] if args is None else args)
+    print("dacoromanica_downloader started...")
+
+    if arguments.migrate_layout:
+        # the year and the author of the PDF files are found in the catalog
+        with Catalog(path=catalog_file_path) as catalog:
+            migration_stats = migrate_destination_folder(
+                destination_index=DestinationIndex(destination_folder),
+                layout=arguments.layout,
+                collections=catalog.iter_collections(),
             )
+        print(
+            f"{migration_stats.moved} pdf files moved to the '{arguments.layout}'"
+            f" layout, {migration_stats.left} left in '{destination_folder}'."
+        )
+        print("dacoromanica_downloader finished.")
+        return
 
-            time.sleep(1)
+    rate_limiter = RateLimiter(
+        requests_per_second=arguments.requests_per_second,
+        bytes_per_second=arguments.bytes_per_second,
+    )
+    # one connection per download worker, per details page worker and one for
+    # crawling the pages
+    session = create_session(
+        pool_maxsize=arguments.workers + arguments.details_workers + 1
+    )
 
-    print("Updating pdf collections date of publication...")
-    for collection in all_collections:
-        year_response = get_link_response(link=collection.details_link)
-        if (
-            not isinstance(year_response, requests.Response)
-            or year_response.status_code != 200
-        ):
-            continue
-        year_soup = get_soup(response=year_response)
-        year = get_collection_year(soup=year_soup)
-        if year:
-            collection.update_collection_year(year=year)
-        time.sleep(1)
+    # the crawl state is kept until the run completes, so an interrupted run
+    # resumes where it stopped; a run that does not crawl leaves it alone
+    checkpoint = (
+        None if arguments.from_catalog else CrawlCheckpoint(path=checkpoint_file_path)
+    )
+    catalog = Catalog(path=catalog_file_path)
+    parse_pool = (
+        ParsePool(processes=arguments.parse_processes)
+        if arguments.parse_processes
+        else None
+    )
+    cache = (
+        None
+        if arguments.no_cache
+        else HttpCache(path=cache_file_path, ttl=arguments.cache_ttl)
+    )
+    retry_policy = RetryPolicy()
+    circuit_breaker = CircuitBreaker()
+    # the destination folder is listed once instead of checking every PDF file
+    destination_index = DestinationIndex(destination_folder)
 
-    print(f"Number of pdf files to be downloaded: {len(all_collections)}")
+    collections: Iterable[CollectionPdf]
+    if arguments.from_catalog:
+        collections = catalog.get_not_downloaded()
+        print(
+            f"{len(collections)} pdf files not yet downloaded found in "
+            f"'{catalog_file_path}'."
+        )
+    else:
+        collections = crawl_collections(
+            starting_urls=starting_urls,
+            rate_limiter=rate_limiter,
+            get_request=session.get,
+            checkpoint=checkpoint,
+            catalog=catalog,
+            incremental=arguments.incremental,
+            parse_pool=parse_pool,
+            cache=cache,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+        )
+    if arguments.sort:
+        download_sorted_collections(
+            collections=collections,
+            details_workers=arguments.details_workers,
+            workers=arguments.workers,
+            rate_limiter=rate_limiter,
+            get_request=session.get,
+            checkpoint=checkpoint,
+            catalog=catalog,
+            parse_pool=parse_pool,
+            cache=cache,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            destination_index=destination_index,
+            layout=arguments.layout,
+            fsync=arguments.fsync,
+            collation=arguments.collation,
+            sort_run_size=arguments.sort_run_size,
+        )
+    else:
+        print("Updating pdf collections date of publication and downloading...")
+        process_collections(
+            collections=collections,
+            details_workers=arguments.details_workers,
+            workers=arguments.workers,
+            rate_limiter=rate_limiter,
+            get_request=session.get,
+            checkpoint=checkpoint,
+            catalog=catalog,
+            parse_pool=parse_pool,
+            cache=cache,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            destination_index=destination_index,
+            layout=arguments.layout,
+            fsync=arguments.fsync,
+        )
 
-    sorted_collections = sorted(all_collections, key=lambda x: (x.year, x.author))
+    if checkpoint is not None:
+        # a starting url whose crawl stopped early is resumed by the next run
+        if checkpoint.is_complete(starting_urls):
+            checkpoint.remove()
+        else:
+            checkpoint.close()
+            print(
+                "Not all the collections pages could be crawled. The next run "
+                f"resumes from '{checkpoint_file_path}'."
+            )
+    catalog.close()
+    if parse_pool:
+        parse_pool.close()
+    if cache:
+        cache.close()
 
-    print("Starting downloading...")
-    for collection in sorted_collections:
-        response = get_link_response(link=collection.pdf_link)
-        if not isinstance(response, requests.Response) or response.status_code != 200:
-            print(f"'{collection.title}' was not downloaded because of: {response} .")
-            continue
-        download_collection_pdf(
-            response=response,
-            pdf_name=collection.downloaded_file_name,
-            destination_folder=destination_folder,
+    connection_stats = get_connection_stats(session)
+    session.close()
+    print(
+        f"{connection_stats.requests} requests sent over "
+        f"{connection_stats.connections} connections "
+        f"({connection_stats.reused} reused)."
+    )
+    for failure_class, counters in retry_policy.counters.items():
+        print(
+            f"{failure_class}: {counters.retries} requests retried, "
+            f"{counters.gave_up} given up."
         )
-        time.sleep(2)
 
     print("dacoromanica_downloader finished.")
 
 
 if __name__ == "__main__":
-    main()  # pragma: no cover
+    main(sys.argv[1:])  # pragma: no cover
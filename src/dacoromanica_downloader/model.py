@@ -1,5 +1,15 @@
 from __future__ import annotations
 
+import sys
+from array import array
+from typing import Iterable, Iterator
+
+# Translation table removing the characters not allowed in file names on
+# Windows.
+FORBIDDEN_CHARACTERS_TABLE: dict[int, int | None] = str.maketrans(
+    "", "", "<>:'\"/\\|?*"
+)
+
 
 class CollectionPdf:
     """
@@ -9,6 +19,11 @@ class CollectionPdf:
     link to all details of the document (details_link), title, download link,
     author, and publication year.
 
+    The attributes are kept in slots instead of a per-instance `__dict__`, and
+    the author is interned, so the many collections of one author share a
+    single string. Large numbers of collections can be stored even more
+    compactly in a `CollectionPdfColumns`.
+
     Attributes:
         details_link (str): The URL to the details page of the collection item.
         title (str): The title of the collection item.
@@ -24,6 +39,15 @@ class CollectionPdf:
         file.
     """
 
+    __slots__ = (
+        "details_link",
+        "title",
+        "pdf_link",
+        "author",
+        "_year",
+        "_downloaded_file_name",
+    )
+
     def __init__(
         self,
         details_link: str,
@@ -34,7 +58,10 @@ class CollectionPdf:
     ):
         self.details_link = details_link
         self.title = title
-        self.author = author
+        # str() because bs4 extracts NavigableString objects, which cannot be
+        # interned
+        self.author = sys.intern(str(author)) if author else author
+        self._downloaded_file_name: str | None = None
         self.year = year
         self.pdf_link = pdf_link
 
@@ -47,6 +74,16 @@ class CollectionPdf:
     def __gt__(self, other: CollectionPdf) -> bool:
         return self.year > other.year
 
+    @property
+    def year(self) -> int:
+        """The publication year of the collection, or 0 if it is unknown."""
+        return self._year
+
+    @year.setter
+    def year(self, year: int) -> None:
+        self._year = year
+        self._downloaded_file_name = None
+
     def update_collection_year(
         self,
         year: str,
@@ -75,7 +112,16 @@ class CollectionPdf:
         characters not allowed in Windows file names. The file name is then
         constructed according to what collection details exist: author, title
         and year.
+
+        The name is computed once and kept until the year of the collection
+        changes.
         """
+        if self._downloaded_file_name is None:
+            self._downloaded_file_name = self._get_downloaded_file_name()
+
+        return self._downloaded_file_name
+
+    def _get_downloaded_file_name(self) -> str:
         title = self._remove_forbidden_charactes(name=self.title)
         author = self._remove_forbidden_charactes(name=self.author)
 
@@ -96,8 +142,8 @@ class CollectionPdf:
         This method filters out characters that are forbidden in file names due
         to operating system restrictions. The forbidden characters are: '<',
         '>', ':', ''', '"', '/', '\\', '|', '?', '*'.
-        The method uses Unicode code points to identify and remove these
-        characters.
+        The method removes them in a single pass with the precomputed
+        FORBIDDEN_CHARACTERS_TABLE translation table.
 
         Args:
             name (str): The string representing the file name to be sanitized.
@@ -105,12 +151,7 @@ class CollectionPdf:
         Returns:
             str: The sanitized file name with forbidden characters removed.
         """
-        res = ""
-        for character in name:
-            if ord(character) not in (60, 62, 58, 39, 34, 47, 92, 124, 63, 42):
-                res += character
-
-        return res
+        return name.translate(FORBIDDEN_CHARACTERS_TABLE)
 
     def _format_year(self, year_to_format: str) -> int:
         """
@@ -137,3 +178,61 @@ class CollectionPdf:
             return 0
 
         return res
+
+
+class CollectionPdfColumns:
+    """
+    Stores many collections column by column.
+
+    Every attribute of the collections is kept in its own column: the strings
+    in lists, the authors interned, and the years in an array of unsigned
+    16-bit integers. Storing a collection costs a few pointers and 2 bytes
+    instead of a CollectionPdf object, which matters when a whole catalog is
+    held in memory. The collections are built again when they are read.
+
+    Methods:
+        append: Adds a collection at the end of the columns.
+        extend: Adds collections at the end of the columns.
+        set_year: Updates the year of a stored collection.
+    """
+
+    def __init__(self, collections: Iterable[CollectionPdf] = ()) -> None:
+        self.details_links: list[str] = []
+        self.titles: list[str] = []
+        self.pdf_links: list[str] = []
+        self.authors: list[str] = []
+        self.years = array("H")
+        self.extend(collections)
+
+    def __len__(self) -> int:
+        return len(self.details_links)
+
+    def __getitem__(self, index: int) -> CollectionPdf:
+        return CollectionPdf(
+            details_link=self.details_links[index],
+            title=self.titles[index],
+            pdf_link=self.pdf_links[index],
+            author=self.authors[index],
+            year=self.years[index],
+        )
+
+    def __iter__(self) -> Iterator[CollectionPdf]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, collection: CollectionPdf) -> None:
+        """Adds a collection at the end of the columns."""
+        self.details_links.append(collection.details_link)
+        self.titles.append(collection.title)
+        self.pdf_links.append(collection.pdf_link)
+        self.authors.append(collection.author)
+        self.years.append(collection.year)
+
+    def extend(self, collections: Iterable[CollectionPdf]) -> None:
+        """Adds collections at the end of the columns."""
+        for collection in collections:
+            self.append(collection)
+
+    def set_year(self, index: int, year: int) -> None:
+        """Updates the year of the collection stored at the index."""
+        self.years[index] = year
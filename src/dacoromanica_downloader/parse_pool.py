@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import requests
+
+from dacoromanica_downloader.scrape import (
+    DETAILS_PAGE_STRAINER,
+    LISTING_PAGE_STRAINER,
+    ListingPage,
+    extract_with_fallback,
+    get_collection_year,
+    get_listing_page_data,
+)
+
+
+def get_response(content: bytes, content_type: str | None) -> requests.Response:
+    """
+    Rebuilds, in a worker process, the HTTP response of a page from its content
+    and its Content-Type header, which are all the parsers need.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    if content_type:
+        response.headers["Content-Type"] = content_type
+
+    return response
+
+
+def extract_listing_page(
+    content: bytes,
+    content_type: str | None,
+    collections_base_link_identifier: str,
+    next_page_link_identifier: str,
+) -> ListingPage | None:
+    """
+    Extracts the collections and the next page url of a collections page.
+
+    Args:
+        content (bytes): The content of the collections page.
+        content_type (str | None): The Content-Type header of the page.
+        collections_base_link_identifier (str): The name used to identify the
+        HTML unit that contains a collection.
+        next_page_link_identifier (str): The name used to identify the link to
+        the next page.
+
+    Returns:
+        ListingPage | None: The collections and the next page url, as returned
+        by `get_listing_page_data`, or None if no collection is found on the
+        page.
+    """
+
+    return extract_with_fallback(
+        response=get_response(content=content, content_type=content_type),
+        extract=partial(
+            get_listing_page_data,
+            collections_base_link_identifier=collections_base_link_identifier,
+            next_page_link_identifier=next_page_link_identifier,
+        ),
+        parse_only=LISTING_PAGE_STRAINER,
+    )
+
+
+def extract_collection_year(content: bytes, content_type: str | None) -> str | None:
+    """
+    Extracts the publication year of a collection from its details page.
+
+    Args:
+        content (bytes): The content of the details page.
+        content_type (str | None): The Content-Type header of the page.
+
+    Returns:
+        str | None: The publication year as a string if found, otherwise None.
+    """
+    year = extract_with_fallback(
+        response=get_response(content=content, content_type=content_type),
+        extract=get_collection_year,
+        parse_only=DETAILS_PAGE_STRAINER,
+    )
+
+    # a plain string is sent back, not one bound to the parsed page
+    return str(year) if year is not None else None
+
+
+class ParsePool:
+    """
+    Pool of worker processes parsing the collections and details pages.
+
+    Parsing a page is CPU-bound and holds the GIL, so the threads requesting
+    the pages can only parse them one at a time. A ParsePool sends the content
+    of the pages to worker processes, which parse them on their own cores and
+    send back only the extracted data.
+
+    The worker processes are started with the "spawn" method, since the pool is
+    used from the threads of the pipeline and forking a multithreaded process
+    is unsafe. A ParsePool is meant to be shared by the crawler and all the
+    details page workers.
+
+    Attributes:
+        processes (int): The number of worker processes.
+    """
+
+    def __init__(self, processes: int) -> None:
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def __enter__(self) -> ParsePool:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def get_listing_page(
+        self,
+        response: requests.Response,
+        collections_base_link_identifier: str,
+        next_page_link_identifier: str,
+    ) -> ListingPage | None:
+        """
+        Extracts the collections and the next page url of a collections page in
+        a worker process. See `extract_listing_page`.
+        """
+        future = self._executor.submit(
+            extract_listing_page,
+            response.content,
+            response.headers.get("content-type"),
+            collections_base_link_identifier,
+            next_page_link_identifier,
+        )
+
+        return future.result()
+
+    def get_collection_year(self, response: requests.Response) -> str | None:
+        """
+        Extracts the publication year of a collection from its details page in
+        a worker process. See `extract_collection_year`.
+        """
+        future = self._executor.submit(
+            extract_collection_year,
+            response.content,
+            response.headers.get("content-type"),
+        )
+
+        return future.result()
+
+    def close(self) -> None:
+        """Waits for the pages being parsed and stops the worker processes."""
+        self._executor.shutdown()
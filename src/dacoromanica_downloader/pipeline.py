@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+# Maximum number of items waiting between two stages of a pipeline.
+DEFAULT_QUEUE_SIZE: int = 100
+
+Stage = namedtuple("Stage", ["name", "handle", "workers"])
+StageStats = namedtuple("StageStats", ["name", "items", "seconds"])
+
+
+class _EndOfStream:
+    """Marks the end of the items put in a pipeline queue."""
+
+
+END_OF_STREAM = _EndOfStream()
+
+
+def run_pipeline(
+    items: Iterable,
+    stages: list[Stage],
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+) -> list[StageStats]:
+    """
+    Passes items through stages that run at the same time, each with its own
+    pool of worker threads.
+
+    The items are read from `items` in the calling thread and put in a bounded
+    queue read by the workers of the first stage. The value returned by a
+    stage's `handle` function is put in the queue of the next stage, unless it
+    is None, in which case the item is dropped. Because the queues are bounded,
+    a slow stage makes the stages before it wait instead of holding every item
+    in memory, and the first items reach the last stage while `items` is still
+    being read.
+
+    If a stage raises an exception, no new item is read or handled, the items
+    already queued are discarded and the exception is raised once all the
+    workers have stopped. The same happens if reading `items` raises an
+    exception, including KeyboardInterrupt.
+
+    Args:
+        items (Iterable): The items passed to the first stage. It can be a
+        generator that produces the items lazily.
+        stages (list[Stage]): The stages, in order. Each one is a named tuple
+        with the following attributes: 'name', 'handle' (a function taking an
+        item) and 'workers' (the number of threads running the stage).
+        queue_size (int): The maximum number of items waiting in the queue
+        before each stage. Defaults to DEFAULT_QUEUE_SIZE.
+
+    Returns:
+        list[StageStats]: For each stage, a named tuple with the following
+        attributes: 'name', 'items' (the number of items the stage handled) and
+        'seconds' (the time from the start of the pipeline until the stage
+        finished).
+    """
+    queues: list[queue.Queue] = [queue.Queue(maxsize=queue_size) for _ in stages]
+    failed = threading.Event()
+    handled_items = [0] * len(stages)
+    counters_lock = threading.Lock()
+    start = time.perf_counter()
+    stats: list[StageStats] = []
+
+    def work(stage_index: int) -> None:
+        handle = stages[stage_index].handle
+        input_queue = queues[stage_index]
+        is_last_stage = stage_index == len(stages) - 1
+        error: Exception | None = None
+        while (item := input_queue.get()) is not END_OF_STREAM:
+            if failed.is_set():
+                # keep reading the queue so that the stage before is not
+                # blocked on a full queue
+                continue
+            try:
+                result = handle(item)
+            except Exception as e:
+                error = e
+                failed.set()
+                continue
+            with counters_lock:
+                handled_items[stage_index] += 1
+            if result is not None and not is_last_stage:
+                queues[stage_index + 1].put(result)
+        if error:
+            raise error
+
+    with ThreadPoolExecutor(
+        max_workers=sum(stage.workers for stage in stages)
+    ) as executor:
+        futures = [
+            [executor.submit(work, stage_index) for _ in range(stage.workers)]
+            for stage_index, stage in enumerate(stages)
+        ]
+
+        errors: list[Exception] = []
+        try:
+            for item in items:
+                if failed.is_set():
+                    break
+                queues[0].put(item)
+        except BaseException:
+            # e.g. KeyboardInterrupt: the items already queued are discarded
+            failed.set()
+            raise
+        finally:
+            # the stages are stopped in order, so each one has handled all its
+            # items before the next one is told that no more items will come
+            for stage_index, stage in enumerate(stages):
+                for _ in range(stage.workers):
+                    queues[stage_index].put(END_OF_STREAM)
+                for future in futures[stage_index]:
+                    error = future.exception()
+                    if isinstance(error, Exception):
+                        errors.append(error)
+                stats.append(
+                    StageStats(
+                        name=stage.name,
+                        items=handled_items[stage_index],
+                        seconds=time.perf_counter() - start,
+                    )
+                )
+
+    if errors:
+        raise errors[0]
+
+    return stats
@@ -0,0 +1,138 @@
+import threading
+import time
+from typing import Callable
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens are added continuously at `rate` tokens per second, up to
+    `capacity` tokens. Taking tokens that are not available reserves them in
+    advance: the bucket goes into debt and the caller waits for the time the
+    bucket needs to refill. Because tokens accumulate while nothing is taken,
+    time spent waiting for a slow response counts against the next wait.
+
+    Attributes:
+        rate (float): The number of tokens added every second.
+        capacity (float): The maximum number of tokens the bucket holds.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, not {rate}.")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._last_update = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Takes tokens from the bucket, waiting until they are available.
+
+        Args:
+            tokens (float): The number of tokens to take. Defaults to 1.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last_update) * self.rate
+            )
+            self._last_update = now
+            self._tokens -= tokens
+            wait_time = max(0.0, -self._tokens / self.rate)
+
+        if wait_time:
+            self._sleep(wait_time)
+
+        return wait_time
+
+
+class RateLimiter:
+    """
+    Limits the requests and the downloaded bytes sent to every host.
+
+    Every host gets its own token buckets: one for the number of requests per
+    second and one for the number of bytes per second. A limit set to None is
+    not enforced. A single RateLimiter is meant to be shared by every caller of
+    `get_link_response`, including concurrent workers, so the politeness budget
+    applies to the whole application.
+
+    Attributes:
+        requests_per_second (float | None): The maximum number of requests per
+        second sent to a host.
+        bytes_per_second (float | None): The maximum number of bytes per second
+        downloaded from a host.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float | None = None,
+        bytes_per_second: float | None = None,
+    ) -> None:
+        self.requests_per_second = requests_per_second
+        self.bytes_per_second = bytes_per_second
+        self._request_buckets: dict[str, TokenBucket] = {}
+        self._byte_buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def wait_for_request(self, link: str) -> None:
+        """
+        Waits until a request can be sent to the host of the link.
+
+        Args:
+            link (str): The URL about to be requested.
+
+        Returns:
+            None: This method does not return any value.
+        """
+        if self.requests_per_second is None:
+            return
+        self._get_bucket(
+            self._request_buckets, link, self.requests_per_second, capacity=1
+        ).acquire()
+
+    def wait_for_bytes(self, link: str, number_of_bytes: int) -> None:
+        """
+        Accounts for bytes downloaded from the host of the link, waiting if the
+        host's bytes budget is exhausted.
+
+        Args:
+            link (str): The URL the bytes were downloaded from.
+            number_of_bytes (int): The number of bytes downloaded.
+
+        Returns:
+            None: This method does not return any value.
+        """
+        if self.bytes_per_second is None or not number_of_bytes:
+            return
+        self._get_bucket(
+            self._byte_buckets, link, self.bytes_per_second, capacity=None
+        ).acquire(number_of_bytes)
+
+    def _get_bucket(
+        self,
+        buckets: dict[str, TokenBucket],
+        link: str,
+        rate: float,
+        capacity: float | None,
+    ) -> TokenBucket:
+        host = urlsplit(link).netloc
+        with self._lock:
+            if host not in buckets:
+                buckets[host] = TokenBucket(rate=rate, capacity=capacity)
+
+            return buckets[host]
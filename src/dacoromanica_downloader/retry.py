@@ -0,0 +1,177 @@
+import random
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable
+
+import requests
+
+# Classes of the failures a request can end with.
+TIMEOUT: str = "timeout"
+CONNECTION_ERROR: str = "connection_error"
+SERVER_ERROR: str = "server_error"
+THROTTLED: str = "throttled"
+
+SERVER_ERROR_STATUS_CODES: frozenset[int] = frozenset({500, 502, 503, 504})
+THROTTLED_STATUS_CODES: frozenset[int] = frozenset({429})
+
+# Retry rule of a failure class: the maximum number of attempts of a request,
+# first one included, and the base and maximum number of seconds waited
+# before a retry.
+RetryRule = namedtuple("RetryRule", ["attempts", "base_delay", "max_delay"])
+
+DEFAULT_RETRY_RULES: dict[str, RetryRule] = {
+    TIMEOUT: RetryRule(attempts=3, base_delay=1, max_delay=30),
+    CONNECTION_ERROR: RetryRule(attempts=4, base_delay=1, max_delay=30),
+    SERVER_ERROR: RetryRule(attempts=4, base_delay=2, max_delay=60),
+    THROTTLED: RetryRule(attempts=5, base_delay=5, max_delay=120),
+}
+
+RetryCounters = namedtuple("RetryCounters", ["retries", "gave_up"])
+
+
+def get_failure_class(
+    outcome: requests.Response | requests.exceptions.RequestException,
+) -> str | None:
+    """
+    Gets the class of the failure a request ended with.
+
+    Args:
+        outcome (requests.Response | requests.exceptions.RequestException): The
+        response received, or the exception raised by the request.
+
+    Returns:
+        str | None: TIMEOUT, CONNECTION_ERROR, SERVER_ERROR or THROTTLED, or
+        None if the outcome is a success or a failure that a retry cannot fix
+        (e.g. a 404 response or an invalid URL).
+    """
+    if isinstance(outcome, requests.Response):
+        if outcome.status_code in THROTTLED_STATUS_CODES:
+            return THROTTLED
+        if outcome.status_code in SERVER_ERROR_STATUS_CODES:
+            return SERVER_ERROR
+        return None
+    # a connect timeout is both a timeout and a connection error
+    if isinstance(outcome, requests.exceptions.Timeout):
+        return TIMEOUT
+    if isinstance(outcome, requests.exceptions.ConnectionError):
+        return CONNECTION_ERROR
+
+    return None
+
+
+def get_retry_after(response: requests.Response) -> float | None:
+    """
+    Gets the number of seconds to wait before a retry from the Retry-After
+    header of a response, given as a number of seconds or as an HTTP date.
+
+    Returns:
+        float | None: The number of seconds, or None if the header is missing
+        or malformed.
+    """
+    retry_after = response.headers.get("retry-after")
+    if not retry_after:
+        return None
+    if retry_after.strip().isdigit():
+        return float(retry_after)
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (retry_date - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """
+    Decides whether, and after how long, a failed request is sent again.
+
+    Every failure class has its own RetryRule. The n-th retry (n starting at 0)
+    of a request waits a random number of seconds between 0 and
+    `min(max_delay, base_delay * 2 ** n)` ("full jitter"), so the workers that
+    failed together do not retry together. If the response holds a Retry-After
+    header, the number of seconds it asks for is waited instead, unless it is
+    longer than `max_delay`: the request is then given up.
+
+    The number of retries and of requests given up are counted for every
+    failure class. A RetryPolicy is meant to be shared by all the workers.
+
+    Attributes:
+        rules (dict[str, RetryRule]): The retry rule of every failure class. A
+        failure class without a rule is not retried.
+    """
+
+    def __init__(
+        self,
+        rules: dict[str, RetryRule] | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+        uniform: Callable[[float, float], float] = random.uniform,
+    ) -> None:
+        self.rules = DEFAULT_RETRY_RULES if rules is None else rules
+        self._sleep = sleep
+        self._uniform = uniform
+        self._retries: dict[str, int] = {}
+        self._gave_up: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_delay(
+        self,
+        outcome: requests.Response | requests.exceptions.RequestException,
+        attempt: int,
+    ) -> float | None:
+        """
+        Gets the number of seconds to wait before sending a request again.
+
+        Args:
+            outcome (requests.Response | requests.exceptions.RequestException):
+            The response received, or the exception raised by the request.
+            attempt (int): The number of the attempt that failed, starting at
+            0.
+
+        Returns:
+            float | None: The number of seconds to wait before the retry, or
+            None if the request must not be retried.
+        """
+        failure_class = get_failure_class(outcome)
+        if failure_class is None or failure_class not in self.rules:
+            return None
+        rule = self.rules[failure_class]
+        retry_after = (
+            get_retry_after(outcome) if isinstance(outcome, requests.Response) else None
+        )
+        if attempt + 1 >= rule.attempts or (
+            retry_after is not None and retry_after > rule.max_delay
+        ):
+            with self._lock:
+                self._gave_up[failure_class] = self._gave_up.get(failure_class, 0) + 1
+            return None
+        with self._lock:
+            self._retries[failure_class] = self._retries.get(failure_class, 0) + 1
+        if retry_after is not None:
+            return retry_after
+
+        return self._uniform(0, min(rule.max_delay, rule.base_delay * 2**attempt))
+
+    def wait(self, delay: float) -> None:
+        """Waits before a retry."""
+        self._sleep(delay)
+
+    @property
+    def counters(self) -> dict[str, RetryCounters]:
+        """
+        Gets the number of retries and of requests given up for every failure
+        class that occurred.
+        """
+        with self._lock:
+            failure_classes = sorted(set(self._retries) | set(self._gave_up))
+            return {
+                failure_class: RetryCounters(
+                    retries=self._retries.get(failure_class, 0),
+                    gave_up=self._gave_up.get(failure_class, 0),
+                )
+                for failure_class in failure_classes
+            }
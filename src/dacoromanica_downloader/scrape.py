@@ -1,31 +1,148 @@
 from collections import namedtuple
-from typing import Iterator
+from email.message import Message
+from typing import Callable, Iterator, TypeVar
 
 import requests
-from bs4 import BeautifulSoup
-
-
-def get_soup(response: requests.Response) -> BeautifulSoup:
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+# lxml is a C parser, much faster than the pure-Python html5lib. html5lib
+# follows the HTML5 parsing rules, like a browser, so it is kept as a fallback
+# for the pages lxml does not parse the way the extractors expect.
+DEFAULT_PARSER: str = "lxml"
+FALLBACK_PARSER: str = "html5lib"
+
+# Parse plans: each page type is parsed only into the elements its extractors
+# look at. The collections and the next page link of a listing page are found
+# in <tr> rows and <a> links, the table view link of a collections page is an
+# <a> link and the year of a details page is in a <tr> row.
+LISTING_PAGE_STRAINER: SoupStrainer = SoupStrainer(["a", "tr"])
+TABLE_VIEW_LINK_STRAINER: SoupStrainer = SoupStrainer("a")
+DETAILS_PAGE_STRAINER: SoupStrainer = SoupStrainer("tr")
+
+T = TypeVar("T")
+
+CollectionInfo = namedtuple(
+    "CollectionInfo", ["details_link", "title", "author", "pdf_link"]
+)
+ListingPage = namedtuple("ListingPage", ["collections", "next_page_url"])
+
+
+def get_soup(
+    response: requests.Response,
+    parser: str = DEFAULT_PARSER,
+    parse_only: SoupStrainer | None = None,
+) -> BeautifulSoup:
     """
     Parses the content of an HTTP response into a BeautifulSoup object.
 
     This function takes an HTTP response object and parses its content as HTML
-    using BeautifulSoup.
+    using BeautifulSoup. The bytes of the response are passed to the parser
+    as they are, with the charset declared in the Content-Type header of the
+    response, so no decoded copy of the page is made beforehand. If the header
+    declares no charset, the parser uses the charset declared by the page
+    itself (e.g. in its <meta charset> tag), or detects it.
 
     Args:
         response (requests.Response): The HTTP response object containing the
         content to be parsed.
+        parser (str): The name of the parser used by BeautifulSoup, e.g.
+        'lxml' or 'html5lib'. Defaults to DEFAULT_PARSER.
+        parse_only (SoupStrainer | None): The elements kept in the parsed tree,
+        with their content. Defaults to None, meaning the whole page is kept.
+        It is not supported by html5lib.
 
     Returns:
         BeautifulSoup : A BeautifulSoup object representing the parsed HTML
         content.
     """
 
-    soup = BeautifulSoup(response.content.decode("utf-8"), "html5lib")
+    soup = BeautifulSoup(
+        response.content,
+        parser,
+        parse_only=parse_only,
+        from_encoding=get_declared_charset(response),
+    )
 
     return soup
 
 
+def get_declared_charset(response: requests.Response) -> str | None:
+    """
+    Gets the charset declared in the Content-Type header of an HTTP response.
+
+    Unlike `response.encoding`, it does not default to ISO-8859-1 for the text
+    responses without a charset, so the charset declared by the page itself is
+    not overridden.
+
+    Args:
+        response (requests.Response): The HTTP response object.
+
+    Returns:
+        str | None: The declared charset, in lowercase, if found, otherwise
+        None.
+    """
+    content_type = response.headers.get("content-type")
+    if not content_type:
+        return None
+    message = Message()
+    message["content-type"] = content_type
+
+    return message.get_content_charset()
+
+
+def extract_with_fallback(
+    response: requests.Response,
+    extract: Callable[[BeautifulSoup], T | None],
+    parsers: tuple[str, ...] = (DEFAULT_PARSER, FALLBACK_PARSER),
+    parse_only: SoupStrainer | None = None,
+) -> T | None:
+    """
+    Extracts data from an HTTP response, parsing it again with the next parser
+    if the extraction fails.
+
+    The content of the response is parsed with the first parser and passed to
+    `extract`. If the extracted data is empty (e.g. None or an empty list) or
+    if `extract` raises an exception because the parsed page does not have the
+    expected structure, the content is parsed with the next parser. The
+    exception raised with the last parser is not caught.
+
+    Only the first parser uses the `parse_only` parse plan; the next parsers
+    parse the whole page, so a page whose data lies outside the elements of the
+    plan is still extracted.
+
+    Args:
+        response (requests.Response): The HTTP response object containing the
+        content to be parsed.
+        extract (callable): The function extracting data from the parsed
+        content.
+        parsers (tuple[str, ...]): The names of the parsers tried in order.
+        Defaults to DEFAULT_PARSER, then FALLBACK_PARSER.
+        parse_only (SoupStrainer | None): The parse plan of the first parser.
+        Defaults to None, meaning the whole page is parsed.
+
+    Returns:
+        The data extracted with the first parser for which it is not empty, or
+        the empty data extracted with the last parser.
+    """
+    result = None
+    for index, parser in enumerate(parsers):
+        try:
+            soup = get_soup(
+                response=response,
+                parser=parser,
+                parse_only=parse_only if index == 0 else None,
+            )
+            result = extract(soup)
+        except Exception:
+            if index == len(parsers) - 1:
+                raise
+            continue
+        if result:
+            return result
+
+    return result
+
+
 def get_next_page_url(
     soup: BeautifulSoup,
     next_page_link_identifier: str,
@@ -79,24 +196,117 @@ def get_collection_info(
         CollectionInfo (namedtuple): A named tuple with the following
         attributes: 'details_link', 'title', 'author', and 'pdf_link'.
     """
-    CollectionInfo = namedtuple(
-        "CollectionInfo", ["details_link", "title", "author", "pdf_link"]
-    )
     for link in soup.find_all("a"):
         if collections_base_link_identifier in str(link.get("href")):
-            details_link = link.get("href")
-            parent = link.parent.parent
-            alltd = parent.find_all("td")
-            title = alltd[2].string
-            if alltd[3].string:
-                author = alltd[3].string
-            else:
-                author = ""
-            pdf_link = alltd[6].find("a").get("href")
-
-            yield CollectionInfo(
-                details_link=details_link, title=title, author=author, pdf_link=pdf_link
-            )
+            yield get_collection_row_info(link)
+
+
+def get_collection_row_info(link: Tag) -> CollectionInfo:
+    """
+    Extracts information about a collection from the table row of its details
+    link.
+
+    Only the first 7 cells of the row are looked up, the cells after the PDF
+    link are never visited.
+
+    Args:
+        link (Tag): The details link of the collection.
+
+    Returns:
+        CollectionInfo (namedtuple): A named tuple with the following
+        attributes: 'details_link', 'title', 'author', and 'pdf_link'.
+
+    Raises:
+        ValueError: If the link is not in a table row.
+    """
+    details_link = link.get("href")
+    parent = link.parent.parent if link.parent else None
+    if parent is None:
+        raise ValueError(f"'{details_link}' link is not in a table row.")
+    alltd = parent.find_all("td", limit=7)
+    # the strings of the cells are copied, so the collection does not keep the
+    # whole parsed page alive
+    title = str(alltd[2].string) if alltd[2].string is not None else None
+    if alltd[3].string:
+        author = str(alltd[3].string)
+    else:
+        author = ""
+    pdf_link = alltd[6].find("a").get("href")
+
+    return CollectionInfo(
+        details_link=details_link, title=title, author=author, pdf_link=pdf_link
+    )
+
+
+def get_listing_page(
+    soup: BeautifulSoup,
+    collections_base_link_identifier: str,
+    next_page_link_identifier: str,
+) -> ListingPage:
+    """
+    Extracts the collections and the next page URL of a collections page in a
+    single pass over its links.
+
+    It returns the same data as `get_collection_info` and `get_next_page_url`
+    but the links of the page are scanned only once.
+
+    Args:
+        soup (BeautifulSoup): The BeautifulSoup object containing the parsed
+        HTML content.
+        collections_base_link_identifier (str): The name used to identify the
+        HTML unit that contains a collection.
+        next_page_link_identifier (str): The name used to identify the link to
+        the next page.
+
+    Returns:
+        ListingPage (namedtuple): A named tuple with the following attributes:
+        'collections' (a list of CollectionInfo) and 'next_page_url' (the URL of
+        the next page as a string if found, otherwise None).
+    """
+    collections = []
+    next_page_url = None
+    for link in soup.find_all("a"):
+        href = str(link.get("href"))
+        # two "next_page" links exists on the page; we need only the first one
+        if next_page_url is None and next_page_link_identifier in href:
+            next_page_url = href
+        if collections_base_link_identifier in href:
+            collections.append(get_collection_row_info(link))
+
+    return ListingPage(collections=collections, next_page_url=next_page_url)
+
+
+def get_listing_page_data(
+    soup: BeautifulSoup,
+    collections_base_link_identifier: str,
+    next_page_link_identifier: str,
+) -> ListingPage | None:
+    """
+    Extracts the collections and the next page URL of a collections page, to be
+    used with `extract_with_fallback`.
+
+    Args:
+        soup (BeautifulSoup): The BeautifulSoup object containing the parsed
+        HTML content of the collections page.
+        collections_base_link_identifier (str): The name used to identify the
+        HTML unit that contains a collection.
+        next_page_link_identifier (str): The name used to identify the link to
+        the next page.
+
+    Returns:
+        ListingPage | None: The collections and the next page URL, as returned
+        by `get_listing_page`, or None if no collection is found on the page,
+        so the page is parsed again with the next parser.
+    """
+    listing_page = get_listing_page(
+        soup=soup,
+        collections_base_link_identifier=collections_base_link_identifier,
+        next_page_link_identifier=next_page_link_identifier,
+    )
+    if not listing_page.collections:
+        return None
+
+    return listing_page
 
 
 def get_collection_year(soup: BeautifulSoup) -> str | None:
@@ -1,3 +1,4 @@
+import io
 import os
 from pathlib import Path
 from urllib.request import url2pathname
@@ -36,6 +37,9 @@ class LocalFileAdapter(requests.adapters.BaseAdapter):
         response = requests.Response()
 
         response.status_code, response.reason = self._chkpath(req.method, path)
+        # like a real adapter, always provide a body so the response can be
+        # read and closed whatever its status code is
+        response.raw = io.BytesIO(b"")
         if response.status_code == 200 and req.method.lower() != "head":
             try:
                 response.raw = open(path, "rb")
@@ -72,3 +76,16 @@ def get_path_to_test_file(test_file: str):
     file_link = f"file:///{str(test_file_path)}"
 
     yield file_link
+
+
+@pytest.fixture
+def get_html_response():
+    def get_response(content: bytes, **headers) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response._content = content
+        response.headers.update(headers)
+
+        return response
+
+    yield get_response
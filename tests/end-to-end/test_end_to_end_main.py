@@ -4,36 +4,47 @@ from pathlib import Path
 import pytest
 import requests
 
+from dacoromanica_downloader.download_pdf import get_link_response
 from dacoromanica_downloader.main import main
 
 
 def new_get_link_response(
-    link: str, get_request: requests.get
+    link: str, local_get_request: requests.get, get_request=None, **kwargs
 ) -> requests.Response | str:
     """
     Version of get_link_response() that works with local html files.
     Needed for making accessing local html files from relative paths work.
+    The get_request passed by main() (its HTTP session) is replaced by
+    local_get_request, which can access local files.
     """
     if "file:///" not in link:
         link_path = (
             Path(".").resolve() / "tests" / "test_data" / "test_data_main" / link
         )
         link = "file:///" + str(link_path)
-    try:
-        response = get_request(link, timeout=20)
-        return response
-    except requests.exceptions.HTTPError as e:
-        return f"HTTPError : {e}"
-    except requests.exceptions.ConnectionError as e:
-        return f"ConnectionError : {e}"
-    except requests.exceptions.Timeout as e:
-        return f"Timeout exception : {e}"
-    except requests.exceptions.RequestException as e:
-        return f"RequestException : {e}"
+
+    return get_link_response(link, get_request=local_get_request, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def state_files_in_tmp_path(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.checkpoint_file_path",
+        tmp_path / "crawl_checkpoint.jsonl",
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.catalog_file_path",
+        tmp_path / "catalog.sqlite3",
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.cache_file_path",
+        tmp_path / "http_cache.sqlite3",
+    )
 
 
 class TestMain:
     @pytest.mark.parametrize("test_file", ["test_data_main/collections_page1.html"])
+    @pytest.mark.parametrize("args", [[], ["--sort"], ["--parse-processes", "2"]])
     def test_main_end_to_end_happy_path(
         self,
         monkeypatch,
@@ -41,12 +52,13 @@ class TestMain:
         access_local_file_with_requests,
         tmp_path,
         capsys,
+        args,
     ):
         link = get_path_to_test_file
         test_get_link_response = partial(
             new_get_link_response,
             link=link,
-            get_request=access_local_file_with_requests,
+            local_get_request=access_local_file_with_requests,
         )
 
         monkeypatch.setattr(
@@ -89,7 +101,7 @@ class TestMain:
             "Author 6_Title 6_1700.pdf",
         ]
 
-        main()
+        main(args)
 
         out, _ = capsys.readouterr()
         for file in zip(files_to_be_downloaded, expected_downloaded_files):
@@ -108,10 +120,62 @@ class TestMain:
 
         assert "dacoromanica_downloader finished." in out
 
+        main(["--from-catalog"])
+
+        out, _ = capsys.readouterr()
+        assert "0 pdf files not yet downloaded found in" in out
+
+    @pytest.mark.parametrize("test_file", ["test_data_main/collections_page1.html"])
+    def test_main_second_run_is_served_from_cache(
+        self,
+        monkeypatch,
+        get_path_to_test_file,
+        access_local_file_with_requests,
+        tmp_path,
+    ):
+        link = get_path_to_test_file
+        requested_links = []
+
+        def local_get_request(link, **kwargs):
+            requested_links.append(link)
+            return access_local_file_with_requests(link, **kwargs)
+
+        monkeypatch.setattr(
+            "dacoromanica_downloader.main.get_link_response",
+            partial(
+                new_get_link_response, link=link, local_get_request=local_get_request
+            ),
+        )
+        monkeypatch.setattr("dacoromanica_downloader.main.starting_urls", [link])
+        monkeypatch.setattr(
+            "dacoromanica_downloader.main.next_page_link_identifier",
+            "table_view_collections",
+        )
+        monkeypatch.setattr(
+            "dacoromanica_downloader.main.collections_base_link_identifier",
+            "collection_details",
+        )
+        monkeypatch.setattr("dacoromanica_downloader.main.destination_folder", tmp_path)
+
+        main()
+        first_run_requests = len(requested_links)
+        assert not (tmp_path / "crawl_checkpoint.jsonl").exists()
+        requested_links.clear()
+        main()
+
+        # only the starting page and the first page of its table view, which
+        # hand out the Aleph session, are requested again
+        assert first_run_requests > 2
+        assert [Path(link).name for link in requested_links] == [
+            "collections_page1.html",
+            "table_view_collections1.html",
+        ]
+
     def test_main_starting_link_cannot_be_accessed(
         self,
         monkeypatch,
         capsys,
+        tmp_path,
     ):
         link = "link/"
         monkeypatch.setattr(
@@ -123,6 +187,27 @@ class TestMain:
 
         out, _ = capsys.readouterr()
         assert f"{link} could not be accessed" in out
+        # the next run crawls the starting link again
+        assert "The next run resumes from" in out
+        assert (tmp_path / "crawl_checkpoint.jsonl").is_file()
+
+    def test_main_from_catalog_does_not_touch_checkpoint(
+        self, monkeypatch, tmp_path, capsys
+    ):
+        # the crawl was killed while writing the last line
+        checkpoint_file = tmp_path / "crawl_checkpoint.jsonl"
+        checkpoint_content = (
+            '{"starting_url": "link", "collections": [], "next_page_url": "page_2"}\n'
+            '{"starting_url": "link", "collec'
+        )
+        checkpoint_file.write_text(checkpoint_content, encoding="utf_8")
+        monkeypatch.setattr("dacoromanica_downloader.main.destination_folder", tmp_path)
+
+        main(["--from-catalog"])
+
+        out, _ = capsys.readouterr()
+        assert checkpoint_file.read_text(encoding="utf_8") == checkpoint_content
+        assert "The next run resumes" not in out
 
     def test_main_starting_link_contains_no_table_view_link(self, monkeypatch, capsys):
         link = "https://link.com"
@@ -149,7 +234,7 @@ class TestMain:
         test_get_link_response = partial(
             new_get_link_response,
             link=link,
-            get_request=access_local_file_with_requests,
+            local_get_request=access_local_file_with_requests,
         )
 
         monkeypatch.setattr(
@@ -211,7 +296,7 @@ class TestMain:
         test_get_link_response = partial(
             new_get_link_response,
             link=link,
-            get_request=access_local_file_with_requests,
+            local_get_request=access_local_file_with_requests,
         )
 
         monkeypatch.setattr(
@@ -0,0 +1,62 @@
+import pytest
+
+from dacoromanica_downloader.aleph import get_session, remove_session, set_session
+
+SESSION_URL: str = (
+    "http://digitool.bibmet.ro:8881/R/U97DAL975VRP766A28CI4G8I6GRD1MDKHIJXI2V8"
+    "CVXQKV1TE7-06613?func=collections-result&collection_id=140939"
+)
+
+
+def test_get_session():
+    assert get_session(SESSION_URL) == (
+        "U97DAL975VRP766A28CI4G8I6GRD1MDKHIJXI2V8CVXQKV1TE7-06613"
+    )
+
+
+@pytest.mark.parametrize(
+    "url", ["http://example.com/R/report-2024", "table_view.html", "http://host/R"]
+)
+def test_get_session_returns_None_if_url_holds_no_session(url):
+    assert get_session(url) is None
+
+
+@pytest.mark.parametrize(
+    "url, expected_url",
+    [
+        (
+            SESSION_URL,
+            "http://digitool.bibmet.ro:8881/R?func=collections-result"
+            "&collection_id=140939",
+        ),
+        (
+            "http://host/R/AB12CD34-00042/?func=results-next-page",
+            "http://host/R/?func=results-next-page",
+        ),
+        ("http://example.com/R/report-2024", "http://example.com/R/report-2024"),
+        ("table_view.html?", "table_view.html?"),
+    ],
+)
+def test_remove_session(url, expected_url):
+    assert remove_session(url) == expected_url
+
+
+@pytest.mark.parametrize(
+    "url, session, expected_url",
+    [
+        (
+            "http://host/R/OLDSESSION-00001?func=results-next-page",
+            "NEWSESSION-00002",
+            "http://host/R/NEWSESSION-00002?func=results-next-page",
+        ),
+        (
+            "http://host/R/OLDSESSION-00001?func=results-next-page",
+            None,
+            "http://host/R/OLDSESSION-00001?func=results-next-page",
+        ),
+        ("http://example.com/R/report-2024", "NEWSESSION-00002", None),
+        ("table_view.html", "NEWSESSION-00002", None),
+    ],
+)
+def test_set_session(url, session, expected_url):
+    assert set_session(url, session) == (expected_url or url)
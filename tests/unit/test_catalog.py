@@ -0,0 +1,188 @@
+import sqlite3
+
+from dacoromanica_downloader.catalog import DOWNLOADED, FAILED, SCHEMA, Catalog
+from dacoromanica_downloader.model import CollectionPdf
+
+
+def get_collections(titles: list[str]) -> list[CollectionPdf]:
+    return [
+        CollectionPdf(
+            details_link=f"details_link_{i}",
+            title=title,
+            pdf_link=f"pdf_link_{i}",
+            author=f"author_{i}",
+        )
+        for i, title in enumerate(titles)
+    ]
+
+
+class TestCatalog:
+    def test_catalog_creates_indexes(self, tmp_path):
+        with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+            indexes = {
+                row[0]
+                for row in catalog._connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )
+            }
+
+        assert {
+            "collections_pdf_link",
+            "collections_year_author",
+            "collections_author",
+        } <= indexes
+
+    def test_catalog_upsert_keeps_year_and_status(self, tmp_path):
+        with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+            catalog.upsert_collections(get_collections(["title_0", "title_1"]))
+            catalog.update_year("details_link_0", 1900)
+            catalog.update_status("details_link_1", FAILED)
+
+            catalog.upsert_collections(get_collections(["new_title_0", "title_1"]))
+            collections = catalog.get_not_downloaded()
+
+        assert [c.details_link for c in collections] == [
+            "details_link_0",
+            "details_link_1",
+        ]
+        assert collections[0].title == "new_title_0"
+        assert collections[0].year == 1900
+
+    def test_catalog_keys_collections_without_aleph_session(self, tmp_path):
+        with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+            catalog.upsert_collections(
+                [
+                    CollectionPdf(
+                        details_link="http://host/R/OLD-00001?func=details&id=1",
+                        title="title",
+                        pdf_link="http://host/R/OLD-00001?func=pdf&id=1",
+                    )
+                ]
+            )
+            catalog.update_year("http://host/R/OLD-00001?func=details&id=1", 1900)
+            catalog.update_status("http://host/R/NEW-00002?func=details&id=1", FAILED)
+
+            catalog.upsert_collections(
+                [
+                    CollectionPdf(
+                        details_link="http://host/R/NEW-00002?func=details&id=1",
+                        title="title",
+                        pdf_link="http://host/R/NEW-00002?func=pdf&id=1",
+                    )
+                ]
+            )
+            rows = catalog._connection.execute(
+                "SELECT details_link, pdf_link, year, status FROM collections"
+            ).fetchall()
+
+            assert catalog.get_year("http://host/R/NEW-00002?func=details&id=1") == (
+                1900
+            )
+
+        assert rows == [
+            (
+                "http://host/R?func=details&id=1",
+                "http://host/R/NEW-00002?func=pdf&id=1",
+                1900,
+                FAILED,
+            )
+        ]
+
+    def test_catalog_removes_aleph_sessions_of_older_catalog(self, tmp_path):
+        path = tmp_path / "catalog.sqlite3"
+        with sqlite3.connect(path) as connection:
+            connection.executescript(SCHEMA)
+            connection.executemany(
+                "INSERT INTO collections (details_link, pdf_link, status)"
+                " VALUES (?, ?, ?)",
+                [
+                    ("http://host/R/OLD-00001?func=details&id=1", "pdf_1", DOWNLOADED),
+                    ("http://host/R/NEW-00002?func=details&id=1", "pdf_1", FAILED),
+                    ("http://host/R/OLD-00001?func=details&id=2", "pdf_2", FAILED),
+                ],
+            )
+        connection.close()
+
+        with Catalog(path=path) as catalog:
+            rows = catalog._connection.execute(
+                "SELECT details_link, status FROM collections ORDER BY rowid"
+            ).fetchall()
+
+        assert rows == [
+            ("http://host/R?func=details&id=1", DOWNLOADED),
+            ("http://host/R?func=details&id=2", FAILED),
+        ]
+
+    def test_catalog_get_year_of_collection_without_details(self, tmp_path):
+        with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+            catalog.upsert_collections(get_collections(["title_0"]))
+
+            assert catalog.get_year("details_link_0") is None
+            assert catalog.get_year("unknown_details_link") is None
+            catalog.update_year("details_link_0", 0)
+            assert catalog.get_year("details_link_0") == 0
+
+    def test_catalog_get_not_downloaded_is_persisted(self, tmp_path):
+        path = tmp_path / "catalog.sqlite3"
+        with Catalog(path=path) as catalog:
+            catalog.upsert_collections(get_collections(["a", "b", "c"]))
+            catalog.update_status(
+                "details_link_1", DOWNLOADED, size=10, checksum="checksum"
+            )
+
+        with Catalog(path=path) as catalog:
+            collections = catalog.get_not_downloaded()
+            row = catalog._connection.execute(
+                "SELECT status, size, checksum FROM collections"
+                " WHERE details_link = 'details_link_1'"
+            ).fetchone()
+
+        assert [c.title for c in collections] == ["a", "c"]
+        assert row == (DOWNLOADED, 10, "checksum")
+
+    def test_catalog_iter_collections_reads_all_collections(self, tmp_path):
+        with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+            catalog.upsert_collections(get_collections(["a", "b", "c"]))
+            catalog.update_year("details_link_2", 1900)
+            catalog.update_status("details_link_0", DOWNLOADED)
+
+            collections = list(catalog.iter_collections(batch_size=2))
+
+        assert [c.title for c in collections] == ["a", "b", "c"]
+        assert [c.year for c in collections] == [0, 0, 1900]
+
+    def test_catalog_update_status_keeps_known_size_and_checksum(self, tmp_path):
+        with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+            catalog.upsert_collections(get_collections(["a"]))
+            catalog.update_status(
+                "details_link_0", DOWNLOADED, size=10, checksum="checksum"
+            )
+            catalog.update_status("details_link_0", DOWNLOADED, size=10)
+            row = catalog._connection.execute(
+                "SELECT size, checksum FROM collections"
+            ).fetchone()
+
+        assert row == (10, "checksum")
+
+    def test_catalog_are_known(self, tmp_path):
+        with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+            catalog.upsert_collections(get_collections(["a", "b"]))
+
+            assert catalog.are_known(["details_link_0", "details_link_1"])
+            assert catalog.are_known(["details_link_1", "details_link_1"])
+            assert not catalog.are_known(["details_link_1", "details_link_2"])
+
+    def test_catalog_are_known_in_any_aleph_session(self, tmp_path):
+        with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+            catalog.upsert_collections(
+                [
+                    CollectionPdf(
+                        details_link="http://host/R/OLD-00001?func=details&id=1",
+                        title="title",
+                        pdf_link="pdf_link",
+                    )
+                ]
+            )
+
+            assert catalog.are_known(["http://host/R/NEW-00002?func=details&id=1"])
+            assert not catalog.are_known(["http://host/R/NEW-00002?func=details&id=2"])
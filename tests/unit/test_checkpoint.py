@@ -0,0 +1,119 @@
+from dacoromanica_downloader.checkpoint import CrawlCheckpoint
+from dacoromanica_downloader.model import CollectionPdf
+
+
+def get_collections(start: int, stop: int) -> list[CollectionPdf]:
+    return [
+        CollectionPdf(
+            details_link=f"details_link_{i}",
+            title=f"title_{i}",
+            pdf_link=f"pdf_link_{i}",
+            author=f"author_{i}",
+        )
+        for i in range(start, stop)
+    ]
+
+
+class TestCrawlCheckpoint:
+    def test_checkpoint_without_file_is_empty(self, tmp_path):
+        with CrawlCheckpoint(path=tmp_path / "checkpoint.jsonl") as checkpoint:
+            assert not checkpoint.has_starting_url("starting_url")
+            assert checkpoint.get_collections("starting_url") == []
+            assert not checkpoint.has_year("details_link_0")
+
+    def test_checkpoint_is_restored_from_file(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        with CrawlCheckpoint(path=path) as checkpoint:
+            checkpoint.add_page("starting_url", get_collections(0, 2), "page_2")
+            checkpoint.add_year("details_link_1", 1900)
+            checkpoint.add_page("starting_url", get_collections(2, 3), "page_3")
+
+        with CrawlCheckpoint(path=path) as checkpoint:
+            collections = checkpoint.get_collections("starting_url")
+
+            assert checkpoint.has_starting_url("starting_url")
+            assert checkpoint.get_next_page_url("starting_url") == "page_3"
+            assert [c.details_link for c in collections] == [
+                "details_link_0",
+                "details_link_1",
+                "details_link_2",
+            ]
+            assert collections[1].title == "title_1"
+            assert collections[1].author == "author_1"
+            assert collections[1].pdf_link == "pdf_link_1"
+            assert [c.year for c in collections] == [0, 1900, 0]
+            assert checkpoint.has_year("details_link_1")
+            assert not checkpoint.has_year("details_link_0")
+            assert checkpoint.get_year("details_link_1") == 1900
+            assert checkpoint.get_year("details_link_0") is None
+
+    def test_checkpoint_finds_years_of_any_aleph_session(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        with CrawlCheckpoint(path=path) as checkpoint:
+            checkpoint.add_year("http://host/R/OLD-00001?func=details&id=1", 1900)
+
+        with CrawlCheckpoint(path=path) as checkpoint:
+            assert checkpoint.has_year("http://host/R/NEW-00002?func=details&id=1")
+            assert (
+                checkpoint.get_year("http://host/R/NEW-00002?func=details&id=1") == 1900
+            )
+
+    def test_checkpoint_does_not_keep_added_collections_in_memory(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        with CrawlCheckpoint(path=path) as checkpoint:
+            checkpoint.add_page("starting_url", get_collections(0, 1), "page_2")
+        with CrawlCheckpoint(path=path) as checkpoint:
+            checkpoint.add_page("starting_url", get_collections(1, 2), "page_3")
+
+            collections = checkpoint.get_collections("starting_url")
+
+            assert [c.details_link for c in collections] == ["details_link_0"]
+            assert checkpoint.get_next_page_url("starting_url") == "page_3"
+
+    def test_checkpoint_records_last_page(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        with CrawlCheckpoint(path=path) as checkpoint:
+            checkpoint.add_page("starting_url", get_collections(0, 1), None)
+
+        with CrawlCheckpoint(path=path) as checkpoint:
+            assert checkpoint.has_starting_url("starting_url")
+            assert checkpoint.get_next_page_url("starting_url") is None
+
+    def test_checkpoint_is_complete_once_last_page_of_every_url_is_crawled(
+        self, tmp_path
+    ):
+        with CrawlCheckpoint(path=tmp_path / "checkpoint.jsonl") as checkpoint:
+            checkpoint.add_page("starting_url_1", get_collections(0, 1), None)
+            checkpoint.add_page("starting_url_2", get_collections(1, 2), "page_2")
+
+            assert checkpoint.is_complete(["starting_url_1"])
+            assert not checkpoint.is_complete(["starting_url_1", "starting_url_2"])
+            assert not checkpoint.is_complete(["starting_url_1", "starting_url_3"])
+
+            checkpoint.add_page("starting_url_2", get_collections(2, 3), None)
+
+            assert checkpoint.is_complete(["starting_url_1", "starting_url_2"])
+
+    def test_checkpoint_ignores_incomplete_last_line(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        with CrawlCheckpoint(path=path) as checkpoint:
+            checkpoint.add_year("details_link_0", 1900)
+        with open(path, "a", encoding="utf_8") as f:
+            f.write('{"details_link": "details_link_1", "ye')
+
+        with CrawlCheckpoint(path=path) as checkpoint:
+            checkpoint.add_year("details_link_2", 1902)
+
+        with CrawlCheckpoint(path=path) as checkpoint:
+            assert checkpoint.has_year("details_link_0")
+            assert not checkpoint.has_year("details_link_1")
+            assert checkpoint.has_year("details_link_2")
+
+    def test_checkpoint_remove_deletes_file(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        checkpoint = CrawlCheckpoint(path=path)
+        checkpoint.add_year("details_link_0", 1900)
+
+        checkpoint.remove()
+
+        assert not path.exists()
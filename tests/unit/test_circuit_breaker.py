@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+import requests
+
+from dacoromanica_downloader.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+LINK = "https://example.com/page"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def get_response(status_code: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+
+    return response
+
+
+def fail(circuit_breaker: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        circuit_breaker.record(LINK, requests.exceptions.ConnectTimeout())
+
+
+class TestCircuitBreaker:
+    def test_circuit_stays_closed_below_failure_threshold(self):
+        clock = FakeClock()
+        circuit_breaker = CircuitBreaker(failure_threshold=3, clock=clock)
+
+        fail(circuit_breaker, 2)
+        circuit_breaker.record(LINK, get_response(200))
+        fail(circuit_breaker, 2)
+        circuit_breaker.record(LINK, get_response(404))
+
+        circuit_breaker.before_request(LINK)
+
+    def test_circuit_opens_and_lets_a_probe_through_after_reset_timeout(self, capsys):
+        clock = FakeClock()
+        circuit_breaker = CircuitBreaker(
+            failure_threshold=3, reset_timeout=10, max_outage=60, clock=clock
+        )
+
+        fail(circuit_breaker, 3)
+        clock.now = 10
+        circuit_breaker.before_request(LINK)
+        circuit_breaker.record(LINK, get_response(200))
+        circuit_breaker.before_request(LINK)
+
+        out, _ = capsys.readouterr()
+        assert (
+            "Too many failed requests to 'example.com'. Pausing the requests for 10 s."
+            in out
+        )
+        assert "'example.com' is answering again. Resuming the requests." in out
+
+    def test_failed_probe_doubles_reset_timeout(self, capsys):
+        clock = FakeClock()
+        circuit_breaker = CircuitBreaker(
+            failure_threshold=1, reset_timeout=10, max_reset_timeout=15, clock=clock
+        )
+
+        fail(circuit_breaker, 1)
+        for clock.now in (10, 25):
+            circuit_breaker.before_request(LINK)
+            fail(circuit_breaker, 1)
+
+        out, _ = capsys.readouterr()
+        assert out.count("Pausing the requests for 15 s.") == 2
+
+    def test_requests_fail_fast_once_outage_exceeds_max_outage(self):
+        clock = FakeClock()
+        circuit_breaker = CircuitBreaker(
+            failure_threshold=1, reset_timeout=100, max_outage=50, clock=clock
+        )
+
+        fail(circuit_breaker, 1)
+        clock.now = 60
+
+        with pytest.raises(CircuitOpenError):
+            circuit_breaker.before_request(LINK)
+        circuit_breaker.before_request("https://other.example.com/page")
+
+    def test_waiting_requests_resume_when_probe_succeeds(self):
+        circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        fail(circuit_breaker, 1)
+
+        circuit_breaker.before_request(LINK)
+        waiting_request = threading.Thread(
+            target=circuit_breaker.before_request, args=(LINK,)
+        )
+        waiting_request.start()
+        waiting_request.join(0.2)
+        assert waiting_request.is_alive()
+
+        circuit_breaker.record(LINK, get_response(200))
+        waiting_request.join(1)
+        assert not waiting_request.is_alive()
+
+    def test_probe_without_outcome_reopens_circuit(self, capsys):
+        clock = FakeClock()
+        circuit_breaker = CircuitBreaker(
+            failure_threshold=1,
+            reset_timeout=10,
+            max_outage=50,
+            probe_timeout=60,
+            clock=clock,
+        )
+
+        fail(circuit_breaker, 1)
+        clock.now = 10
+        circuit_breaker.before_request(LINK)
+        clock.now = 90
+
+        with pytest.raises(CircuitOpenError):
+            circuit_breaker.before_request(LINK)
+        out, _ = capsys.readouterr()
+        assert "Pausing the requests for 20 s." in out
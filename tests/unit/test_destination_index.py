@@ -0,0 +1,62 @@
+import os
+
+from dacoromanica_downloader.destination_index import DestinationIndex
+
+
+class TestDestinationIndex:
+    def test_destination_index_lists_files_of_folder(self, tmp_path):
+        (tmp_path / "a.pdf").write_bytes(b"123")
+        (tmp_path / "b.pdf.part").write_bytes(b"12")
+        (tmp_path / "folder").mkdir()
+
+        destination_index = DestinationIndex(tmp_path)
+
+        assert len(destination_index) == 2
+        assert destination_index.contains(tmp_path / "a.pdf")
+        assert destination_index.get_size(tmp_path / "a.pdf") == 3
+        assert destination_index.get_size(tmp_path / "b.pdf.part") == 2
+        assert not destination_index.contains(tmp_path / "folder")
+        assert destination_index.get_size(tmp_path / "c.pdf") is None
+
+    def test_destination_index_lists_files_of_subfolders(self, tmp_path):
+        (tmp_path / "1900").mkdir()
+        (tmp_path / "1900" / "a.pdf").write_bytes(b"123")
+        (tmp_path / "b.pdf").write_bytes(b"12")
+
+        destination_index = DestinationIndex(tmp_path)
+
+        assert sorted(destination_index.get_names()) == ["1900/a.pdf", "b.pdf"]
+        assert destination_index.get_size(tmp_path / "1900" / "a.pdf") == 3
+        assert not destination_index.contains(tmp_path / "a.pdf")
+
+    def test_destination_index_reads_sizes_only_when_asked_for(
+        self, monkeypatch, tmp_path
+    ):
+        (tmp_path / "a.pdf").write_bytes(b"123")
+        (tmp_path / "b.pdf").write_bytes(b"12")
+        stat_calls = []
+
+        def stat(self, *args, **kwargs):
+            stat_calls.append(self.name)
+            return os.stat(self.path)
+
+        monkeypatch.setattr(os.DirEntry, "stat", stat, raising=False)
+
+        destination_index = DestinationIndex(tmp_path)
+
+        assert stat_calls == []
+        assert destination_index.get_size(tmp_path / "a.pdf") == 3
+
+    def test_destination_index_of_missing_folder_is_empty(self, tmp_path):
+        destination_index = DestinationIndex(tmp_path / "missing")
+
+        assert len(destination_index) == 0
+
+    def test_destination_index_records_added_and_removed_files(self, tmp_path):
+        destination_index = DestinationIndex(tmp_path)
+
+        destination_index.add(tmp_path / "a.pdf", 10)
+        assert destination_index.get_size(tmp_path / "a.pdf") == 10
+
+        destination_index.remove(tmp_path / "a.pdf")
+        assert not destination_index.contains(tmp_path / "a.pdf")
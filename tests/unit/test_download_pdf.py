@@ -1,13 +1,54 @@
+import hashlib
+import io
+import json
+import tracemalloc
 from pathlib import Path
 
 import pytest
 import requests
 
+from dacoromanica_downloader.circuit_breaker import CircuitBreaker
 from dacoromanica_downloader.download_pdf import (
+    FSYNC_ALL,
+    FSYNC_FILE,
+    FSYNC_NONE,
     PathTooLongError,
     get_link_response,
+    get_partial_file_path,
+    get_pdf_file_path,
+    get_resume_file_path,
+    get_resume_headers,
+    is_pdf_already_downloaded,
+    save_response_content,
     shorten_filename,
 )
+from dacoromanica_downloader.http_cache import HttpCache
+from dacoromanica_downloader.retry import RetryPolicy
+
+
+class SyntheticBody:
+    """File-like response body that generates `size` bytes on demand."""
+
+    def __init__(self, size: int) -> None:
+        self.remaining = size
+
+    def read(self, amt: int = -1, *args, **kwargs) -> bytes:
+        if amt < 0:
+            amt = self.remaining
+        amt = min(amt, self.remaining)
+        self.remaining -= amt
+        return b"\x00" * amt
+
+    def close(self) -> None:
+        pass
+
+
+def get_synthetic_response(size: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = SyntheticBody(size)
+
+    return response
 
 
 class TestShortenFilename:
@@ -142,3 +183,409 @@ class TestGetLinkResponse:
 
         assert isinstance(response, str)
         assert f"RequestException : {error_message}" in response
+
+    def test_get_link_response_stores_response_in_cache(self, tmp_path):
+        requested_links = []
+
+        def get_request(link, **kwargs):
+            requested_links.append(link)
+            response = requests.Response()
+            response.status_code = 200
+            response._content = b"content"
+            return response
+
+        with HttpCache(path=tmp_path / "http_cache.sqlite3") as cache:
+            first_response = get_link_response(
+                "http://example.com/", get_request=get_request, cache=cache
+            )
+            second_response = get_link_response(
+                "http://example.com/", get_request=get_request, cache=cache
+            )
+
+        assert requested_links == ["http://example.com/"]
+        assert first_response.content == second_response.content == b"content"
+
+    def test_get_link_response_revalidates_stale_cached_response(self, tmp_path):
+        received_kwargs = []
+
+        def get_request(link, **kwargs):
+            received_kwargs.append(kwargs)
+            response = requests.Response()
+            if "headers" in kwargs:
+                response.status_code = 304
+                response._content = b""
+            else:
+                response.status_code = 200
+                response._content = b"content"
+                response.headers["ETag"] = '"etag"'
+            return response
+
+        with HttpCache(path=tmp_path / "http_cache.sqlite3", ttl=0) as cache:
+            get_link_response(
+                "http://example.com/", get_request=get_request, cache=cache
+            )
+            response = get_link_response(
+                "http://example.com/", get_request=get_request, cache=cache
+            )
+
+        assert received_kwargs[1] == {
+            "timeout": 20,
+            "headers": {"If-None-Match": '"etag"'},
+        }
+        assert response.status_code == 200
+        assert response.content == b"content"
+
+    def test_get_link_response_does_not_cache_streamed_response(self, tmp_path):
+        def get_request(link, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            return response
+
+        with HttpCache(path=tmp_path / "http_cache.sqlite3") as cache:
+            get_link_response(
+                "http://example.com/", get_request=get_request, stream=True, cache=cache
+            )
+
+            assert cache.get("http://example.com/") is None
+
+    def test_get_link_response_retries_transient_failures(self):
+        outcomes = [
+            requests.exceptions.ConnectionError("Connection reset"),
+            503,
+            200,
+        ]
+        delays = []
+
+        def get_request(link, **kwargs):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            response = requests.Response()
+            response.status_code = outcome
+            response.raw = io.BytesIO(b"content")
+            return response
+
+        response = get_link_response(
+            "file_link",
+            get_request=get_request,
+            retry_policy=RetryPolicy(sleep=delays.append, uniform=lambda a, b: b),
+        )
+
+        assert response.status_code == 200
+        assert delays == [1, 4]
+
+    def test_get_link_response_returns_error_message_once_retries_exhausted(self):
+        def get_request(link, **kwargs):
+            raise requests.exceptions.ReadTimeout("a Timeout occurred")
+
+        retry_policy = RetryPolicy(sleep=lambda delay: None)
+        response = get_link_response(
+            "file_link", get_request=get_request, retry_policy=retry_policy
+        )
+
+        assert response == "Timeout exception : a Timeout occurred"
+        assert retry_policy.counters["timeout"].retries == 2
+        assert retry_policy.counters["timeout"].gave_up == 1
+
+    def test_get_link_response_stops_retrying_once_circuit_breaker_gives_up(self):
+        requested_links = []
+
+        def get_request(link, **kwargs):
+            requested_links.append(link)
+            raise requests.exceptions.ConnectionError("Connection refused")
+
+        response = get_link_response(
+            "http://example.com/",
+            get_request=get_request,
+            retry_policy=RetryPolicy(sleep=lambda delay: None),
+            circuit_breaker=CircuitBreaker(failure_threshold=2, max_outage=0),
+        )
+
+        assert response.startswith("RequestException : 'example.com'")
+        assert len(requested_links) == 2
+
+    def test_get_link_response_streams_response_when_stream_is_True(self):
+        file_link = "file_link"
+        received_kwargs = {}
+
+        def get_request(link, **kwargs):
+            received_kwargs.update(kwargs)
+            return requests.Response()
+
+        get_link_response(file_link, get_request=get_request, stream=True)
+
+        assert received_kwargs == {"timeout": 20, "stream": True}
+
+    def test_get_link_response_waits_for_rate_limiter(self):
+        file_link = "file_link"
+        calls = []
+
+        class TestRateLimiter:
+            def wait_for_request(self, link):
+                calls.append(("request", link))
+
+            def wait_for_bytes(self, link, number_of_bytes):
+                calls.append(("bytes", link, number_of_bytes))
+
+        def get_request(link, **kwargs):
+            calls.append(("get", link))
+            response = requests.Response()
+            response._content = b"content"
+            return response
+
+        get_link_response(
+            file_link, get_request=get_request, rate_limiter=TestRateLimiter()
+        )
+
+        assert calls == [
+            ("request", file_link),
+            ("get", file_link),
+            ("bytes", file_link, len(b"content")),
+        ]
+
+
+class TestSaveResponseContent:
+    def test_save_response_content_writes_whole_body(self, tmp_path):
+        size = 5 * 1024 + 3
+        response = get_synthetic_response(size)
+        filename = tmp_path / "test.pdf"
+
+        saved_file = save_response_content(response, filename, chunk_size=1024)
+
+        assert filename.read_bytes() == b"\x00" * size
+        assert saved_file.size == size
+        assert saved_file.checksum == hashlib.sha256(b"\x00" * size).hexdigest()
+
+    def test_save_response_content_peak_memory_does_not_depend_on_body_size(
+        self, tmp_path
+    ):
+        chunk_size = 64 * 1024
+        peak_memory = []
+        for size in (4 * chunk_size, 512 * chunk_size):
+            response = get_synthetic_response(size)
+            filename = tmp_path / f"test_{size}.pdf"
+
+            tracemalloc.start()
+            save_response_content(response, filename, chunk_size=chunk_size)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            assert filename.stat().st_size == size
+            peak_memory.append(peak)
+
+        # the body is 32 MB but never more than a few chunks are in memory
+        assert peak_memory[1] < 8 * chunk_size
+        assert peak_memory[1] < 2 * peak_memory[0]
+
+
+class TestAtomicWrite:
+    def test_pdf_file_does_not_exist_until_body_is_written(self, tmp_path):
+        filename = tmp_path / "test.pdf"
+        existing_during_write = []
+
+        class Body(io.BytesIO):
+            def read(self, *args, **kwargs):
+                existing_during_write.append(filename.exists())
+                return super().read(*args, **kwargs)
+
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = Body(b"PDF content")
+
+        save_response_content(response, filename, chunk_size=4)
+
+        assert existing_during_write and not any(existing_during_write)
+        assert filename.read_bytes() == b"PDF content"
+        assert list(tmp_path.iterdir()) == [filename]
+
+    @pytest.mark.parametrize(
+        "fsync, expected_fsyncs",
+        [(FSYNC_NONE, 0), (FSYNC_FILE, 1), (FSYNC_ALL, 2)],
+    )
+    def test_save_response_content_fsync_policy(
+        self, monkeypatch, tmp_path, fsync, expected_fsyncs
+    ):
+        fsyncs = []
+        monkeypatch.setattr(
+            "dacoromanica_downloader.download_pdf.os.fsync", fsyncs.append
+        )
+
+        save_response_content(
+            get_synthetic_response(10), tmp_path / "test.pdf", fsync=fsync
+        )
+
+        assert len(fsyncs) == expected_fsyncs
+
+
+class FailingBody(io.BytesIO):
+    """Response body whose transfer is interrupted after its content."""
+
+    def read(self, *args, **kwargs) -> bytes:
+        chunk = super().read(*args, **kwargs)
+        if not chunk:
+            raise requests.exceptions.ConnectionError("Connection reset")
+        return chunk
+
+
+def get_pdf_response(
+    body: io.BytesIO, status_code: int = 200, **headers
+) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = body
+    response.headers.update(headers)
+
+    return response
+
+
+class TestResumableDownload:
+    def test_interrupted_download_keeps_partial_file(self, tmp_path):
+        filename = tmp_path / "test.pdf"
+        response = get_pdf_response(FailingBody(b"PDF "), ETag='"v1"')
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            save_response_content(response, filename, chunk_size=2)
+
+        assert not filename.exists()
+        assert get_partial_file_path(filename).read_bytes() == b"PDF "
+        assert get_resume_headers(filename) == {
+            "Range": "bytes=4-",
+            "If-Range": '"v1"',
+        }
+
+    def test_partial_content_is_appended_to_partial_file(self, tmp_path):
+        filename = tmp_path / "test.pdf"
+        with pytest.raises(requests.exceptions.ConnectionError):
+            save_response_content(
+                get_pdf_response(FailingBody(b"PDF "), ETag='"v1"'), filename
+            )
+        response = get_pdf_response(
+            io.BytesIO(b"content"), 206, **{"Content-Range": "bytes 4-10/11"}
+        )
+
+        saved_file = save_response_content(response, filename)
+
+        assert filename.read_bytes() == b"PDF content"
+        assert saved_file.size == len(b"PDF content")
+        assert saved_file.checksum == hashlib.sha256(b"PDF content").hexdigest()
+        assert not get_partial_file_path(filename).exists()
+        assert get_resume_headers(filename) == {}
+
+    def test_whole_content_replaces_partial_file(self, tmp_path):
+        filename = tmp_path / "test.pdf"
+        get_partial_file_path(filename).write_bytes(b"old")
+
+        save_response_content(get_pdf_response(io.BytesIO(b"new PDF")), filename)
+
+        assert filename.read_bytes() == b"new PDF"
+
+    def test_partial_content_not_starting_at_end_of_partial_file(self, tmp_path):
+        filename = tmp_path / "test.pdf"
+        get_partial_file_path(filename).write_bytes(b"PDF ")
+        response = get_pdf_response(
+            io.BytesIO(b"content"), 206, **{"Content-Range": "bytes 2-8/9"}
+        )
+
+        with pytest.raises(requests.exceptions.RequestException):
+            save_response_content(response, filename)
+
+        assert not get_partial_file_path(filename).exists()
+
+    @pytest.mark.parametrize(
+        "headers",
+        [{"ETag": 'W/"weak"'}, {"ETag": '"v1"', "Content-Length": "4"}],
+    )
+    def test_get_resume_headers_discards_partial_file_that_cannot_be_resumed(
+        self, tmp_path, headers
+    ):
+        filename = tmp_path / "test.pdf"
+        with pytest.raises(requests.exceptions.ConnectionError):
+            save_response_content(
+                get_pdf_response(FailingBody(b"PDF "), **headers), filename
+            )
+
+        assert get_resume_headers(filename) == {}
+        assert not get_partial_file_path(filename).exists()
+
+    @pytest.mark.parametrize("length", ["four", ["4"]])
+    def test_get_resume_headers_discards_partial_file_with_malformed_length(
+        self, tmp_path, length
+    ):
+        filename = tmp_path / "test.pdf"
+        get_partial_file_path(filename).write_bytes(b"PDF ")
+        get_resume_file_path(filename).write_text(
+            json.dumps({"validator": '"v1"', "length": length}), encoding="utf_8"
+        )
+
+        assert get_resume_headers(filename) == {}
+        assert not get_partial_file_path(filename).exists()
+        assert not get_resume_file_path(filename).exists()
+
+    def test_get_resume_headers_uses_last_modified(self, tmp_path):
+        filename = tmp_path / "test.pdf"
+        with pytest.raises(requests.exceptions.ConnectionError):
+            save_response_content(
+                get_pdf_response(
+                    FailingBody(b"PDF "),
+                    **{"Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"},
+                ),
+                filename,
+            )
+
+        assert get_resume_headers(filename)["If-Range"] == (
+            "Wed, 21 Oct 2015 07:28:00 GMT"
+        )
+
+
+class TestGetPdfFilePath:
+    def test_get_pdf_file_path_returns_resolved_path(self, tmp_path):
+        pdf_name = "test_pdf_name.pdf"
+
+        res = get_pdf_file_path(pdf_name, destination_folder=tmp_path)
+
+        assert res == (tmp_path / pdf_name).resolve()
+
+    def test_get_pdf_file_path_shortens_name_that_is_over_limit(self, tmp_path):
+        pdf_name = "a" * 300 + ".pdf"
+
+        res = get_pdf_file_path(pdf_name, destination_folder=tmp_path)
+
+        assert len(str(res)) == 250
+        assert res.suffix == ".pdf"
+
+    def test_get_pdf_file_path_returns_None_if_name_cannot_be_shortened(
+        self, tmp_path, capsys
+    ):
+        res = get_pdf_file_path(
+            "a.pdf", destination_folder=tmp_path, path_length_limit=5
+        )
+
+        out, _ = capsys.readouterr()
+        assert res is None
+        assert "file name is too long and cannot be saved." in out
+
+
+class TestIsPdfAlreadyDownloaded:
+    def test_is_pdf_already_downloaded_returns_True_if_file_exists(
+        self, tmp_path, capsys
+    ):
+        filename = tmp_path / "test_pdf_name.pdf"
+        filename.write_bytes(b"Some content")
+
+        res = is_pdf_already_downloaded(filename, destination_folder=tmp_path)
+
+        out, _ = capsys.readouterr()
+        assert res is True
+        assert (
+            f"'test_pdf_name.pdf' already present in '{tmp_path}' folder"
+            " so it will not be downloaded."
+        ) in out
+
+    def test_is_pdf_already_downloaded_returns_False_if_file_does_not_exist(
+        self, tmp_path
+    ):
+        filename = tmp_path / "test_pdf_name.pdf"
+
+        res = is_pdf_already_downloaded(filename, destination_folder=tmp_path)
+
+        assert res is False
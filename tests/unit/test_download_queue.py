@@ -0,0 +1,92 @@
+import pytest
+
+from dacoromanica_downloader.download_queue import (
+    ROMANIAN_COLLATION,
+    SIMPLE_COLLATION,
+    DownloadQueue,
+    get_collation_key,
+)
+from dacoromanica_downloader.model import CollectionPdf
+
+AUTHORS = ["Zamfir", "Țară", "tudor", "Șerban", "Sadoveanu", "Ăsan", "Avram"]
+
+
+def get_collections(number_of_collections: int) -> list[CollectionPdf]:
+    return [
+        CollectionPdf(
+            details_link=f"details_link_{index}",
+            title=f"title_{index}",
+            pdf_link=f"pdf_link_{index}",
+            author=AUTHORS[index % len(AUTHORS)],
+            year=1900 + index % 3,
+        )
+        for index in range(number_of_collections)
+    ]
+
+
+@pytest.mark.parametrize(
+    "collation, expected_authors",
+    [
+        (
+            SIMPLE_COLLATION,
+            ["Ăsan", "Avram", "Sadoveanu", "Șerban", "Țară", "tudor", "Zamfir"],
+        ),
+        (
+            ROMANIAN_COLLATION,
+            ["Avram", "Ăsan", "Sadoveanu", "Șerban", "tudor", "Țară", "Zamfir"],
+        ),
+    ],
+)
+def test_get_collation_key(collation, expected_authors):
+    assert (
+        sorted(AUTHORS, key=lambda author: get_collation_key(author, collation))
+        == expected_authors
+    )
+
+
+def test_get_collation_key_sorts_cedilla_like_comma_below():
+    assert get_collation_key("Şerban", ROMANIAN_COLLATION) == get_collation_key(
+        "Șerban", ROMANIAN_COLLATION
+    )
+
+
+class TestDownloadQueue:
+    def test_download_queue_orders_collections_by_year_and_author(self):
+        collections = get_collections(3)
+        download_queue = DownloadQueue()
+        for collection in reversed(collections):
+            download_queue.add(collection)
+
+        assert len(download_queue) == 3
+        assert [repr(collection) for collection in download_queue] == [
+            repr(collection) for collection in collections
+        ]
+
+    @pytest.mark.parametrize("run_size", [1, 4, 100])
+    def test_download_queue_sorts_runs_on_disk(self, tmp_path, run_size):
+        collections = get_collections(50)
+        download_queue = DownloadQueue(
+            collation=ROMANIAN_COLLATION, run_size=run_size, directory=tmp_path
+        )
+        for collection in collections:
+            download_queue.add(collection)
+
+        sorted_collections = list(download_queue)
+
+        # equal keys keep the order in which the collections were added
+        expected_collections = sorted(
+            collections,
+            key=lambda x: (x.year, get_collation_key(x.author, ROMANIAN_COLLATION)),
+        )
+        assert [repr(collection) for collection in sorted_collections] == [
+            repr(collection) for collection in expected_collections
+        ]
+        assert list(tmp_path.iterdir()) == []
+
+    def test_download_queue_removes_run_files_when_closed(self, tmp_path):
+        with DownloadQueue(run_size=2, directory=tmp_path) as download_queue:
+            for collection in get_collections(5):
+                download_queue.add(collection)
+            assert list(tmp_path.iterdir()) != []
+
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,137 @@
+import pytest
+
+from dacoromanica_downloader.http_cache import (
+    HttpCache,
+    get_conditional_headers,
+    normalize_url,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize(
+    "url, expected_url",
+    [
+        ("HTTP://Example.COM:80", "http://example.com/"),
+        ("https://example.com:443/a?b=2&a=1#top", "https://example.com/a?a=1&b=2"),
+        ("http://example.com:8080/a?func=", "http://example.com:8080/a?func="),
+        (
+            "http://digitool.bibmet.ro:8881/R/U97DAL975VRP766A28CI4G8I6GRD1MDKHIJXI2V8"
+            "CVXQKV1TE7-06613?func=collections-result&collection_id=140939",
+            "http://digitool.bibmet.ro:8881/R?collection_id=140939"
+            "&func=collections-result",
+        ),
+        (
+            "http://digitool.bibmet.ro:8881/R/AB12CD34-00042/?func=results-next-page",
+            "http://digitool.bibmet.ro:8881/R/?func=results-next-page",
+        ),
+        ("http://example.com/R/report-2024", "http://example.com/R/report-2024"),
+    ],
+)
+def test_normalize_url(url, expected_url):
+    assert normalize_url(url) == expected_url
+
+
+class TestHttpCache:
+    def test_http_cache_shares_entry_between_aleph_sessions(
+        self, tmp_path, get_html_response
+    ):
+        with HttpCache(path=tmp_path / "http_cache.sqlite3") as cache:
+            cache.store(
+                "http://host/R/FIRSTSESSION-00001?func=results-next-page",
+                get_html_response(b"content"),
+            )
+
+            cached_response = cache.get(
+                "http://host/R/SECONDSESSION-00002?func=results-next-page"
+            )
+
+        assert cached_response.body == b"content"
+
+    def test_http_cache_discards_response_of_any_aleph_session(
+        self, tmp_path, get_html_response
+    ):
+        with HttpCache(path=tmp_path / "http_cache.sqlite3") as cache:
+            cache.store(
+                "http://host/R/FIRSTSESSION-00001?func=results-next-page",
+                get_html_response(b""),
+            )
+
+            cache.discard("http://host/R/SECONDSESSION-00002?func=results-next-page")
+
+            assert (
+                cache.get("http://host/R/FIRSTSESSION-00001?func=results-next-page")
+                is None
+            )
+
+    def test_http_cache_stores_response_with_validators(
+        self, tmp_path, get_html_response
+    ):
+        path = tmp_path / "http_cache.sqlite3"
+        with HttpCache(path=path) as cache:
+            cache.store(
+                "http://example.com/page?b=2&a=1",
+                get_html_response(
+                    b"content",
+                    **{
+                        "Content-Type": "text/html; charset=utf-8",
+                        "ETag": '"etag"',
+                        "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+                    },
+                ),
+            )
+
+        with HttpCache(path=path) as cache:
+            cached_response = cache.get("http://EXAMPLE.com/page?a=1&b=2")
+
+        assert cached_response.body == b"content"
+        assert cached_response.content_type == "text/html; charset=utf-8"
+        assert get_conditional_headers(cached_response) == {
+            "If-None-Match": '"etag"',
+            "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+        }
+
+    def test_http_cache_get_unknown_url(self, tmp_path):
+        with HttpCache(path=tmp_path / "http_cache.sqlite3") as cache:
+            assert cache.get("http://example.com/") is None
+
+    def test_http_cache_response_is_fresh_until_ttl(self, tmp_path, get_html_response):
+        clock = FakeClock()
+        with HttpCache(
+            path=tmp_path / "http_cache.sqlite3", ttl=60, clock=clock
+        ) as cache:
+            cache.store("http://example.com/", get_html_response(b"content"))
+            clock.now += 59
+            assert cache.is_fresh(cache.get("http://example.com/"))
+
+            clock.now += 1
+            cached_response = cache.get("http://example.com/")
+            assert not cache.is_fresh(cached_response)
+
+            cache.refresh(cached_response)
+            assert cache.is_fresh(cache.get("http://example.com/"))
+
+    def test_http_cache_evicts_least_recently_used_responses(
+        self, tmp_path, get_html_response
+    ):
+        clock = FakeClock()
+        with HttpCache(
+            path=tmp_path / "http_cache.sqlite3", max_size=20, clock=clock
+        ) as cache:
+            for page in ("a", "b"):
+                clock.now += 1
+                cache.store(f"http://example.com/{page}", get_html_response(b"x" * 8))
+            clock.now += 1
+            cache.get("http://example.com/a")
+            clock.now += 1
+            cache.store("http://example.com/c", get_html_response(b"x" * 8))
+
+            assert cache.get("http://example.com/a") is not None
+            assert cache.get("http://example.com/b") is None
+            assert cache.get("http://example.com/c") is not None
@@ -0,0 +1,71 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dacoromanica_downloader.http_session import (
+    PooledHTTPAdapter,
+    create_session,
+    get_connection_stats,
+)
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        body = b"Some content"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def local_server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    yield f"http://127.0.0.1:{server.server_port}"
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_create_session_mounts_pooled_adapter():
+    session = create_session(pool_connections=2, pool_maxsize=3)
+
+    for prefix in ("http://", "https://"):
+        adapter = session.get_adapter(prefix)
+        assert isinstance(adapter, PooledHTTPAdapter)
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 3
+        assert adapter._pool_block is True
+    assert "gzip" in session.headers["Accept-Encoding"]
+    assert session.headers["Connection"] == "keep-alive"
+
+
+def test_get_connection_stats_counts_reused_connections(local_server_url):
+    session = create_session()
+
+    for i in range(5):
+        response = session.get(f"{local_server_url}/page_{i}", timeout=5)
+        assert response.content == b"Some content"
+
+    stats = get_connection_stats(session)
+    session.close()
+
+    assert stats.requests == 5
+    assert stats.connections == 1
+    assert stats.reused == 4
+
+
+def test_get_connection_stats_of_unused_session():
+    stats = get_connection_stats(create_session())
+
+    assert stats.requests == 0
+    assert stats.connections == 0
+    assert stats.reused == 0
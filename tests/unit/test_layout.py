@@ -0,0 +1,107 @@
+import pytest
+
+from dacoromanica_downloader.destination_index import DestinationIndex
+from dacoromanica_downloader.layout import (
+    get_hash_shard,
+    get_shard,
+    migrate_destination_folder,
+)
+from dacoromanica_downloader.model import CollectionPdf
+
+
+def get_collection(author: str = "", year: int = 0) -> CollectionPdf:
+    return CollectionPdf(
+        details_link="details_link",
+        title="title",
+        pdf_link="pdf_link",
+        author=author,
+        year=year,
+    )
+
+
+@pytest.mark.parametrize(
+    "collection, layout, shard",
+    [
+        (get_collection("Eminescu", 1883), "flat", ""),
+        (get_collection("Eminescu", 1883), "year", "1883"),
+        (get_collection("Eminescu", 0), "year", "0000"),
+        (get_collection("ștefan", 1883), "author", "S"),
+        (get_collection("", 1883), "author", "_"),
+        (get_collection("[Anonim]", 1883), "author", "_"),
+    ],
+)
+def test_get_shard(collection, layout, shard):
+    assert get_shard(collection, layout) == shard
+
+
+def test_get_shard_of_hash_layout_depends_on_file_name():
+    collection = get_collection("Eminescu", 1883)
+    shard = get_shard(collection, "hash")
+
+    assert shard == get_hash_shard(collection.downloaded_file_name)
+    assert len(shard) == 2
+    assert all(character in "0123456789abcdef" for character in shard)
+
+
+class TestMigrateDestinationFolder:
+    def test_migrate_destination_folder_moves_pdf_files_of_collections(self, tmp_path):
+        collections = [get_collection("Eminescu", 1883), get_collection("Creangă")]
+        for collection in collections:
+            (tmp_path / collection.downloaded_file_name).write_bytes(b"PDF")
+        (tmp_path / "other.pdf").write_bytes(b"PDF")
+        (tmp_path / "other.pdf.part").write_bytes(b"PD")
+        destination_index = DestinationIndex(tmp_path)
+
+        stats = migrate_destination_folder(destination_index, "year", collections)
+
+        assert stats == (2, 1)
+        for shard, collection in zip(["1883", "0000"], collections):
+            filename = tmp_path / shard / collection.downloaded_file_name
+            assert filename.read_bytes() == b"PDF"
+            assert destination_index.get_size(filename) == 3
+            assert not (tmp_path / collection.downloaded_file_name).exists()
+        assert (tmp_path / "other.pdf").exists()
+        assert (tmp_path / "other.pdf.part").exists()
+
+    def test_migrate_destination_folder_moves_all_pdf_files_to_hash_layout(
+        self, tmp_path
+    ):
+        (tmp_path / "other.pdf").write_bytes(b"PDF")
+        destination_index = DestinationIndex(tmp_path)
+
+        stats = migrate_destination_folder(destination_index, "hash", [])
+
+        filename = tmp_path / get_hash_shard("other.pdf") / "other.pdf"
+        assert stats == (1, 0)
+        assert filename.read_bytes() == b"PDF"
+        assert destination_index.get_names() == [
+            f"{get_hash_shard('other.pdf')}/other.pdf"
+        ]
+
+    def test_migrate_destination_folder_keeps_pdf_file_whose_name_may_be_shortened(
+        self, tmp_path
+    ):
+        # the path fits the length limit in the destination folder, but not
+        # in its shard
+        name = "a" * (249 - len(str(tmp_path)) - len("/.pdf")) + ".pdf"
+        (tmp_path / name).write_bytes(b"PDF")
+        destination_index = DestinationIndex(tmp_path)
+
+        stats = migrate_destination_folder(destination_index, "hash", [])
+
+        assert stats == (0, 1)
+        assert (tmp_path / name).exists()
+
+    def test_migrate_destination_folder_keeps_existing_pdf_file(self, tmp_path):
+        collection = get_collection("Eminescu", 1883)
+        (tmp_path / collection.downloaded_file_name).write_bytes(b"flat")
+        (tmp_path / "1883").mkdir()
+        (tmp_path / "1883" / collection.downloaded_file_name).write_bytes(b"shard")
+        destination_index = DestinationIndex(tmp_path)
+
+        stats = migrate_destination_folder(destination_index, "year", [collection])
+
+        assert stats == (0, 1)
+        assert (tmp_path / "1883" / collection.downloaded_file_name).read_bytes() == (
+            b"shard"
+        )
@@ -1,7 +1,29 @@
+import hashlib
+import io
+import threading
+import time
 from collections import namedtuple
 
-from dacoromanica_downloader.main import create_CollectionPdf
+import pytest
+import requests
+
+from dacoromanica_downloader.aleph import remove_session
+from dacoromanica_downloader.catalog import DOWNLOADED, FAILED, Catalog
+from dacoromanica_downloader.checkpoint import CrawlCheckpoint
+from dacoromanica_downloader.destination_index import DestinationIndex
+from dacoromanica_downloader.download_queue import DEFAULT_SORT_RUN_SIZE
+from dacoromanica_downloader.http_cache import DEFAULT_CACHE_TTL, HttpCache
+from dacoromanica_downloader.main import (
+    crawl_collections,
+    create_CollectionPdf,
+    download_collection,
+    download_collections,
+    parse_arguments,
+    process_collections,
+    update_collection_year,
+)
 from dacoromanica_downloader.model import CollectionPdf
+from dacoromanica_downloader.scrape import CollectionInfo, ListingPage
 
 
 def test_create_CollectionPdf():
@@ -31,3 +53,1148 @@ def test_create_CollectionPdf():
     assert res[1].title == "title_2"
     assert res[1].author == "author_2"
     assert res[1].pdf_link == "pdf_link_2"
+
+
+def test_download_collection_does_not_request_pdf_that_is_already_downloaded(
+    monkeypatch, tmp_path, capsys
+):
+    collection = CollectionPdf(
+        details_link="details_link", title="title", pdf_link="pdf_link", year=1900
+    )
+    (tmp_path / collection.downloaded_file_name).write_bytes(b"Some content")
+    requested_links = []
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr("dacoromanica_downloader.main.destination_folder", tmp_path)
+
+    download_collection(collection)
+
+    out, _ = capsys.readouterr()
+    assert requested_links == []
+    assert (
+        f"'{collection.downloaded_file_name}' already present in '{tmp_path}' folder"
+        " so it will not be downloaded."
+    ) in out
+
+
+def test_download_collection_does_not_request_pdf_if_name_cannot_be_shortened(
+    monkeypatch, tmp_path
+):
+    collection = CollectionPdf(
+        details_link="details_link", title="a" * 300, pdf_link="pdf_link"
+    )
+    requested_links = []
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.destination_folder", tmp_path / ("h" * 250)
+    )
+
+    download_collection(collection)
+
+    assert requested_links == []
+
+
+def test_download_collection_records_status_in_catalog(monkeypatch, tmp_path):
+    collections = [
+        CollectionPdf(
+            details_link=f"details_link_{i}", title=f"title_{i}", pdf_link=f"link_{i}"
+        )
+        for i in range(3)
+    ]
+    (tmp_path / collections[0].downloaded_file_name).write_bytes(b"Some content")
+    ok_response = requests.Response()
+    ok_response.status_code = 200
+    ok_response.raw = io.BytesIO(b"PDF content")
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response",
+        lambda link, **kwargs: (
+            ok_response if link == "link_1" else "ConnectionError : error"
+        ),
+    )
+    monkeypatch.setattr("dacoromanica_downloader.main.destination_folder", tmp_path)
+
+    with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+        catalog.upsert_collections(collections)
+        for collection in collections:
+            download_collection(collection, catalog=catalog)
+        rows = catalog._connection.execute(
+            "SELECT details_link, status, size, checksum FROM collections"
+            " ORDER BY details_link"
+        ).fetchall()
+
+    assert rows == [
+        ("details_link_0", DOWNLOADED, len(b"Some content"), None),
+        (
+            "details_link_1",
+            DOWNLOADED,
+            len(b"PDF content"),
+            hashlib.sha256(b"PDF content").hexdigest(),
+        ),
+        ("details_link_2", FAILED, None, None),
+    ]
+
+
+def test_download_collection_checks_presence_in_destination_index(
+    monkeypatch, tmp_path
+):
+    collections = [
+        CollectionPdf(
+            details_link=f"details_link_{i}", title=f"title_{i}", pdf_link=f"link_{i}"
+        )
+        for i in range(2)
+    ]
+    (tmp_path / collections[0].downloaded_file_name).write_bytes(b"Some content")
+    destination_index = DestinationIndex(tmp_path)
+    requested_links = []
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b"PDF content")
+        return response
+
+    def exists(self):
+        raise AssertionError("the file system should not be checked")
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr("dacoromanica_downloader.main.destination_folder", tmp_path)
+    monkeypatch.setattr("pathlib.Path.exists", exists)
+
+    for collection in collections + collections:
+        download_collection(collection, destination_index=destination_index)
+
+    assert requested_links == ["link_1"]
+    assert destination_index.get_size(
+        tmp_path / collections[1].downloaded_file_name
+    ) == len(b"PDF content")
+
+
+def test_download_collection_uses_index_of_empty_destination_folder(
+    monkeypatch, tmp_path
+):
+    collection = CollectionPdf(
+        details_link="details_link", title="title", pdf_link="pdf_link"
+    )
+    destination_index = DestinationIndex(tmp_path)
+    requested_links = []
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b"PDF content")
+        return response
+
+    def exists(self):
+        raise AssertionError("the file system should not be checked")
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr("dacoromanica_downloader.main.destination_folder", tmp_path)
+    monkeypatch.setattr("pathlib.Path.exists", exists)
+
+    assert len(destination_index) == 0
+    for _ in range(2):
+        download_collection(collection, destination_index=destination_index)
+
+    assert requested_links == ["pdf_link"]
+    assert destination_index.get_size(
+        tmp_path / collection.downloaded_file_name
+    ) == len(b"PDF content")
+
+
+def test_download_collection_saves_pdf_in_shard_of_layout(monkeypatch, tmp_path):
+    collection = CollectionPdf(
+        details_link="details_link",
+        title="title",
+        pdf_link="pdf_link",
+        author="author",
+        year=1900,
+    )
+    destination_index = DestinationIndex(tmp_path)
+    requested_links = []
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b"PDF content")
+        return response
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr("dacoromanica_downloader.main.destination_folder", tmp_path)
+
+    for _ in range(2):
+        download_collection(
+            collection, destination_index=destination_index, layout="year"
+        )
+
+    filename = tmp_path / "1900" / collection.downloaded_file_name
+    assert requested_links == ["pdf_link"]
+    assert filename.read_bytes() == b"PDF content"
+    assert destination_index.contains(filename)
+    assert not (tmp_path / collection.downloaded_file_name).exists()
+
+
+def test_download_collection_requests_whole_pdf_if_range_not_satisfiable(
+    monkeypatch, tmp_path
+):
+    collection = CollectionPdf(
+        details_link="details_link", title="title", pdf_link="pdf_link"
+    )
+    filename = tmp_path / collection.downloaded_file_name
+    # a complete partial file, whose length was not sent by the server
+    filename.with_suffix(".part").write_bytes(b"PDF content")
+    filename.with_suffix(".resume").write_text(
+        '{"validator": "\\"v1\\"", "length": null}', encoding="utf_8"
+    )
+    not_satisfiable_response = requests.Response()
+    not_satisfiable_response.status_code = 416
+    not_satisfiable_response.raw = io.BytesIO(b"")
+    ok_response = requests.Response()
+    ok_response.status_code = 200
+    ok_response.raw = io.BytesIO(b"PDF content")
+    responses = [not_satisfiable_response, ok_response]
+    received_headers = []
+
+    def get_link_response(link, headers=None, **kwargs):
+        received_headers.append(headers)
+        return responses.pop(0)
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr("dacoromanica_downloader.main.destination_folder", tmp_path)
+
+    download_collection(collection)
+
+    assert received_headers == [
+        {"Accept-Encoding": "identity", "Range": "bytes=11-", "If-Range": '"v1"'},
+        {"Accept-Encoding": "identity"},
+    ]
+    assert filename.read_bytes() == b"PDF content"
+    assert not filename.with_suffix(".part").exists()
+
+
+def test_download_collection_resumes_interrupted_download(monkeypatch, tmp_path):
+    collection = CollectionPdf(
+        details_link="details_link", title="title", pdf_link="pdf_link"
+    )
+
+    class FailingBody(io.BytesIO):
+        def read(self, *args, **kwargs):
+            chunk = super().read(*args, **kwargs)
+            if not chunk:
+                raise requests.exceptions.ChunkedEncodingError("Connection reset")
+            return chunk
+
+    interrupted_response = requests.Response()
+    interrupted_response.status_code = 200
+    interrupted_response.headers["ETag"] = '"v1"'
+    interrupted_response.raw = FailingBody(b"PDF ")
+    partial_response = requests.Response()
+    partial_response.status_code = 206
+    partial_response.headers["Content-Range"] = "bytes 4-10/11"
+    partial_response.raw = io.BytesIO(b"content")
+    responses = [interrupted_response, partial_response]
+    received_headers = []
+
+    def get_link_response(link, headers=None, **kwargs):
+        received_headers.append(headers)
+        return responses.pop(0)
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr("dacoromanica_downloader.main.destination_folder", tmp_path)
+
+    with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+        catalog.upsert_collections([collection])
+        download_collection(collection, catalog=catalog)
+        first_status = catalog._connection.execute(
+            "SELECT status FROM collections"
+        ).fetchone()
+        download_collection(collection, catalog=catalog)
+        second_status = catalog._connection.execute(
+            "SELECT status, size FROM collections"
+        ).fetchone()
+
+    assert received_headers == [
+        {"Accept-Encoding": "identity"},
+        {"Accept-Encoding": "identity", "Range": "bytes=4-", "If-Range": '"v1"'},
+    ]
+    assert first_status == (FAILED,)
+    assert second_status == (DOWNLOADED, len(b"PDF content"))
+    assert (tmp_path / collection.downloaded_file_name).read_bytes() == b"PDF content"
+
+
+def test_update_collection_year_does_not_request_year_in_catalog(monkeypatch, tmp_path):
+    collection = CollectionPdf(
+        details_link="details_link", title="title", pdf_link="pdf_link"
+    )
+    requested_links = []
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+
+    with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+        catalog.upsert_collections([collection])
+        catalog.update_year("details_link", 1900)
+
+        assert update_collection_year(collection, catalog=catalog)
+
+    assert requested_links == []
+    assert collection.year == 1900
+
+
+def test_update_collection_year_parses_details_page_with_parse_pool(monkeypatch):
+    collection = CollectionPdf(
+        details_link="details_link", title="title", pdf_link="pdf_link"
+    )
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b"details page"
+    parsed_responses = []
+
+    class FakeParsePool:
+        def get_collection_year(self, response):
+            parsed_responses.append(response)
+            return "1900"
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response",
+        lambda link, **kwargs: response,
+    )
+
+    assert update_collection_year(collection, parse_pool=FakeParsePool())
+
+    assert parsed_responses == [response]
+    assert collection.year == 1900
+
+
+class TestDownloadCollections:
+    def test_download_collections_starts_downloads_in_order(self, monkeypatch):
+        collections = [
+            CollectionPdf(
+                details_link=f"details_link_{i}", title=f"title_{i}", pdf_link="link"
+            )
+            for i in range(10)
+        ]
+        started = []
+
+        monkeypatch.setattr(
+            "dacoromanica_downloader.main.download_collection",
+            lambda collection, **kwargs: started.append(collection),
+        )
+
+        download_collections(collections, workers=1)
+
+        assert started == collections
+
+    def test_download_collections_does_not_download_same_file_twice_at_once(
+        self, monkeypatch, tmp_path
+    ):
+        collections = [
+            CollectionPdf(
+                details_link=f"details_link_{i}",
+                title="Opere",
+                pdf_link=f"link_{i}",
+                author="Eminescu",
+                year=1900,
+            )
+            for i in range(2)
+        ]
+        requested_links = []
+
+        def get_link_response(link, **kwargs):
+            requested_links.append(link)
+            # both workers would be downloading at the same time
+            time.sleep(0.2)
+            response = requests.Response()
+            response.status_code = 200
+            response.raw = io.BytesIO(b"PDF content")
+            return response
+
+        monkeypatch.setattr(
+            "dacoromanica_downloader.main.get_link_response", get_link_response
+        )
+        monkeypatch.setattr("dacoromanica_downloader.main.destination_folder", tmp_path)
+
+        download_collections(collections, workers=2)
+
+        assert len(requested_links) == 1
+        assert (tmp_path / "Eminescu_Opere_1900.pdf").read_bytes() == b"PDF content"
+
+    def test_download_collections_records_failure_to_save_pdf(
+        self, monkeypatch, tmp_path
+    ):
+        collection = CollectionPdf(
+            details_link="details_link", title="title", pdf_link="link"
+        )
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b"PDF content")
+
+        def save_pdf(**kwargs):
+            raise FileNotFoundError("No such file or directory")
+
+        monkeypatch.setattr(
+            "dacoromanica_downloader.main.get_link_response",
+            lambda link, **kwargs: response,
+        )
+        monkeypatch.setattr("dacoromanica_downloader.main.save_pdf", save_pdf)
+        monkeypatch.setattr("dacoromanica_downloader.main.destination_folder", tmp_path)
+
+        with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+            catalog.upsert_collections([collection])
+            download_collections([collection], catalog=catalog)
+            row = catalog._connection.execute(
+                "SELECT status FROM collections"
+            ).fetchone()
+
+        assert row == (FAILED,)
+
+    def test_download_collections_runs_at_most_workers_downloads_at_once(
+        self, monkeypatch
+    ):
+        collections = [
+            CollectionPdf(
+                details_link=f"details_link_{i}", title=f"title_{i}", pdf_link="link"
+            )
+            for i in range(12)
+        ]
+        lock = threading.Lock()
+        running = []
+        max_running = []
+        downloaded = []
+
+        def download_collection(collection, **kwargs):
+            with lock:
+                running.append(collection)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(collection)
+                downloaded.append(collection)
+
+        monkeypatch.setattr(
+            "dacoromanica_downloader.main.download_collection", download_collection
+        )
+
+        download_collections(collections, workers=4)
+
+        assert sorted(downloaded, key=lambda x: x.details_link) == sorted(
+            collections, key=lambda x: x.details_link
+        )
+        assert max(max_running) == 4
+
+
+def test_crawl_collections_resumes_from_checkpoint(monkeypatch, tmp_path):
+    # the checkpoint was written during the session of an interrupted run
+    with CrawlCheckpoint(path=tmp_path / "checkpoint.jsonl") as checkpoint:
+        checkpoint.add_page(
+            starting_url="starting_url",
+            collections=[
+                CollectionPdf(
+                    details_link="http://host/R/OLD-00001?func=details&id=1",
+                    title="title_1",
+                    pdf_link="http://host/R/OLD-00001?func=pdf&id=1",
+                )
+            ],
+            next_page_url="http://host/R/OLD-00001?func=page-2",
+        )
+    requested_links = []
+    page_response = requests.Response()
+    page_response.status_code = 200
+    page_response._content = b"<html></html>"
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+        return page_response
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_for_table_view",
+        lambda soup: "http://host/R/LIVE-00002?func=table-view",
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_listing_page",
+        lambda **kwargs: ListingPage(
+            collections=[
+                CollectionInfo(
+                    "http://host/R/LIVE-00002?func=details&id=2",
+                    "title_2",
+                    "",
+                    "http://host/R/LIVE-00002?func=pdf&id=2",
+                )
+            ],
+            next_page_url=None,
+        ),
+    )
+
+    with CrawlCheckpoint(path=tmp_path / "checkpoint.jsonl") as checkpoint:
+        collections = list(
+            crawl_collections(starting_urls=["starting_url"], checkpoint=checkpoint)
+        )
+        next_page_url = checkpoint.get_next_page_url("starting_url")
+
+    # the starting page is requested for a live session
+    assert requested_links == ["starting_url", "http://host/R/LIVE-00002?func=page-2"]
+    assert [(c.details_link, c.pdf_link) for c in collections] == [
+        (
+            "http://host/R/LIVE-00002?func=details&id=1",
+            "http://host/R/LIVE-00002?func=pdf&id=1",
+        ),
+        (
+            "http://host/R/LIVE-00002?func=details&id=2",
+            "http://host/R/LIVE-00002?func=pdf&id=2",
+        ),
+    ]
+    assert next_page_url is None
+
+
+def test_crawl_collections_stores_collections_of_checkpoint_in_catalog(
+    monkeypatch, tmp_path
+):
+    # the interrupted run stopped before storing the collections in the catalog
+    with CrawlCheckpoint(path=tmp_path / "checkpoint.jsonl") as checkpoint:
+        checkpoint.add_page(
+            starting_url="starting_url",
+            collections=[
+                CollectionPdf(
+                    details_link="details_link", title="title", pdf_link="pdf_link"
+                )
+            ],
+            next_page_url=None,
+        )
+    page_response = requests.Response()
+    page_response.status_code = 200
+    page_response._content = b"<html></html>"
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response",
+        lambda link, **kwargs: page_response,
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_for_table_view",
+        lambda soup: "table_view",
+    )
+
+    with (
+        CrawlCheckpoint(path=tmp_path / "checkpoint.jsonl") as checkpoint,
+        Catalog(path=tmp_path / "catalog.sqlite3") as catalog,
+    ):
+        list(
+            crawl_collections(
+                starting_urls=["starting_url"], checkpoint=checkpoint, catalog=catalog
+            )
+        )
+
+        assert catalog.are_known(["details_link"])
+
+
+def test_crawl_collections_records_page_once_stored_in_catalog(monkeypatch, tmp_path):
+    page_response = requests.Response()
+    page_response.status_code = 200
+    page_response._content = b"<html></html>"
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response",
+        lambda link, **kwargs: page_response,
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_for_table_view",
+        lambda soup: "table_view",
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_listing_page",
+        lambda **kwargs: ListingPage(
+            collections=[CollectionInfo("details_link", "title", "", "pdf_link")],
+            next_page_url=None,
+        ),
+    )
+    known_when_recorded = []
+
+    with (
+        CrawlCheckpoint(path=tmp_path / "checkpoint.jsonl") as checkpoint,
+        Catalog(path=tmp_path / "catalog.sqlite3") as catalog,
+    ):
+        add_page = checkpoint.add_page
+
+        def add_page_and_check_catalog(collections, **kwargs):
+            known_when_recorded.append(
+                catalog.are_known([c.details_link for c in collections])
+            )
+            add_page(collections=collections, **kwargs)
+
+        monkeypatch.setattr(checkpoint, "add_page", add_page_and_check_catalog)
+        list(
+            crawl_collections(
+                starting_urls=["starting_url"], checkpoint=checkpoint, catalog=catalog
+            )
+        )
+
+    assert known_when_recorded == [True]
+
+
+def test_crawl_collections_stops_at_page_without_collections(monkeypatch, tmp_path):
+    pages = {
+        "table_view": ListingPage(
+            collections=[CollectionInfo("details_link", "title", "", "pdf_link")],
+            next_page_url="page_2",
+        ),
+        # e.g. the answer to the URL of an expired session
+        "page_2": ListingPage(collections=[], next_page_url=None),
+    }
+
+    def get_link_response(link, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = link.encode()
+        return response
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_soup",
+        lambda response, **kwargs: response.content.decode(),
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_for_table_view",
+        lambda soup: "table_view",
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_listing_page",
+        lambda soup, **kwargs: pages[soup],
+    )
+
+    with CrawlCheckpoint(path=tmp_path / "checkpoint.jsonl") as checkpoint:
+        collections = list(
+            crawl_collections(starting_urls=["starting_url"], checkpoint=checkpoint)
+        )
+        next_page_url = checkpoint.get_next_page_url("starting_url")
+
+    assert [c.details_link for c in collections] == ["details_link"]
+    # the next run resumes from the page without collections
+    assert next_page_url == "page_2"
+
+
+@pytest.mark.parametrize(
+    "incremental, expected_requested_links",
+    [(True, ["table_view", "page_2"]), (False, ["table_view", "page_2", "page_3"])],
+)
+def test_crawl_collections_incremental_stops_at_page_of_known_collections(
+    monkeypatch, tmp_path, incremental, expected_requested_links
+):
+    pages = {
+        "table_view": (["new_1", "known_1"], "page_2"),
+        "page_2": (["known_2", "known_3"], "page_3"),
+        "page_3": (["known_4"], None),
+    }
+    requested_links = []
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = link.encode()
+        return response
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_soup",
+        lambda response, **kwargs: response.content.decode(),
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_for_table_view",
+        lambda soup: "table_view",
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_listing_page",
+        lambda soup, **kwargs: ListingPage(
+            collections=[
+                CollectionInfo(link, "title", "", "pdf_link") for link in pages[soup][0]
+            ],
+            next_page_url=pages[soup][1],
+        ),
+    )
+
+    with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+        catalog.upsert_collections(
+            [
+                CollectionPdf(details_link=link, title="title", pdf_link="pdf_link")
+                for link in ("known_1", "known_2", "known_3", "known_4")
+            ]
+        )
+        list(
+            crawl_collections(
+                starting_urls=["starting_url"],
+                catalog=catalog,
+                incremental=incremental,
+            )
+        )
+
+    assert requested_links == ["starting_url"] + expected_requested_links
+
+
+def test_crawl_collections_incremental_stops_at_known_collections_of_other_session(
+    monkeypatch, tmp_path
+):
+    # the next page of the table view holds the same collections in both runs
+    pages = {"func=table-view": ("id=1", "func=page-2"), "func=page-2": ("id=2", None)}
+    requested_links = []
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = link.encode()
+        return response
+
+    def get_listing_page(soup, **kwargs):
+        base_link, query = soup.split("?")
+        collection_id, next_page = pages[query]
+        return ListingPage(
+            collections=[
+                CollectionInfo(
+                    f"{base_link}?func=details&{collection_id}", "title", "", "pdf"
+                )
+            ],
+            next_page_url=f"{base_link}?{next_page}" if next_page else None,
+        )
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_soup",
+        lambda response, **kwargs: response.content.decode(),
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_listing_page", get_listing_page
+    )
+
+    with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+        for session in ("OLD-00001", "NEW-00002"):
+            monkeypatch.setattr(
+                "dacoromanica_downloader.main.get_link_for_table_view",
+                lambda soup: f"http://host/R/{session}?func=table-view",
+            )
+            requested_links.clear()
+            list(
+                crawl_collections(
+                    starting_urls=["starting_url"], catalog=catalog, incremental=True
+                )
+            )
+
+    # the second run stops at the first page, whose collection is known
+    assert requested_links == [
+        "starting_url",
+        "http://host/R/NEW-00002?func=table-view",
+    ]
+
+
+def test_crawl_collections_does_not_cache_pages_handing_out_session(monkeypatch):
+    pages = {"table_view": "page_2", "page_2": None}
+    cache = object()
+    requested_links = []
+
+    def get_link_response(link, cache=None, **kwargs):
+        requested_links.append((link, cache))
+        response = requests.Response()
+        response.status_code = 200
+        response._content = link.encode()
+        return response
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_soup",
+        lambda response, **kwargs: response.content.decode(),
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_for_table_view",
+        lambda soup: "table_view",
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_listing_page",
+        lambda soup, **kwargs: ListingPage(
+            collections=[CollectionInfo(soup, "title", "", "pdf_link")],
+            next_page_url=pages[soup],
+        ),
+    )
+
+    list(crawl_collections(starting_urls=["starting_url"], cache=cache))
+
+    assert requested_links == [
+        ("starting_url", None),
+        ("table_view", None),
+        ("page_2", cache),
+    ]
+
+
+def test_crawl_collections_moves_links_of_cached_pages_to_live_session(monkeypatch):
+    # the links of page_2 were cached during an earlier session
+    pages = {
+        "http://host/R?func=table-view": (["details_1"], "func=page-2"),
+        "http://host/R?func=page-2": (["details_2"], "func=page-3"),
+        "http://host/R?func=page-3": (["details_3"], None),
+    }
+    sessions = {
+        "http://host/R?func=table-view": "LIVE-00002",
+        "http://host/R?func=page-2": "OLD-00001",
+        "http://host/R?func=page-3": "OLD-00001",
+    }
+    requested_links = []
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = remove_session(link).encode()
+        return response
+
+    def get_listing_page(soup, **kwargs):
+        collection_links, next_page = pages[soup]
+        base_link = f"http://host/R/{sessions[soup]}"
+        return ListingPage(
+            collections=[
+                CollectionInfo(f"{base_link}?func={link}", "title", "", base_link)
+                for link in collection_links
+            ],
+            next_page_url=f"{base_link}?{next_page}" if next_page else None,
+        )
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_soup",
+        lambda response, **kwargs: response.content.decode(),
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_for_table_view",
+        lambda soup: "http://host/R/LIVE-00002?func=table-view",
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_listing_page", get_listing_page
+    )
+
+    collections = list(crawl_collections(starting_urls=["starting_url"]))
+
+    assert requested_links == [
+        "starting_url",
+        "http://host/R/LIVE-00002?func=table-view",
+        "http://host/R/LIVE-00002?func=page-2",
+        "http://host/R/LIVE-00002?func=page-3",
+    ]
+    assert [(c.details_link, c.pdf_link) for c in collections] == [
+        (f"http://host/R/LIVE-00002?func=details_{i}", "http://host/R/LIVE-00002")
+        for i in (1, 2, 3)
+    ]
+
+
+def test_crawl_collections_does_not_cache_page_without_collections(
+    monkeypatch, tmp_path, get_html_response
+):
+    pages = {
+        "table_view": ListingPage(
+            collections=[CollectionInfo("details_link", "title", "", "pdf_link")],
+            next_page_url="page_2",
+        ),
+        # e.g. the answer to the URL of an expired session
+        "page_2": ListingPage(collections=[], next_page_url=None),
+    }
+
+    def get_link_response(link, cache=None, **kwargs):
+        response = get_html_response(link.encode())
+        if cache:
+            cache.store(link, response)
+        return response
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_soup",
+        lambda response, **kwargs: response.content.decode(),
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_for_table_view",
+        lambda soup: "table_view",
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.scrape.get_listing_page",
+        lambda soup, **kwargs: pages[soup],
+    )
+
+    with HttpCache(path=tmp_path / "http_cache.sqlite3") as cache:
+        collections = list(
+            crawl_collections(starting_urls=["starting_url"], cache=cache)
+        )
+        cached_response = cache.get("page_2")
+
+    assert [c.details_link for c in collections] == ["details_link"]
+    assert cached_response is None
+
+
+def test_update_collection_year_does_not_request_year_in_checkpoint(
+    monkeypatch, tmp_path
+):
+    checkpoint = CrawlCheckpoint(path=tmp_path / "checkpoint.jsonl")
+    checkpoint.add_year(details_link="details_link", year=1900)
+    collection = CollectionPdf(
+        details_link="details_link", title="title", pdf_link="pdf_link"
+    )
+    requested_links = []
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+
+    assert update_collection_year(collection, checkpoint=checkpoint)
+    assert requested_links == []
+    assert collection.year == 1900
+    checkpoint.close()
+
+
+def test_update_collection_year_twice_keeps_year_of_collection(monkeypatch, tmp_path):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b"details page"
+    requested_links = []
+
+    def get_link_response(link, **kwargs):
+        requested_links.append(link)
+        return response
+
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.get_link_response", get_link_response
+    )
+    monkeypatch.setattr(
+        "dacoromanica_downloader.main.extract_with_fallback", lambda **kwargs: "1890"
+    )
+    checkpoint = CrawlCheckpoint(path=tmp_path / "checkpoint.jsonl")
+    collections = [
+        CollectionPdf(
+            details_link="details_link", title="T", pdf_link="pdf_link", author="A"
+        )
+        for _ in range(2)
+    ]
+
+    with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+        catalog.upsert_collections(collections[:1])
+        for collection in collections:
+            assert update_collection_year(
+                collection, checkpoint=checkpoint, catalog=catalog
+            )
+        year_in_catalog = catalog.get_year("details_link")
+    checkpoint.close()
+
+    assert requested_links == ["details_link"]
+    assert [c.downloaded_file_name for c in collections] == ["A_T_1890.pdf"] * 2
+    assert year_in_catalog == 1890
+
+
+def test_update_collection_year_stores_year_of_checkpoint_in_catalog(tmp_path):
+    checkpoint = CrawlCheckpoint(path=tmp_path / "checkpoint.jsonl")
+    checkpoint.add_year(details_link="details_link", year=1900)
+    collection = CollectionPdf(
+        details_link="details_link", title="title", pdf_link="pdf_link"
+    )
+
+    with Catalog(path=tmp_path / "catalog.sqlite3") as catalog:
+        catalog.upsert_collections([collection])
+        assert update_collection_year(
+            collection, checkpoint=checkpoint, catalog=catalog
+        )
+        year_in_catalog = catalog.get_year("details_link")
+    checkpoint.close()
+
+    assert year_in_catalog == 1900
+
+
+class TestProcessCollections:
+    def test_process_collections_updates_year_before_downloading(
+        self, monkeypatch, capsys
+    ):
+        collections = [
+            CollectionPdf(
+                details_link=f"details_link_{i}", title=f"title_{i}", pdf_link="link"
+            )
+            for i in range(8)
+        ]
+        downloaded = []
+
+        def update_collection_year(collection, **kwargs):
+            collection.update_collection_year(year="1900")
+            return True
+
+        def download_collection(collection, **kwargs):
+            downloaded.append((collection, collection.year))
+
+        monkeypatch.setattr(
+            "dacoromanica_downloader.main.update_collection_year",
+            update_collection_year,
+        )
+        monkeypatch.setattr(
+            "dacoromanica_downloader.main.download_collection", download_collection
+        )
+
+        process_collections(iter(collections), details_workers=3, workers=2)
+
+        out, _ = capsys.readouterr()
+        assert sorted(
+            (collection.details_link for collection, _ in downloaded)
+        ) == sorted(collection.details_link for collection in collections)
+        assert all(year == 1900 for _, year in downloaded)
+        assert "8 of 8 details pages fetched in" in out
+        assert "Number of pdf files processed: 8" in out
+
+    def test_process_collections_downloads_while_collections_are_crawled(
+        self, monkeypatch
+    ):
+        first_download = threading.Event()
+        crawled_before_first_download = []
+
+        def crawl():
+            for i in range(5):
+                crawled_before_first_download.append(first_download.is_set())
+                yield CollectionPdf(
+                    details_link=f"details_link_{i}", title=f"title_{i}", pdf_link=""
+                )
+                time.sleep(0.05)
+
+        monkeypatch.setattr(
+            "dacoromanica_downloader.main.update_collection_year",
+            lambda collection, **kwargs: True,
+        )
+        monkeypatch.setattr(
+            "dacoromanica_downloader.main.download_collection",
+            lambda collection, **kwargs: first_download.set(),
+        )
+
+        process_collections(crawl())
+
+        assert crawled_before_first_download[-1] is True
+
+
+class TestParseArguments:
+    def test_parse_arguments_defaults_to_one_worker(self):
+        arguments = parse_arguments([])
+
+        assert arguments.workers == 1
+
+    def test_parse_arguments_gets_workers(self):
+        arguments = parse_arguments(["--workers", "8"])
+
+        assert arguments.workers == 8
+
+    def test_parse_arguments_gets_from_catalog(self):
+        assert parse_arguments([]).from_catalog is False
+        assert parse_arguments(["--from-catalog"]).from_catalog is True
+
+    def test_parse_arguments_gets_incremental(self):
+        assert parse_arguments([]).incremental is False
+        assert parse_arguments(["--incremental"]).incremental is True
+
+    def test_parse_arguments_gets_sort(self):
+        assert parse_arguments([]).sort is False
+        assert parse_arguments(["--sort"]).sort is True
+
+    def test_parse_arguments_gets_parse_processes(self):
+        assert parse_arguments([]).parse_processes is None
+        assert parse_arguments(["--parse-processes", "8"]).parse_processes == 8
+
+    def test_parse_arguments_gets_cache_options(self):
+        arguments = parse_arguments([])
+        assert arguments.no_cache is False
+        assert arguments.cache_ttl == DEFAULT_CACHE_TTL
+
+        arguments = parse_arguments(["--no-cache", "--cache-ttl", "60"])
+        assert arguments.no_cache is True
+        assert arguments.cache_ttl == 60
+
+    def test_parse_arguments_gets_fsync(self):
+        assert parse_arguments([]).fsync == "file"
+        assert parse_arguments(["--fsync", "all"]).fsync == "all"
+        with pytest.raises(SystemExit):
+            parse_arguments(["--fsync", "always"])
+
+    def test_parse_arguments_gets_sort_options(self):
+        arguments = parse_arguments([])
+        assert arguments.collation == "simple"
+        assert arguments.sort_run_size == DEFAULT_SORT_RUN_SIZE
+
+        arguments = parse_arguments(
+            ["--collation", "romanian", "--sort-run-size", "1000"]
+        )
+        assert arguments.collation == "romanian"
+        assert arguments.sort_run_size == 1000
+
+    def test_parse_arguments_gets_layout_options(self):
+        arguments = parse_arguments([])
+        assert arguments.layout == "flat"
+        assert arguments.migrate_layout is False
+
+        arguments = parse_arguments(["--layout", "hash", "--migrate-layout"])
+        assert arguments.layout == "hash"
+        assert arguments.migrate_layout is True
+        with pytest.raises(SystemExit):
+            parse_arguments(["--layout", "title"])
+
+    def test_parse_arguments_gets_details_workers(self):
+        assert parse_arguments([]).details_workers == 4
+        assert parse_arguments(["--details-workers", "2"]).details_workers == 2
+
+    @pytest.mark.parametrize("workers", ["0", "-1", "a"])
+    def test_parse_arguments_rejects_invalid_workers(self, workers, capsys):
+        with pytest.raises(SystemExit):
+            parse_arguments(["--workers", workers])
+
+        _, err = capsys.readouterr()
+        assert f"'{workers}' is not a positive integer." in err
+
+    def test_parse_arguments_gets_rate_limits(self):
+        arguments = parse_arguments(
+            ["--requests-per-second", "0.5", "--bytes-per-second", "1000"]
+        )
+
+        assert arguments.requests_per_second == 0.5
+        assert arguments.bytes_per_second == 1000
+
+    def test_parse_arguments_rejects_invalid_rate_limit(self, capsys):
+        with pytest.raises(SystemExit):
+            parse_arguments(["--requests-per-second", "0"])
+
+        _, err = capsys.readouterr()
+        assert "'0' is not a positive number." in err
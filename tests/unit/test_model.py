@@ -1,6 +1,7 @@
 import pytest
+from bs4 import BeautifulSoup
 
-from dacoromanica_downloader.model import CollectionPdf
+from dacoromanica_downloader.model import CollectionPdf, CollectionPdfColumns
 
 
 class TestCollectionPdf:
@@ -186,3 +187,105 @@ class TestCollectionPdfDownloadedFileName:
         )
 
         assert test_collection.downloaded_file_name == f"{author}_{title}.pdf"
+
+
+class TestCollectionPdfMemory:
+    def test_CollectionPdf_has_no_instance_dict(self):
+        test_collection = CollectionPdf(
+            details_link="details_link", title="title", pdf_link="pdf_link"
+        )
+
+        assert not hasattr(test_collection, "__dict__")
+
+    def test_CollectionPdf_interns_author(self):
+        collections = [
+            CollectionPdf(
+                details_link="details_link",
+                title="title",
+                pdf_link="pdf_link",
+                author="".join(["Author", " ", "1"]),
+            )
+            for _ in range(2)
+        ]
+
+        assert collections[0].author is collections[1].author
+
+    def test_CollectionPdf_interns_author_extracted_by_bs4(self):
+        author = BeautifulSoup("<p>Author 1</p>", "html.parser").p.string
+
+        collection = CollectionPdf(
+            details_link="details_link",
+            title="title",
+            pdf_link="pdf_link",
+            author=author,
+        )
+
+        assert type(collection.author) is str
+        assert collection.author == "Author 1"
+
+
+class TestCollectionPdfColumns:
+    def test_CollectionPdfColumns_stores_collections(self):
+        collections = [
+            CollectionPdf(
+                details_link=f"details_link_{index}",
+                title=f"title_{index}",
+                pdf_link=f"pdf_link_{index}",
+                author="author",
+                year=1900 + index,
+            )
+            for index in range(3)
+        ]
+
+        columns = CollectionPdfColumns(collections)
+
+        assert len(columns) == 3
+        assert [str(collection) for collection in columns] == [
+            str(collection) for collection in collections
+        ]
+        assert columns[1].details_link == "details_link_1"
+        assert columns[1].pdf_link == "pdf_link_1"
+
+    def test_CollectionPdfColumns_set_year(self):
+        columns = CollectionPdfColumns(
+            [CollectionPdf(details_link="details_link", title="title", pdf_link="")]
+        )
+
+        columns.set_year(0, 1850)
+
+        assert columns[0].year == 1850
+
+
+class TestCollectionPdfDownloadedFileNameCache:
+    def test_downloaded_file_name_is_computed_once(self, monkeypatch):
+        test_collection = CollectionPdf(
+            details_link="details_link", title="title", pdf_link="pdf_link"
+        )
+        computed_names = []
+        get_downloaded_file_name = CollectionPdf._get_downloaded_file_name
+
+        def counting_get_downloaded_file_name(self):
+            computed_names.append(get_downloaded_file_name(self))
+            return computed_names[-1]
+
+        monkeypatch.setattr(
+            CollectionPdf,
+            "_get_downloaded_file_name",
+            counting_get_downloaded_file_name,
+        )
+
+        for _ in range(3):
+            assert test_collection.downloaded_file_name == "title.pdf"
+        assert computed_names == ["title.pdf"]
+
+    def test_downloaded_file_name_changes_with_year(self):
+        test_collection = CollectionPdf(
+            details_link="details_link", title="title", pdf_link="pdf_link"
+        )
+        assert test_collection.downloaded_file_name == "title.pdf"
+
+        test_collection.update_collection_year(year="1900")
+        assert test_collection.downloaded_file_name == "title_1900.pdf"
+
+        test_collection.year = 1850
+        assert test_collection.downloaded_file_name == "title_1850.pdf"
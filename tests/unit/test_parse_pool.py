@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+from dacoromanica_downloader.parse_pool import (
+    ParsePool,
+    extract_collection_year,
+    extract_listing_page,
+)
+from dacoromanica_downloader.scrape import CollectionInfo, ListingPage
+
+test_data_main = Path("tests") / "test_data" / "test_data_main"
+
+
+def test_extract_listing_page():
+    content = (test_data_main / "table_view_collections1.html").read_bytes()
+
+    listing_page = extract_listing_page(
+        content=content,
+        content_type="text/html; charset=utf-8",
+        collections_base_link_identifier="collection_details",
+        next_page_link_identifier="table_view_collections",
+    )
+
+    assert listing_page.next_page_url == "table_view_collections2.html"
+    assert listing_page.collections[0] == CollectionInfo(
+        details_link="collection_details_page1.html",
+        title="Title 1",
+        author="Author 1",
+        pdf_link="collection1.pdf",
+    )
+    assert type(listing_page.collections[0].title) is str
+
+
+def test_extract_listing_page_without_collections():
+    listing_page = extract_listing_page(
+        content=b"<html><body><a href='next'>Next</a></body></html>",
+        content_type=None,
+        collections_base_link_identifier="collection_details",
+        next_page_link_identifier="next",
+    )
+
+    assert listing_page is None
+
+
+@pytest.mark.parametrize(
+    "content, expected_year",
+    [
+        ("<table><tr><td>Data apariţiei</td><td>1900</td></tr></table>", "1900"),
+        ("<table><tr><td>Titlu</td><td>Title</td></tr></table>", None),
+    ],
+)
+def test_extract_collection_year(content, expected_year):
+    year = extract_collection_year(
+        content=content.encode("windows-1250"),
+        content_type="text/html; charset=windows-1250",
+    )
+
+    assert year == expected_year
+    assert type(year) is type(expected_year)
+
+
+def test_parse_pool_parses_pages_in_worker_processes(get_html_response):
+    listing_content = (test_data_main / "table_view_collections1.html").read_bytes()
+    details_content = (test_data_main / "collection_details_page1.html").read_bytes()
+
+    with ParsePool(processes=2) as parse_pool:
+        listing_page = parse_pool.get_listing_page(
+            response=get_html_response(listing_content),
+            collections_base_link_identifier="collection_details",
+            next_page_link_identifier="table_view_collections",
+        )
+        year = parse_pool.get_collection_year(get_html_response(details_content))
+
+    assert isinstance(listing_page, ListingPage)
+    assert len(listing_page.collections) == 2
+    assert year == "1900"
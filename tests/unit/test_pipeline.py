@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+from dacoromanica_downloader.pipeline import Stage, run_pipeline
+
+
+def test_run_pipeline_passes_items_through_all_stages():
+    results = []
+    lock = threading.Lock()
+
+    def collect(item):
+        with lock:
+            results.append(item)
+
+    stats = run_pipeline(
+        items=range(20),
+        stages=[
+            Stage(name="double", handle=lambda x: x * 2, workers=3),
+            Stage(name="collect", handle=collect, workers=2),
+        ],
+    )
+
+    assert sorted(results) == [x * 2 for x in range(20)]
+    assert [(s.name, s.items) for s in stats] == [("double", 20), ("collect", 20)]
+
+
+def test_run_pipeline_drops_items_for_which_a_stage_returns_none():
+    results = []
+
+    run_pipeline(
+        items=range(10),
+        stages=[
+            Stage(name="odd", handle=lambda x: x if x % 2 else None, workers=1),
+            Stage(name="collect", handle=results.append, workers=1),
+        ],
+    )
+
+    assert results == [1, 3, 5, 7, 9]
+
+
+def test_run_pipeline_starts_last_stage_before_items_are_exhausted():
+    first_item_handled = threading.Event()
+    items_read_before_first_handled = []
+
+    def items():
+        for i in range(5):
+            items_read_before_first_handled.append(first_item_handled.is_set())
+            yield i
+            time.sleep(0.05)
+
+    run_pipeline(
+        items=items(),
+        stages=[
+            Stage(name="pass", handle=lambda x: x, workers=1),
+            Stage(name="last", handle=lambda x: first_item_handled.set(), workers=1),
+        ],
+    )
+
+    assert items_read_before_first_handled[0] is False
+    assert items_read_before_first_handled[-1] is True
+
+
+def test_run_pipeline_bounds_the_queues():
+    read_items = []
+    release = threading.Event()
+
+    def items():
+        for i in range(50):
+            read_items.append(i)
+            yield i
+
+    def slow(item):
+        release.wait()
+
+    thread = threading.Thread(
+        target=run_pipeline,
+        kwargs={
+            "items": items(),
+            "stages": [Stage(name="slow", handle=slow, workers=1)],
+            "queue_size": 5,
+        },
+    )
+    thread.start()
+    time.sleep(0.2)
+    # one item is being handled, five are queued and one waits to be queued
+    assert len(read_items) == 7
+    release.set()
+    thread.join()
+
+    assert len(read_items) == 50
+
+
+def test_run_pipeline_raises_stage_exception_and_stops_reading_items():
+    read_items = []
+
+    def items():
+        for i in range(1000):
+            read_items.append(i)
+            yield i
+
+    def fail(item):
+        if item == 3:
+            raise ValueError("stage failed")
+        return item
+
+    with pytest.raises(ValueError, match="stage failed"):
+        run_pipeline(
+            items=items(),
+            stages=[
+                Stage(name="fail", handle=fail, workers=1),
+                Stage(name="last", handle=lambda x: None, workers=1),
+            ],
+            queue_size=2,
+        )
+
+    assert len(read_items) < 1000
+
+
+def test_run_pipeline_stops_workers_if_items_raise():
+    handled = []
+
+    def items():
+        yield from range(50)
+        raise ValueError("items failed")
+
+    def handle(item):
+        time.sleep(0.05)
+        handled.append(item)
+
+    with pytest.raises(ValueError, match="items failed"):
+        run_pipeline(
+            items=items(), stages=[Stage(name="slow", handle=handle, workers=2)]
+        )
+
+    # only the items being handled when reading failed are handled
+    assert len(handled) <= 2
@@ -0,0 +1,92 @@
+import pytest
+
+from dacoromanica_downloader.rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket:
+    def test_token_bucket_does_not_wait_while_tokens_are_available(self):
+        fake_clock = FakeClock()
+        bucket = TokenBucket(
+            rate=1, capacity=3, clock=fake_clock.clock, sleep=fake_clock.sleep
+        )
+
+        waits = [bucket.acquire() for _ in range(3)]
+
+        assert waits == [0, 0, 0]
+        assert fake_clock.sleeps == []
+
+    def test_token_bucket_waits_when_tokens_are_exhausted(self):
+        fake_clock = FakeClock()
+        bucket = TokenBucket(
+            rate=2, capacity=1, clock=fake_clock.clock, sleep=fake_clock.sleep
+        )
+
+        bucket.acquire()
+        wait = bucket.acquire()
+
+        assert wait == pytest.approx(0.5)
+        assert fake_clock.now == pytest.approx(0.5)
+
+    def test_token_bucket_counts_elapsed_time_against_the_interval(self):
+        fake_clock = FakeClock()
+        bucket = TokenBucket(
+            rate=1, capacity=1, clock=fake_clock.clock, sleep=fake_clock.sleep
+        )
+
+        bucket.acquire()
+        # a slow response took longer than the interval between requests
+        fake_clock.now += 10
+        wait = bucket.acquire()
+
+        assert wait == 0
+
+    def test_token_bucket_accepts_amounts_larger_than_its_capacity(self):
+        fake_clock = FakeClock()
+        bucket = TokenBucket(
+            rate=100, capacity=100, clock=fake_clock.clock, sleep=fake_clock.sleep
+        )
+
+        first_wait = bucket.acquire(300)
+        second_wait = bucket.acquire(100)
+
+        assert first_wait == pytest.approx(2)
+        assert second_wait == pytest.approx(1)
+
+    def test_token_bucket_rejects_rate_that_is_not_positive(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRateLimiter:
+    def test_rate_limiter_without_limits_does_not_create_buckets(self):
+        rate_limiter = RateLimiter()
+
+        rate_limiter.wait_for_request("http://host/page")
+        rate_limiter.wait_for_bytes("http://host/page", 1000)
+
+        assert rate_limiter._request_buckets == {}
+        assert rate_limiter._byte_buckets == {}
+
+    def test_rate_limiter_keeps_one_bucket_per_host(self):
+        rate_limiter = RateLimiter(requests_per_second=100, bytes_per_second=1000)
+
+        rate_limiter.wait_for_request("http://host_1:8881/page_1")
+        rate_limiter.wait_for_request("http://host_1:8881/page_2")
+        rate_limiter.wait_for_request("http://host_2/page")
+        rate_limiter.wait_for_bytes("http://host_1:8881/page_1", 10)
+
+        assert set(rate_limiter._request_buckets) == {"host_1:8881", "host_2"}
+        assert set(rate_limiter._byte_buckets) == {"host_1:8881"}
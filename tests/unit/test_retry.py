@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+from dacoromanica_downloader.retry import (
+    CONNECTION_ERROR,
+    SERVER_ERROR,
+    THROTTLED,
+    TIMEOUT,
+    RetryCounters,
+    RetryPolicy,
+    RetryRule,
+    get_failure_class,
+    get_retry_after,
+)
+
+
+def get_response(status_code: int, **headers) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers)
+
+    return response
+
+
+@pytest.mark.parametrize(
+    "outcome, expected_class",
+    [
+        (get_response(200), None),
+        (get_response(404), None),
+        (get_response(429), THROTTLED),
+        (get_response(503), SERVER_ERROR),
+        (requests.exceptions.ReadTimeout(), TIMEOUT),
+        (requests.exceptions.ConnectTimeout(), TIMEOUT),
+        (requests.exceptions.ConnectionError(), CONNECTION_ERROR),
+        (requests.exceptions.MissingSchema(), None),
+    ],
+)
+def test_get_failure_class(outcome, expected_class):
+    assert get_failure_class(outcome) == expected_class
+
+
+def test_get_retry_after():
+    in_a_minute = datetime.now(timezone.utc) + timedelta(seconds=60)
+
+    assert get_retry_after(get_response(503)) is None
+    assert get_retry_after(get_response(503, **{"Retry-After": "120"})) == 120
+    assert get_retry_after(get_response(503, **{"Retry-After": "soon"})) is None
+    assert (
+        55
+        < get_retry_after(
+            get_response(503, **{"Retry-After": format_datetime(in_a_minute)})
+        )
+        <= 60
+    )
+
+
+class TestRetryPolicy:
+    def test_retry_policy_backs_off_exponentially_with_jitter(self):
+        bounds = []
+
+        def uniform(low, high):
+            bounds.append((low, high))
+            return high / 2
+
+        retry_policy = RetryPolicy(
+            rules={TIMEOUT: RetryRule(attempts=5, base_delay=1, max_delay=5)},
+            uniform=uniform,
+        )
+        delays = [
+            retry_policy.get_delay(requests.exceptions.ReadTimeout(), attempt)
+            for attempt in range(5)
+        ]
+
+        assert bounds == [(0, 1), (0, 2), (0, 4), (0, 5)]
+        assert delays == [0.5, 1, 2, 2.5, None]
+        assert retry_policy.counters == {TIMEOUT: RetryCounters(retries=4, gave_up=1)}
+
+    def test_retry_policy_follows_retry_after(self):
+        retry_policy = RetryPolicy(
+            rules={THROTTLED: RetryRule(attempts=3, base_delay=1, max_delay=60)}
+        )
+
+        assert (
+            retry_policy.get_delay(
+                get_response(429, **{"Retry-After": "30"}), attempt=0
+            )
+            == 30
+        )
+        assert (
+            retry_policy.get_delay(
+                get_response(429, **{"Retry-After": "3600"}), attempt=0
+            )
+            is None
+        )
+
+    def test_retry_policy_does_not_retry_failure_class_without_rule(self):
+        retry_policy = RetryPolicy(rules={})
+
+        assert retry_policy.get_delay(get_response(503), attempt=0) is None
+        assert retry_policy.get_delay(get_response(404), attempt=0) is None
+        assert retry_policy.counters == {}
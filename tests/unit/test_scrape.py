@@ -1,11 +1,20 @@
+from pathlib import Path
+
 import pytest
 from bs4 import BeautifulSoup
 
 from dacoromanica_downloader.download_pdf import get_link_response
 from dacoromanica_downloader.scrape import (
+    DETAILS_PAGE_STRAINER,
+    LISTING_PAGE_STRAINER,
+    TABLE_VIEW_LINK_STRAINER,
+    extract_with_fallback,
     get_collection_info,
     get_collection_year,
+    get_declared_charset,
     get_link_for_table_view,
+    get_listing_page,
+    get_listing_page_data,
     get_next_page_url,
     get_soup,
 )
@@ -35,6 +44,176 @@ class TestGetSoup:
         assert soup.find("h1").string == "vânătoare bărbați pietriș"
         assert soup.find("p").string == "VÂNĂTOARE BĂRBAȚI PIETRIȘ"
 
+    @pytest.mark.parametrize("parser", ["lxml", "html5lib"])
+    def test_get_soup_honours_charset_of_content_type_header(
+        self, parser, get_html_response
+    ):
+        page = "<html><body><p>Data apariţiei</p></body></html>"
+        response = get_html_response(page.encode("windows-1250"))
+        response.headers["Content-Type"] = "text/html; charset=Windows-1250"
+
+        soup = get_soup(response, parser=parser)
+
+        assert soup.find("p").string == "Data apariţiei"
+        assert soup.original_encoding == "windows-1250"
+
+    @pytest.mark.parametrize(
+        "content_type, expected_charset",
+        [
+            (None, None),
+            ("text/html", None),
+            ("text/html; charset=UTF-8", "utf-8"),
+            ('text/html; charset="iso-8859-2"', "iso-8859-2"),
+        ],
+    )
+    def test_get_declared_charset(
+        self, content_type, expected_charset, get_html_response
+    ):
+        response = get_html_response(b"")
+        if content_type:
+            response.headers["Content-Type"] = content_type
+
+        assert get_declared_charset(response) == expected_charset
+
+
+def extract_all(soup: BeautifulSoup) -> tuple:
+    return (
+        list(get_collection_info(soup, collections_base_link_identifier="base=GEN01")),
+        list(
+            get_collection_info(
+                soup, collections_base_link_identifier="collection_details"
+            )
+        ),
+        get_collection_year(soup),
+        get_link_for_table_view(soup),
+        get_next_page_url(soup, "func=results-next-page&result_format=001"),
+        get_next_page_url(soup, "table_view_collections"),
+    )
+
+
+@pytest.mark.parametrize(
+    "html_file",
+    sorted(Path("tests/test_data").rglob("*.html")),
+    ids=lambda path: path.name,
+)
+def test_lxml_and_html5lib_extract_same_data(html_file, get_html_response):
+    response = get_html_response(html_file.read_bytes())
+
+    lxml_data = extract_all(get_soup(response, parser="lxml"))
+    html5lib_data = extract_all(get_soup(response, parser="html5lib"))
+
+    assert lxml_data == html5lib_data
+
+
+@pytest.mark.parametrize(
+    "html_file",
+    sorted(Path("tests/test_data").rglob("*.html")),
+    ids=lambda path: path.name,
+)
+def test_parse_plans_extract_same_data_as_whole_page(html_file, get_html_response):
+    response = get_html_response(html_file.read_bytes())
+    soup = get_soup(response)
+    listing_soup = get_soup(response, parse_only=LISTING_PAGE_STRAINER)
+    table_view_soup = get_soup(response, parse_only=TABLE_VIEW_LINK_STRAINER)
+    details_soup = get_soup(response, parse_only=DETAILS_PAGE_STRAINER)
+
+    for identifier in ("base=GEN01", "collection_details"):
+        assert list(get_collection_info(listing_soup, identifier)) == list(
+            get_collection_info(soup, identifier)
+        )
+    for identifier in (
+        "func=results-next-page&result_format=001",
+        "table_view_collections",
+    ):
+        assert get_next_page_url(listing_soup, identifier) == get_next_page_url(
+            soup, identifier
+        )
+    assert get_link_for_table_view(table_view_soup) == get_link_for_table_view(soup)
+    assert get_collection_year(details_soup) == get_collection_year(soup)
+
+
+def test_parse_plan_keeps_only_its_elements(get_html_response):
+    response = get_html_response(
+        b"<html><body><h1>Title</h1><p><a href='link'>Tabel</a></p>"
+        b"<table><tr><td>cell</td></tr></table></body></html>"
+    )
+
+    soup = get_soup(response, parse_only=TABLE_VIEW_LINK_STRAINER)
+
+    assert [tag.name for tag in soup.find_all(True)] == ["a"]
+
+
+class TestExtractWithFallback:
+    def test_extract_with_fallback_uses_first_parser_with_data(self, get_html_response):
+        response = get_html_response(b"<html></html>")
+        parsers = []
+
+        def extract(soup):
+            parsers.append(soup.builder.NAME)
+            return "data" if soup.builder.NAME == "html5lib" else None
+
+        res = extract_with_fallback(response, extract)
+
+        assert res == "data"
+        assert parsers == ["lxml", "html5lib"]
+
+    def test_extract_with_fallback_does_not_parse_again_if_data_found(
+        self, get_html_response
+    ):
+        response = get_html_response(b"<html></html>")
+        parsers = []
+
+        def extract(soup):
+            parsers.append(soup.builder.NAME)
+            return "data"
+
+        extract_with_fallback(response, extract)
+
+        assert parsers == ["lxml"]
+
+    def test_extract_with_fallback_parses_whole_page_with_next_parser(
+        self, get_html_response
+    ):
+        response = get_html_response(b"<html><body><h1>Title</h1></body></html>")
+
+        res = extract_with_fallback(
+            response,
+            lambda soup: soup.find("h1"),
+            parse_only=TABLE_VIEW_LINK_STRAINER,
+        )
+
+        assert res.string == "Title"
+
+    def test_extract_with_fallback_tries_next_parser_on_exception(
+        self, get_html_response
+    ):
+        response = get_html_response(b"<html></html>")
+
+        def extract(soup):
+            if soup.builder.NAME == "lxml":
+                raise IndexError("malformed page")
+            return "data"
+
+        assert extract_with_fallback(response, extract) == "data"
+
+    def test_extract_with_fallback_returns_empty_data_of_last_parser(
+        self, get_html_response
+    ):
+        response = get_html_response(b"<html></html>")
+
+        assert extract_with_fallback(response, lambda soup: []) == []
+
+    def test_extract_with_fallback_raises_exception_of_last_parser(
+        self, get_html_response
+    ):
+        response = get_html_response(b"<html></html>")
+
+        def extract(soup):
+            raise IndexError("malformed page")
+
+        with pytest.raises(IndexError):
+            extract_with_fallback(response, extract)
+
 
 class TestGetNextPageUrl:
     @pytest.mark.parametrize("test_file", ["test_get_next_page_url.html"])
@@ -99,6 +278,94 @@ class TestGetCollectionInfo:
         assert results[2].pdf_link == "pdfs/doc3.pdf"
 
 
+class TestGetListingPage:
+    @pytest.mark.parametrize(
+        "html_file",
+        sorted(Path("tests/test_data").rglob("*.html")),
+        ids=lambda path: path.name,
+    )
+    @pytest.mark.parametrize(
+        "collections_base_link_identifier, next_page_link_identifier",
+        [
+            ("base=GEN01", "func=results-next-page&result_format=001"),
+            ("collection_details", "table_view_collections"),
+        ],
+    )
+    def test_get_listing_page_extracts_same_data_as_separate_extractors(
+        self,
+        html_file,
+        collections_base_link_identifier,
+        next_page_link_identifier,
+        get_html_response,
+    ):
+        soup = get_soup(get_html_response(html_file.read_bytes()))
+
+        res = get_listing_page(
+            soup,
+            collections_base_link_identifier=collections_base_link_identifier,
+            next_page_link_identifier=next_page_link_identifier,
+        )
+
+        assert res.collections == list(
+            get_collection_info(soup, collections_base_link_identifier)
+        )
+        assert res.next_page_url == get_next_page_url(soup, next_page_link_identifier)
+
+    def test_get_listing_page_gets_first_next_page_url(self, get_html_response):
+        soup = get_soup(
+            get_html_response(
+                b"<a href='first_next_page'>Next</a><a href='second_next_page'>Next</a>"
+            )
+        )
+
+        res = get_listing_page(
+            soup,
+            collections_base_link_identifier="base=GEN01",
+            next_page_link_identifier="next_page",
+        )
+
+        assert res.collections == []
+        assert res.next_page_url == "first_next_page"
+
+    def test_get_listing_page_data_returns_None_if_no_collection_found(
+        self, get_html_response
+    ):
+        soup = get_soup(get_html_response(b"<a href='next_page'>Next</a>"))
+
+        res = get_listing_page_data(
+            soup,
+            collections_base_link_identifier="base=GEN01",
+            next_page_link_identifier="next_page",
+        )
+
+        assert res is None
+
+    def test_get_listing_page_data_gets_collections_and_next_page_url(
+        self, get_html_response
+    ):
+        soup = get_soup(
+            get_html_response(
+                b"<table><tr><td></td><td><a href='details?base=GEN01&id=1'></a></td>"
+                b"<td>Title</td><td>Author</td><td></td><td></td>"
+                b"<td><a href='doc.pdf'>PDF</a></td></tr></table>"
+                b"<a href='next_page'>Next</a>"
+            )
+        )
+
+        res = get_listing_page_data(
+            soup,
+            collections_base_link_identifier="base=GEN01",
+            next_page_link_identifier="next_page",
+        )
+
+        assert res == get_listing_page(
+            soup,
+            collections_base_link_identifier="base=GEN01",
+            next_page_link_identifier="next_page",
+        )
+        assert res.collections
+
+
 class TestGetCollectionYear:
     @pytest.mark.parametrize("test_file", ["test_get_collection_year.html"])
     def test_get_collection_year_gets_year(